@@ -0,0 +1,92 @@
+import time
+
+_START = time.perf_counter()
+
+import os
+import runpy
+import sys
+
+# Every subcommand runs an existing script as __main__, so nothing heavy
+# (groq, psycopg2, numpy, pypdf) is imported until a subcommand needs it.
+# Check import overhead with: python -X importtime alaris_cli.py --help
+COMMANDS = {
+    "ingest": ("process_all_papers", "[--profile] [--batch-size=N] [DIR_OR_ARCHIVE ...]",
+               "Batch-process PDF directories and zip/tar bundles"),
+    "ingest-one": ("process_single_paper", "[--profile] ARXIV_ID PDF_PATH",
+                   "Process a single PDF"),
+    "verify": (None, "[nodes|edges|metadata|schema ...]",
+               "Run the table verification scripts (default: nodes edges metadata)"),
+    "export": ("export_tables", "[--incremental] [--format=csv|xlsx|parquet]",
+               "Export tables to exports/"),
+    "stats": ("graph_stats", "[--rebuild]",
+              "Fold pending stats deltas and show the graph stats row"),
+    "snapshot": ("build_viewer_snapshot", "[--full] [--stage]",
+                 "Rebuild the web viewer's static graph file if the data changed"),
+    "archive-edges": ("archive_edges", "[--superseded] [--orphaned] [--older-than=DAYS] [--dry-run]",
+                      "Move old or superseded edges out of the live set"),
+}
+
+VERIFY_SCRIPTS = {
+    "nodes": "verify_nodes",
+    "edges": "verify_edges",
+    "metadata": "verify_metadata",
+    "schema": "check_schema",
+}
+DEFAULT_VERIFY = ("nodes", "edges", "metadata")
+
+
+def usage():
+    print("Usage: python alaris_cli.py [--timing] COMMAND [ARGS]\n")
+    print("Commands:")
+    for name, (_, args, help_text) in COMMANDS.items():
+        print(f"  {name:13} {help_text}")
+        print(f"  {'':13}   {name} {args}")
+
+
+def run_script(module, args):
+    """Run a script module as __main__ with its own argv"""
+    sys.argv = [f"{module}.py", *args]
+    runpy.run_module(module, run_name="__main__", alter_sys=True)
+
+
+def verify(args):
+    names = args or DEFAULT_VERIFY
+    unknown = [n for n in names if n not in VERIFY_SCRIPTS]
+    if unknown:
+        print(f"❌ Unknown verify target(s): {', '.join(unknown)} "
+              f"(choose from {', '.join(VERIFY_SCRIPTS)})")
+        return 2
+    for name in names:
+        run_script(VERIFY_SCRIPTS[name], [])
+    return 0
+
+
+def main(argv):
+    timing = "--timing" in argv
+    argv = [a for a in argv if a != "--timing"]
+    if not argv or argv[0] in ("-h", "--help", "help"):
+        usage()
+        status = 0
+    elif argv[0] not in COMMANDS:
+        print(f"❌ Unknown command: {argv[0]}\n")
+        usage()
+        status = 2
+    else:
+        command, args = argv[0], argv[1:]
+        if timing:
+            print(f"⏱ CLI ready in {(time.perf_counter() - _START) * 1000:.1f} ms")
+        module = COMMANDS[command][0]
+        if module is None:
+            status = verify(args)
+        else:
+            run_script(module, args)
+            status = 0
+    if timing:
+        print(f"⏱ Total {(time.perf_counter() - _START) * 1000:.1f} ms")
+    return status
+
+
+if __name__ == "__main__":
+    # Scripts are resolved relative to this file, wherever it is run from
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,281 @@
+import psycopg2
+import numpy as np
+import json
+import os
+import shutil
+import sys
+import time
+
+from export_tables import DB_CONFIG, stream_query
+
+# Default location of the columnar snapshot
+SNAPSHOT_DIR = os.path.join("snapshots", "graph")
+
+# TEXT[] columns that get dictionary encoding
+LIST_COLUMNS = ("methods", "datasets", "metrics")
+
+# Scalar string columns stored as UTF-8 blob + offsets
+STRING_COLUMNS = ("arxiv_id", "title", "authors", "summary")
+
+
+# ---------------------------------------------------------------------------
+# Encoding helpers
+# ---------------------------------------------------------------------------
+
+def write_strings(path, name, values):
+    """Store strings as one UTF-8 byte blob plus int64 offsets"""
+    encoded = [(v or "").encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    np.save(os.path.join(path, f"{name}.offsets.npy"), offsets)
+    np.save(os.path.join(path, f"{name}.data.npy"), np.frombuffer(b"".join(encoded), dtype=np.uint8))
+
+
+def write_list_column(path, name, rows):
+    """Dictionary-encode a TEXT[] column.
+
+    Produces `<name>.dict` (unique values as a string column),
+    `<name>.codes.npy` (int32 code per element) and `<name>.offsets.npy`
+    (element range per row), i.e. a CSR layout of papers x values.
+    """
+    dictionary = {}
+    codes = []
+    offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+    for i, values in enumerate(rows):
+        for value in values or []:
+            codes.append(dictionary.setdefault(value, len(dictionary)))
+        offsets[i + 1] = len(codes)
+    write_strings(path, f"{name}.dict", list(dictionary))
+    np.save(os.path.join(path, f"{name}.codes.npy"), np.asarray(codes, dtype=np.int32))
+    np.save(os.path.join(path, f"{name}.offsets.npy"), offsets)
+    return len(dictionary)
+
+
+class StringColumn:
+    """Memory-mapped string column; values are decoded only on access"""
+
+    def __init__(self, path, name):
+        self.offsets = np.load(os.path.join(path, f"{name}.offsets.npy"), mmap_mode="r")
+        self.data = np.load(os.path.join(path, f"{name}.data.npy"), mmap_mode="r")
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return bytes(self.data[self.offsets[i]:self.offsets[i + 1]]).decode("utf-8")
+
+    def to_list(self):
+        return [self[i] for i in range(len(self))]
+
+
+# ---------------------------------------------------------------------------
+# Builder
+# ---------------------------------------------------------------------------
+
+class SnapshotBuilder:
+    def __init__(self, snapshot_dir=SNAPSHOT_DIR):
+        self.conn = psycopg2.connect(**DB_CONFIG)
+        self.snapshot_dir = snapshot_dir
+
+    def build(self):
+        """Materialize nodes, metadata and edges into a columnar file set"""
+        print("=" * 70)
+        print("BUILDING COLUMNAR SNAPSHOT")
+        print("=" * 70)
+        start = time.time()
+
+        # Build next to the target and swap in at the end, so readers
+        # never see a half-written snapshot
+        tmp_dir = self.snapshot_dir + ".tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+
+        strings = {name: [] for name in STRING_COLUMNS}
+        lists = {name: [] for name in LIST_COLUMNS}
+        years = []
+        citations = []
+
+        print("\n→ Streaming nodes...")
+        for rows in stream_query(self.conn, """
+            SELECT n.arxiv_id, n.title, n.authors, n.summary,
+                   n.methods, n.datasets, n.metrics,
+                   n.year, COALESCE(m.citation_count, 0)
+            FROM nodes n
+            LEFT JOIN metadata m ON m.arxiv_id = n.arxiv_id
+            ORDER BY n.arxiv_id;
+        """, name="snapshot_nodes"):
+            for row in rows:
+                for name, value in zip(STRING_COLUMNS, row[0:4]):
+                    strings[name].append(value)
+                for name, value in zip(LIST_COLUMNS, row[4:7]):
+                    lists[name].append(value)
+                years.append(row[7] or 0)
+                citations.append(row[8] or 0)
+
+        for name, values in strings.items():
+            write_strings(tmp_dir, name, values)
+        np.save(os.path.join(tmp_dir, "year.npy"), np.asarray(years, dtype=np.int32))
+        np.save(os.path.join(tmp_dir, "citation_count.npy"), np.asarray(citations, dtype=np.int32))
+        dict_sizes = {name: write_list_column(tmp_dir, name, rows) for name, rows in lists.items()}
+        print(f"  ✓ {len(years):,} node(s)")
+
+        # Edges reference nodes by row index; targets that aren't nodes get -1
+        row_of = {arxiv_id: i for i, arxiv_id in enumerate(strings["arxiv_id"])}
+        del strings, lists
+
+        print("→ Streaming edges...")
+        sources, targets, type_codes, target_ids = [], [], [], []
+        types = {}
+        for rows in stream_query(self.conn, """
+            SELECT source_id, target_id, relationship_type
+            FROM edges WHERE NOT archived ORDER BY id;
+        """, name="snapshot_edges"):
+            for source_id, target_id, rel_type in rows:
+                sources.append(row_of.get(source_id, -1))
+                targets.append(row_of.get(target_id, -1))
+                type_codes.append(types.setdefault(rel_type or "RELATED", len(types)))
+                target_ids.append(target_id)
+
+        np.save(os.path.join(tmp_dir, "edge_source.npy"), np.asarray(sources, dtype=np.int32))
+        np.save(os.path.join(tmp_dir, "edge_target.npy"), np.asarray(targets, dtype=np.int32))
+        np.save(os.path.join(tmp_dir, "edge_type.codes.npy"), np.asarray(type_codes, dtype=np.int16))
+        write_strings(tmp_dir, "edge_type.dict", list(types))
+        write_strings(tmp_dir, "edge_target_id", target_ids)
+        print(f"  ✓ {len(sources):,} edge(s)")
+
+        manifest = {
+            "built_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "nodes": len(years),
+            "edges": len(sources),
+            "dictionaries": dict_sizes,
+        }
+        with open(os.path.join(tmp_dir, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+
+        shutil.rmtree(self.snapshot_dir, ignore_errors=True)
+        os.replace(tmp_dir, self.snapshot_dir)
+
+        print(f"\n✓ Snapshot written to {self.snapshot_dir} in {time.time() - start:.1f}s")
+        return manifest
+
+    def close(self):
+        """Close database connection"""
+        self.conn.close()
+
+
+# ---------------------------------------------------------------------------
+# Reader
+# ---------------------------------------------------------------------------
+
+class GraphSnapshot:
+    """Zero-copy, memory-mapped view of a snapshot built by SnapshotBuilder"""
+
+    def __init__(self, snapshot_dir=SNAPSHOT_DIR):
+        self.path = snapshot_dir
+        with open(os.path.join(snapshot_dir, "manifest.json"), encoding="utf-8") as f:
+            self.manifest = json.load(f)
+
+        def load(name):
+            return np.load(os.path.join(snapshot_dir, f"{name}.npy"), mmap_mode="r")
+
+        self.arxiv_id = StringColumn(snapshot_dir, "arxiv_id")
+        self.title = StringColumn(snapshot_dir, "title")
+        self.authors = StringColumn(snapshot_dir, "authors")
+        self.summary = StringColumn(snapshot_dir, "summary")
+        self.year = load("year")
+        self.citation_count = load("citation_count")
+
+        self.edge_source = load("edge_source")
+        self.edge_target = load("edge_target")
+        self.edge_type = load("edge_type.codes")
+        self.edge_types = StringColumn(snapshot_dir, "edge_type.dict").to_list()
+
+        self._lists = {}
+        self._lookup = {}
+
+    def __len__(self):
+        return len(self.year)
+
+    def list_column(self, column):
+        """(dictionary, codes, offsets) for a TEXT[] column"""
+        if column not in self._lists:
+            self._lists[column] = (
+                StringColumn(self.path, f"{column}.dict"),
+                np.load(os.path.join(self.path, f"{column}.codes.npy"), mmap_mode="r"),
+                np.load(os.path.join(self.path, f"{column}.offsets.npy"), mmap_mode="r"),
+            )
+        return self._lists[column]
+
+    def code_of(self, column, value):
+        """Dictionary code for a value, or -1 if it never occurs"""
+        if column not in self._lookup:
+            dictionary = self.list_column(column)[0]
+            self._lookup[column] = {v: i for i, v in enumerate(dictionary.to_list())}
+        return self._lookup[column].get(value, -1)
+
+    def mask(self, column, value):
+        """Boolean row mask of papers whose list column contains value"""
+        _, codes, offsets = self.list_column(column)
+        result = np.zeros(len(self), dtype=bool)
+        code = self.code_of(column, value)
+        if code < 0:
+            return result
+        hits = np.flatnonzero(codes == code)
+        # Map element positions back to rows through the CSR offsets
+        result[np.searchsorted(offsets, hits, side="right") - 1] = True
+        return result
+
+    def value_counts(self, column, top=20, rows=None):
+        """Most frequent values of a list column, optionally within a row mask"""
+        dictionary, codes, offsets = self.list_column(column)
+        if rows is not None:
+            lengths = np.diff(offsets)
+            codes = codes[np.repeat(rows, lengths)]
+        counts = np.bincount(codes, minlength=len(dictionary))
+        order = np.argsort(counts)[::-1][:top]
+        return [(dictionary[i], int(counts[i])) for i in order if counts[i] > 0]
+
+    def year_mask(self, start=None, end=None):
+        mask = np.ones(len(self), dtype=bool)
+        if start is not None:
+            mask &= self.year >= start
+        if end is not None:
+            mask &= self.year <= end
+        return mask
+
+    def rows(self, mask, limit=20):
+        """Materialize a few rows of a mask for display"""
+        return [
+            {
+                "arxiv_id": self.arxiv_id[i],
+                "title": self.title[i],
+                "year": int(self.year[i]),
+                "citation_count": int(self.citation_count[i]),
+            }
+            for i in np.flatnonzero(mask)[:limit]
+        ]
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+
+    if args[:1] == ["query"]:
+        # python analytics_snapshot.py query datasets ImageNet
+        snapshot = GraphSnapshot()
+        column, value = args[1], args[2]
+        mask = snapshot.mask(column, value)
+        print(f"{int(mask.sum()):,} paper(s) with {column} = {value!r}\n")
+        for row in snapshot.rows(mask):
+            print(f"  {row['arxiv_id']} ({row['year']}): {row['title'][:60]}")
+        print("\nTop methods in these papers:")
+        for name, count in snapshot.value_counts("methods", top=10, rows=mask):
+            print(f"  {count:5d}  {name}")
+    else:
+        try:
+            builder = SnapshotBuilder()
+            builder.build()
+            builder.close()
+        except Exception as e:
+            print(f"\n❌ Error: {e}")
+            import traceback
+            traceback.print_exc()
@@ -0,0 +1,152 @@
+import psycopg2
+import os
+import sys
+
+from edge_partitions import is_partitioned
+from export_tables import DB_CONFIG
+
+# Rows flagged per transaction, so locks stay short on a busy table
+ARCHIVE_BATCH = int(os.getenv("ARCHIVE_BATCH", "50000"))
+
+# Live edges each criterion selects. On the partitioned layout, setting
+# archived moves the row into edges_archive; on the single table it is a flag.
+CRITERIA = {
+    # Same (source, target, type) stored more than once: keep the newest row
+    "superseded": """
+        SELECT id FROM (
+            SELECT id, ROW_NUMBER() OVER (
+                PARTITION BY source_id, target_id, relationship_type ORDER BY id DESC
+            ) AS n
+            FROM edges WHERE NOT archived
+        ) d WHERE n > 1
+    """,
+    # Either endpoint no longer a paper (e.g. removed by dedup)
+    "orphaned": """
+        SELECT id FROM edges e
+        WHERE NOT archived AND (
+            NOT EXISTS (SELECT 1 FROM nodes n WHERE n.arxiv_id = e.source_id)
+            OR NOT EXISTS (SELECT 1 FROM nodes n WHERE n.arxiv_id = e.target_id)
+        )
+    """,
+    # Created more than N days ago (rows from before created_at existed count
+    # from when the column was added)
+    "older-than": """
+        SELECT id FROM edges
+        WHERE NOT archived AND created_at < CURRENT_TIMESTAMP - %s * INTERVAL '1 day'
+    """,
+}
+
+
+class EdgeArchiver:
+    """Move edges out of the live set in batches"""
+
+    def __init__(self, conn, batch_size=ARCHIVE_BATCH):
+        self.conn = conn
+        self.batch_size = batch_size
+
+    def count(self, criterion, params=()):
+        cur = self.conn.cursor()
+        cur.execute(f"SELECT COUNT(*) FROM ({CRITERIA[criterion]}) c;", params)
+        count = cur.fetchone()[0]
+        cur.close()
+        return count
+
+    def archive(self, criterion, params=()):
+        """Archive every edge matching a criterion; returns the number moved.
+
+        The matching ids are selected once into a temp table and then
+        flagged batch by batch; evaluating the criterion per batch would
+        redo e.g. the superseded window over every live edge each time.
+        """
+        moved = 0
+        last_id = -1
+        cur = self.conn.cursor()
+        try:
+            cur.execute("DROP TABLE IF EXISTS archive_ids;")
+            cur.execute(f"CREATE TEMP TABLE archive_ids AS {CRITERIA[criterion]};", params)
+            cur.execute("CREATE INDEX ON archive_ids (id);")
+            self.conn.commit()
+            while True:
+                cur.execute("SELECT id FROM archive_ids WHERE id > %s ORDER BY id LIMIT %s;",
+                            (last_id, self.batch_size))
+                ids = [row[0] for row in cur.fetchall()]
+                if ids:
+                    cur.execute("""
+                        UPDATE edges SET archived = TRUE, archived_at = CURRENT_TIMESTAMP
+                        WHERE NOT archived AND id = ANY(%s);
+                    """, (ids,))
+                    moved += cur.rowcount
+                    self.conn.commit()
+                    last_id = ids[-1]
+                if len(ids) < self.batch_size:
+                    break
+                print(f"  … {moved:,} archived so far")
+            cur.execute("DROP TABLE archive_ids;")
+            self.conn.commit()
+            return moved
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            cur.close()
+
+    def restore(self, ids):
+        """Bring specific archived edges back into the live set"""
+        cur = self.conn.cursor()
+        cur.execute("""
+            UPDATE edges SET archived = FALSE, archived_at = NULL
+            WHERE archived AND id = ANY(%s);
+        """, (list(ids),))
+        restored = cur.rowcount
+        self.conn.commit()
+        cur.close()
+        return restored
+
+    def summary(self):
+        cur = self.conn.cursor()
+        cur.execute("""
+            SELECT archived, relationship_type, COUNT(*)
+            FROM edges GROUP BY 1, 2 ORDER BY 1, 3 DESC;
+        """)
+        rows = cur.fetchall()
+        partitioned = is_partitioned(cur)
+        cur.close()
+        return partitioned, rows
+
+
+if __name__ == "__main__":
+    # python archive_edges.py [--superseded] [--orphaned] [--older-than=DAYS] [--dry-run]
+    # python archive_edges.py --restore=ID[,ID...]
+    args = sys.argv[1:]
+    print("=" * 70)
+    print("EDGE ARCHIVAL")
+    print("=" * 70)
+    try:
+        conn = psycopg2.connect(**DB_CONFIG)
+        archiver = EdgeArchiver(conn)
+
+        jobs = [(name, ()) for name in ("superseded", "orphaned") if f"--{name}" in args]
+        jobs += [("older-than", (int(a.split("=", 1)[1]),)) for a in args if a.startswith("--older-than=")]
+        restore = [a.split("=", 1)[1] for a in args if a.startswith("--restore=")]
+
+        if restore:
+            ids = [int(i) for i in ",".join(restore).split(",") if i]
+            print(f"✓ Restored {archiver.restore(ids)} of {len(ids)} edge(s)")
+        for name, params in jobs:
+            label = f"{name} {params[0]} days" if params else name
+            if "--dry-run" in args:
+                print(f"  {label:20} {archiver.count(name, params):10,} edge(s) would be archived")
+            else:
+                print(f"✓ {label:20} {archiver.archive(name, params):10,} edge(s) archived")
+        if not jobs and not restore:
+            print("Nothing selected: pass --superseded, --orphaned or --older-than=DAYS\n")
+
+        partitioned, rows = archiver.summary()
+        print(f"\nLayout: {'partitioned' if partitioned else 'single table'}")
+        for archived, relationship_type, count in rows:
+            print(f"  {'archived' if archived else 'live':9} {relationship_type or 'UNKNOWN':15} {count:10,}")
+        conn.close()
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,63 @@
+import os
+import shutil
+import tarfile
+import tempfile
+import zipfile
+
+# Members up to this size are buffered in memory, larger ones spill to a temp file
+SPOOL_MAX_BYTES = int(os.getenv("ARCHIVE_SPOOL_MAX", str(64 * 1024 * 1024)))
+
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+
+
+def is_archive(path):
+    return path.lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def _spool(fileobj):
+    """Copy a (possibly non-seekable) member stream into a seekable buffer"""
+    spooled = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    shutil.copyfileobj(fileobj, spooled, 1 << 20)
+    spooled.seek(0)
+    return spooled
+
+
+def _zip_name(info):
+    """Member name; tools that don't set the UTF-8 flag still write UTF-8 bytes"""
+    if info.flag_bits & 0x800:
+        return info.filename
+    try:
+        return info.filename.encode("cp437").decode("utf-8")
+    except UnicodeError:
+        return info.filename
+
+
+def iter_archive_pdfs(archive_path):
+    """Yield (member_name, open_member) for every PDF in a zip/tar bundle.
+
+    `open_member()` returns a seekable file object for PdfReader; it is only
+    read if called, so already-ingested papers cost no decompression for
+    zips. Tars are read as a stream ("r|*"), so open_member must be called
+    before advancing to the next member.
+    """
+    if archive_path.lower().endswith(".zip"):
+        with zipfile.ZipFile(archive_path) as bundle:
+            for info in sorted(bundle.infolist(), key=lambda i: i.filename):
+                if info.is_dir() or not info.filename.lower().endswith('.pdf'):
+                    continue
+
+                def open_member(info=info):
+                    with bundle.open(info) as member:
+                        return _spool(member)
+
+                yield _zip_name(info), open_member
+    else:
+        with tarfile.open(archive_path, "r|*") as bundle:
+            for info in bundle:
+                if not info.isfile() or not info.name.lower().endswith('.pdf'):
+                    continue
+
+                def open_member(info=info):
+                    return _spool(bundle.extractfile(info))
+
+                yield info.name, open_member
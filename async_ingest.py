@@ -0,0 +1,340 @@
+from groq import AsyncGroq
+import asyncpg
+import psycopg2
+import asyncio
+import os
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from dedup_papers import DedupIndex, minhash
+from edge_partitions import insert_edges_async
+from edge_resolver import EdgeTargetResolver
+from export_tables import DB_CONFIG
+from extraction import MODEL_NAME, build_prompt, parse_response, versions
+from normalize_entities import ENTITY_COLUMNS, EntityNormalizer
+from pdf_extractors import extract_pdf_text
+from preflight_pdfs import PROCESS, preflight, print_routes
+from process_all_papers import arxiv_id_from_filename
+from records import decode_extraction
+from usage_tracking import USAGE_COLUMNS, UsageTracker
+
+# Per-stage concurrency. Extraction is CPU-bound (process pool), the LLM
+# stage is network-bound and the persist stage is bounded by the pool size.
+EXTRACT_WORKERS = int(os.getenv("ASYNC_EXTRACT_WORKERS", str(os.cpu_count() or 4)))
+LLM_WORKERS = int(os.getenv("ASYNC_LLM_WORKERS", "4"))
+PERSIST_WORKERS = int(os.getenv("ASYNC_PERSIST_WORKERS", "2"))
+
+# Items allowed to wait between stages. A full queue blocks the stage in
+# front of it, so a slow database stops the LLM stage instead of letting
+# results pile up in memory.
+QUEUE_SIZE = int(os.getenv("ASYNC_QUEUE_SIZE", "8"))
+
+MAX_RETRIES = 3
+
+
+def extract_and_sign(path):
+    """Process-pool job: PDF text and its MinHash signature, both CPU-bound"""
+    raw_text, _ = extract_pdf_text(path)
+    return raw_text, minhash(raw_text)
+
+
+class AsyncIngestEngine:
+    """extract -> LLM -> persist pipeline with bounded queues between stages"""
+
+    def __init__(self, extract_workers=EXTRACT_WORKERS, llm_workers=LLM_WORKERS,
+                 persist_workers=PERSIST_WORKERS, queue_size=QUEUE_SIZE):
+        self.extract_workers = extract_workers
+        self.llm_workers = llm_workers
+        self.persist_workers = persist_workers
+        self.queue_size = queue_size
+
+        self.groq_client = AsyncGroq(api_key=os.getenv("GROQ_API_KEY"))
+        # One sync connection warms the in-memory indexes; writes go through asyncpg
+        self.sync_conn = psycopg2.connect(**DB_CONFIG)
+        self.resolver = EdgeTargetResolver(self.sync_conn)
+        self.entities = EntityNormalizer(self.sync_conn)
+        self.usage = UsageTracker(self.sync_conn)
+        self.dedup = DedupIndex()
+
+        self.stopping = False
+        self.stats = {"processed": 0, "skipped": 0, "duplicates": 0, "failed": 0}
+
+    def request_stop(self):
+        """Stop taking new files; work already queued is drained"""
+        if not self.stopping:
+            print("\n⏹ Shutdown requested - draining in-flight papers...")
+        self.stopping = True
+
+    # -- stages ---------------------------------------------------------------
+
+    async def extract_stage(self, inbox, outbox, executor):
+        loop = asyncio.get_running_loop()
+        while True:
+            arxiv_id, path = await inbox.get()
+            try:
+                raw_text, signature = await loop.run_in_executor(executor, extract_and_sign, path)
+                # Only the LSH lookup runs on the event loop; no await between
+                # it and add(), so two copies in flight can't both pass
+                verdict, signature, _ = self.dedup.check_signature(arxiv_id, signature, source=os.path.basename(path))
+                if verdict == "duplicate":
+                    print(f"  ⊘ {arxiv_id}: near-duplicate - skipping")
+                    self.stats["duplicates"] += 1
+                else:
+                    self.dedup.add(arxiv_id, signature)  # reserved; discarded if the paper fails
+                    await outbox.put((arxiv_id, raw_text))
+            except Exception as e:
+                print(f"  ✗ {arxiv_id}: extraction failed: {e}")
+                self.stats["failed"] += 1
+            finally:
+                inbox.task_done()
+
+    async def call_llm(self, prompt):
+        for attempt in range(MAX_RETRIES):
+            start = time.perf_counter()
+            try:
+                response = await self.groq_client.chat.completions.create(
+                    messages=[{"role": "user", "content": prompt}],
+                    model=MODEL_NAME,
+                    temperature=0.1,
+                    max_tokens=2048
+                )
+                return response, {"latency": time.perf_counter() - start, "retries": attempt,
+                                  "model": MODEL_NAME, "status": "ok"}
+            except Exception as api_error:
+                if "rate_limit" in str(api_error).lower() and attempt < MAX_RETRIES - 1:
+                    await asyncio.sleep((attempt + 1) * 10)
+                else:
+                    # Same contract as call_groq_with_stats, for record_failure
+                    api_error.stats = {"latency": time.perf_counter() - start, "retries": attempt,
+                                       "model": MODEL_NAME, "status": "error"}
+                    raise
+
+    async def llm_stage(self, inbox, outbox):
+        while True:
+            arxiv_id, raw_text = await inbox.get()
+            try:
+                try:
+                    response, stats = await self.call_llm(build_prompt(arxiv_id, raw_text))
+                except Exception as e:
+                    self.usage.record_failure(arxiv_id, e, len(raw_text), call_kind="async")
+                    raise
+                try:
+                    record = decode_extraction(parse_response(response.choices[0].message.content), arxiv_id)
+                except Exception:
+                    stats = {**stats, "status": "parse_error"}
+                    raise
+                finally:
+                    self.usage.record(arxiv_id, response, stats, len(raw_text), call_kind="async")
+                # Blocks while the persist stage is behind (backpressure)
+                await outbox.put((arxiv_id, record))
+            except Exception as e:
+                print(f"  ✗ {arxiv_id}: LLM stage failed: {e}")
+                self.dedup.discard(arxiv_id)
+                self.stats["failed"] += 1
+            finally:
+                inbox.task_done()
+
+    async def persist_stage(self, inbox, pool):
+        while True:
+            arxiv_id, record = await inbox.get()
+            try:
+                async with pool.acquire() as conn:
+                    async with conn.transaction():
+                        saved = await self.save(conn, arxiv_id, record)
+                if saved:
+                    paper = record.paper
+                    self.resolver.add_node(arxiv_id, paper.title, paper.pdf_link, paper.project_page)
+                    self.stats["processed"] += 1
+                    print(f"  ✓ {arxiv_id} saved")
+                else:
+                    self.stats["skipped"] += 1
+            except Exception as e:
+                print(f"  ✗ {arxiv_id}: save failed: {e}")
+                self.dedup.discard(arxiv_id)
+                self.stats["failed"] += 1
+            finally:
+                try:
+                    await self.flush_usage(pool)
+                except Exception as e:
+                    print(f"  ⚠ Usage not recorded: {e}")
+                inbox.task_done()
+
+    async def save(self, conn, arxiv_id, record):
+        """asyncpg version of save_to_db; returns False if the paper already exists"""
+        paper = record.paper
+        inserted = await conn.fetchval("""
+            INSERT INTO nodes (
+                arxiv_id, title, authors, year, summary,
+                methods, datasets, metrics, project_page, pdf_link,
+                extractor_version, prompt_version, model_version
+            )
+            VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13)
+            ON CONFLICT (arxiv_id) DO NOTHING
+            RETURNING arxiv_id;
+        """, *paper.row(versions()))
+        if inserted is None:
+            return False
+
+        await conn.execute("""
+            INSERT INTO metadata (arxiv_id, citation_count) VALUES ($1, $2)
+            ON CONFLICT (arxiv_id) DO UPDATE
+            SET citation_count = EXCLUDED.citation_count, last_updated = CURRENT_TIMESTAMP;
+        """, arxiv_id, record.metadata.citation_count)
+
+        for column, kind in ENTITY_COLUMNS.items():
+            names = {}
+            for name in getattr(paper, column):  # already stripped, never empty
+                names.setdefault(self.entities.resolve(kind, name), name)
+            if not names:
+                continue
+            await conn.execute("""
+                INSERT INTO entities (kind, canonical_key, name)
+                SELECT $1, k, n FROM unnest($2::text[], $3::text[]) AS t(k, n)
+                ON CONFLICT (kind, canonical_key) DO NOTHING;
+            """, kind, list(names), list(names.values()))
+            await conn.execute("""
+                INSERT INTO paper_entities (arxiv_id, entity_id)
+                SELECT $1, id FROM entities WHERE kind = $2 AND canonical_key = ANY($3::text[])
+                ON CONFLICT DO NOTHING;
+            """, arxiv_id, kind, list(names))
+
+        resolved = self.resolver.resolve_many(e.target_arxiv_id for e in record.edges)
+        rows, unresolved = [], []
+        for edge in record.edges:
+            target = resolved.get(edge.target_arxiv_id)
+            row = (arxiv_id, target or edge.target_arxiv_id, edge.relationship_type, edge.reasoning)
+            if not target:
+                unresolved.append(row)
+            elif target != arxiv_id:
+                rows.append(row)
+        await insert_edges_async(conn, rows)
+        if unresolved:
+            await conn.executemany("""
+                INSERT INTO unresolved_edges (source_id, target_ref, relationship_type, reasoning)
+                VALUES ($1, $2, $3, $4);
+            """, unresolved)
+        return True
+
+    async def flush_usage(self, pool):
+        """Write queued llm_usage rows, independent of any paper's transaction"""
+        with self.usage.lock:
+            rows, self.usage.pending = self.usage.pending, []
+        if not rows:
+            return
+        placeholders = ", ".join(f"${i}" for i in range(1, len(USAGE_COLUMNS) + 1))
+        try:
+            async with pool.acquire() as conn:
+                await conn.executemany(f"""
+                    INSERT INTO llm_usage ({", ".join(USAGE_COLUMNS)}) VALUES ({placeholders});
+                """, rows)
+        except Exception:
+            with self.usage.lock:
+                self.usage.pending[:0] = rows  # kept for the next flush
+            raise
+
+    # -- driver ---------------------------------------------------------------
+
+    def existing_ids(self):
+        cur = self.sync_conn.cursor()
+        cur.execute("SELECT arxiv_id FROM nodes;")
+        ids = {row[0] for row in cur.fetchall()}
+        cur.close()
+        return ids
+
+    async def run(self, papers_dir):
+        print("=" * 70)
+        print("ASYNC BATCH PROCESSING")
+        print("=" * 70)
+        print(f"Workers: extract={self.extract_workers} llm={self.llm_workers} "
+              f"persist={self.persist_workers}, queue size={self.queue_size}\n")
+
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self.request_stop)
+            except (NotImplementedError, RuntimeError):
+                pass  # Windows: Ctrl+C raises KeyboardInterrupt instead
+
+        # One query instead of a round trip per file
+        existing = self.existing_ids()
+        files = sorted(f for f in os.listdir(papers_dir) if f.endswith('.pdf'))
+        todo = [(arxiv_id_from_filename(f), os.path.join(papers_dir, f)) for f in files]
+        already = [item for item in todo if item[0] in existing]
+        todo = [item for item in todo if item[0] not in existing]
+        self.stats["skipped"] += len(already)
+
+        routes = await loop.run_in_executor(None, preflight, [path for _, path in todo])
+        print_routes(routes)
+        ready = {r["path"] for r in routes[PROCESS]}
+        todo = [item for item in todo if item[1] in ready]
+        print(f"\n→ {len(todo)} paper(s) to process ({len(already)} already in database)\n")
+
+        extract_q = asyncio.Queue(maxsize=self.queue_size)
+        llm_q = asyncio.Queue(maxsize=self.queue_size)
+        persist_q = asyncio.Queue(maxsize=self.queue_size)
+
+        pool = await asyncpg.create_pool(
+            database=DB_CONFIG["dbname"], user=DB_CONFIG["user"], password=DB_CONFIG["password"],
+            host=DB_CONFIG["host"], port=int(DB_CONFIG["port"]),
+            min_size=1, max_size=self.persist_workers,
+        )
+        start = time.time()
+        with ProcessPoolExecutor(max_workers=self.extract_workers) as executor:
+            workers = (
+                [asyncio.create_task(self.extract_stage(extract_q, llm_q, executor)) for _ in range(self.extract_workers)]
+                + [asyncio.create_task(self.llm_stage(llm_q, persist_q)) for _ in range(self.llm_workers)]
+                + [asyncio.create_task(self.persist_stage(persist_q, pool)) for _ in range(self.persist_workers)]
+            )
+            try:
+                for item in todo:
+                    if self.stopping:
+                        break
+                    await extract_q.put(item)
+
+                # Drain stage by stage so nothing in flight is lost
+                await extract_q.join()
+                await llm_q.join()
+                await persist_q.join()
+            finally:
+                for worker in workers:
+                    worker.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+                await pool.close()
+
+        self.dedup.save()
+        self.usage.flush()
+        self.resolver.reresolve()
+
+        print("\n" + "=" * 70)
+        print("PROCESSING COMPLETE")
+        print("=" * 70)
+        print(f"✓ Successfully processed: {self.stats['processed']}")
+        print(f"⊘ Already in database:    {self.stats['skipped']}")
+        print(f"⊘ Near-duplicates:        {self.stats['duplicates']}")
+        print(f"✗ Failed:                 {self.stats['failed']}")
+        print(f"⏱ Elapsed:                {time.time() - start:.1f}s")
+        self.usage.print_run_summary()
+
+    def close(self):
+        self.sync_conn.close()
+
+
+if __name__ == "__main__":
+    # python async_ingest.py [papers_dir] [--llm-workers=8] [--persist-workers=2] [--queue-size=16]
+    args = sys.argv[1:]
+    papers_directory = next((a for a in args if not a.startswith("--")), r"Alaris/papers")
+    options = {a[2:].split("=", 1)[0].replace("-", "_"): int(a.split("=", 1)[1]) for a in args if a.startswith("--") and "=" in a}
+
+    engine = AsyncIngestEngine(**options)
+    try:
+        asyncio.run(engine.run(papers_directory))
+    except KeyboardInterrupt:
+        print("\n⏹ Interrupted")
+    except Exception as e:
+        print(f"\n❌ Fatal Error: {e}")
+        import traceback
+        traceback.print_exc()
+    finally:
+        engine.close()
@@ -0,0 +1,253 @@
+from psycopg2 import extras
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
+
+from chunked_extraction import extract_chunked
+from edge_partitions import insert_edges
+from extraction import (
+    EXTRACTOR_VERSION, PROMPT_VERSION, MODEL_NAME, TEXT_LIMIT,
+    build_prompt, call_groq_with_stats, parse_response, versions,
+)
+from process_all_papers import BatchPaperProcessor, arxiv_id_from_filename
+from records import decode_extraction
+from similarity_edges import REASONING_PREFIX
+
+# Field groups that can be refreshed independently
+FIELD_GROUPS = ("node", "edges", "metadata")
+
+# Concurrent extraction + LLM calls
+MAX_WORKERS = int(os.getenv("BACKFILL_WORKERS", "4"))
+
+# Papers written per transaction
+COMMIT_EVERY = 20
+
+
+class VersionBackfill:
+    """Re-extract only the nodes produced by an older extractor/prompt/model"""
+
+    def __init__(self, papers_dir, fields=FIELD_GROUPS, max_workers=MAX_WORKERS):
+        self.processor = BatchPaperProcessor()
+        self.conn = self.processor.conn
+        self.papers_dir = papers_dir
+        self.fields = fields
+        self.max_workers = max_workers
+
+    def stale_ids(self):
+        cur = self.conn.cursor()
+        cur.execute("""
+            SELECT arxiv_id FROM nodes
+            WHERE extractor_version IS DISTINCT FROM %s
+               OR prompt_version IS DISTINCT FROM %s
+               OR model_version IS DISTINCT FROM %s
+            ORDER BY arxiv_id;
+        """, (EXTRACTOR_VERSION, PROMPT_VERSION, MODEL_NAME))
+        ids = [row[0] for row in cur.fetchall()]
+        cur.close()
+        return ids
+
+    def pdf_paths(self):
+        """arxiv_id -> PDF path for every file in the papers directory"""
+        return {
+            arxiv_id_from_filename(filename): os.path.join(self.papers_dir, filename)
+            for filename in os.listdir(self.papers_dir)
+            if filename.endswith('.pdf')
+        }
+
+    def extract(self, arxiv_id, pdf_path):
+        """Worker: PDF -> validated ExtractionRecord (no database access)"""
+        raw_text = self.processor.extract_text(pdf_path)
+        usage = self.processor.usage
+        if len(raw_text) > TEXT_LIMIT:
+            data = extract_chunked(self.processor.groq_client, arxiv_id, raw_text,
+                                   record=partial(usage.record, arxiv_id, call_kind="backfill"))
+        else:
+            try:
+                response, stats = call_groq_with_stats(self.processor.groq_client, build_prompt(arxiv_id, raw_text))
+            except Exception as e:
+                usage.record_failure(arxiv_id, e, len(raw_text), call_kind="backfill")
+                raise
+            try:
+                data = parse_response(response.choices[0].message.content)
+            except Exception:
+                stats = {**stats, "status": "parse_error"}
+                raise
+            finally:
+                usage.record(arxiv_id, response, stats, len(raw_text), call_kind="backfill")
+        return decode_extraction(data, arxiv_id)
+
+    def upsert(self, results):
+        """Write one batch of (arxiv_id, ExtractionRecord) in a single transaction"""
+        cur = self.conn.cursor()
+        ids = [arxiv_id for arxiv_id, _ in results]
+        try:
+            # Versions describe the node columns, so only a node rewrite
+            # stamps them; an edges/metadata-only refresh leaves the row
+            # stale until the node group itself is re-extracted
+            if "node" in self.fields:
+                extras.execute_values(cur, """
+                    INSERT INTO nodes (
+                        arxiv_id, title, authors, year, summary,
+                        methods, datasets, metrics, project_page, pdf_link,
+                        extractor_version, prompt_version, model_version
+                    ) VALUES %s
+                    ON CONFLICT (arxiv_id) DO UPDATE SET
+                        title = EXCLUDED.title,
+                        authors = EXCLUDED.authors,
+                        year = EXCLUDED.year,
+                        summary = EXCLUDED.summary,
+                        methods = EXCLUDED.methods,
+                        datasets = EXCLUDED.datasets,
+                        metrics = EXCLUDED.metrics,
+                        project_page = EXCLUDED.project_page,
+                        pdf_link = EXCLUDED.pdf_link,
+                        extractor_version = EXCLUDED.extractor_version,
+                        prompt_version = EXCLUDED.prompt_version,
+                        model_version = EXCLUDED.model_version,
+                        updated_at = CURRENT_TIMESTAMP;
+                """, [record.paper.row(versions()) for _, record in results])
+                for arxiv_id, record in results:
+                    self.processor.entities.unlink_paper(cur, arxiv_id)
+                    self.processor.entities.link_paper(cur, arxiv_id, record.paper.entity_lists())
+
+            if "metadata" in self.fields:
+                extras.execute_values(cur, """
+                    INSERT INTO metadata (arxiv_id, citation_count) VALUES %s
+                    ON CONFLICT (arxiv_id) DO UPDATE
+                    SET citation_count = EXCLUDED.citation_count,
+                        last_updated = CURRENT_TIMESTAMP;
+                """, [(arxiv_id, record.metadata.citation_count) for arxiv_id, record in results])
+
+            if "edges" in self.fields:
+                # Replace live LLM edges only; local similarity edges are kept
+                # and the old extraction's edges are archived, not deleted
+                cur.execute("""
+                    UPDATE edges SET archived = TRUE, archived_at = CURRENT_TIMESTAMP
+                    WHERE source_id = ANY(%s) AND NOT archived
+                      AND COALESCE(reasoning, '') NOT LIKE %s;
+                """, (ids, REASONING_PREFIX + "%"))
+                cur.execute("DELETE FROM unresolved_edges WHERE source_id = ANY(%s);", (ids,))
+
+                resolver = self.processor.resolver
+                rows = []
+                for arxiv_id, record in results:
+                    resolved = resolver.resolve_many(e.target_arxiv_id for e in record.edges)
+                    unresolved = []
+                    for edge in record.edges:
+                        target = resolved.get(edge.target_arxiv_id)
+                        if not target:
+                            unresolved.append(edge)
+                        elif target != arxiv_id:
+                            rows.append((arxiv_id, target, edge.relationship_type, edge.reasoning))
+                    resolver.record_unresolved(cur, arxiv_id, unresolved)
+                insert_edges(cur, rows)
+
+            self.conn.commit()
+            self.processor.entities.committed()
+        except Exception as e:
+            self.conn.rollback()
+            self.processor.entities.rolled_back()
+            raise e
+        finally:
+            cur.close()
+
+    def write(self, batch):
+        """upsert() a batch, retrying its papers one at a time if it fails.
+
+        Returns the ids that still could not be written, so one bad row
+        does not throw away the rest of the batch's LLM calls.
+        """
+        # Usage goes first, in its own transaction: the calls were paid for
+        # whether or not the upsert below commits
+        self.processor.usage.flush()
+        try:
+            self.upsert(batch)
+            return []
+        except Exception as e:
+            print(f"  ⚠ Batch of {len(batch)} failed ({e}) - retrying one by one")
+        lost = []
+        for item in batch:
+            try:
+                self.upsert([item])
+            except Exception as e:
+                print(f"  ✗ {item[0]}: {e}")
+                lost.append(item[0])
+        return lost
+
+    def run(self):
+        print("=" * 70)
+        print("VERSIONED BACKFILL")
+        print("=" * 70)
+        print(f"Target versions: extractor={EXTRACTOR_VERSION} prompt={PROMPT_VERSION} model={MODEL_NAME}")
+        print(f"Field groups:    {', '.join(self.fields)}")
+        print(f"Workers:         {self.max_workers}\n")
+        if "node" not in self.fields:
+            print("⚠ Without the node group, refreshed rows keep their old versions and stay stale\n")
+
+        stale = self.stale_ids()
+        paths = self.pdf_paths()
+        missing = [arxiv_id for arxiv_id in stale if arxiv_id not in paths]
+        todo = [arxiv_id for arxiv_id in stale if arxiv_id in paths]
+        print(f"✓ Stale rows: {len(stale)} ({len(missing)} without a PDF in {self.papers_dir})")
+
+        done = 0
+        failed = 0
+        batch = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {pool.submit(self.extract, arxiv_id, paths[arxiv_id]): arxiv_id for arxiv_id in todo}
+            for future in as_completed(futures):
+                arxiv_id = futures[future]
+                try:
+                    batch.append((arxiv_id, future.result()))
+                    print(f"  ✓ {arxiv_id} re-extracted")
+                except Exception as e:
+                    print(f"  ✗ {arxiv_id}: {e}")
+                    failed += 1
+                if len(batch) >= COMMIT_EVERY:
+                    lost = self.write(batch)
+                    done += len(batch) - len(lost)
+                    failed += len(lost)
+                    batch = []
+        if batch:
+            lost = self.write(batch)
+            done += len(batch) - len(lost)
+            failed += len(lost)
+        self.processor.usage.flush()
+
+        print("\n" + "=" * 70)
+        print(f"✓ Updated: {done}")
+        print(f"✗ Failed:  {failed}")
+        print(f"⊘ No PDF:  {len(missing)}")
+        self.processor.usage.print_run_summary()
+        print("=" * 70)
+
+    def close(self):
+        self.processor.close()
+
+
+if __name__ == "__main__":
+    # python backfill_versions.py [papers_dir] [--fields=edges,metadata] [--workers=8]
+    args = sys.argv[1:]
+    papers_directory = next((a for a in args if not a.startswith("--")), r"Alaris/papers")
+    fields = FIELD_GROUPS
+    workers = MAX_WORKERS
+    for arg in args:
+        if arg.startswith("--fields="):
+            fields = tuple(f for f in arg.split("=", 1)[1].split(",") if f)
+        elif arg.startswith("--workers="):
+            workers = int(arg.split("=", 1)[1])
+    unknown = [f for f in fields if f not in FIELD_GROUPS]
+    if unknown or not fields:
+        print(f"❌ Unknown field group(s): {', '.join(unknown) or '(none given)'}")
+        print(f"Usage: python backfill_versions.py [papers_dir] [--fields={','.join(FIELD_GROUPS)}] [--workers=N]")
+        sys.exit(2)
+
+    try:
+        backfill = VersionBackfill(papers_directory, fields=fields, max_workers=workers)
+        backfill.run()
+        backfill.close()
+    except Exception as e:
+        print(f"\n❌ Fatal Error: {e}")
+        import traceback
+        traceback.print_exc()
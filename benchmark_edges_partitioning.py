@@ -0,0 +1,155 @@
+import psycopg2
+import os
+import sys
+import time
+
+from edge_partitions import create_partitioned, insert_edges
+
+# Results: not yet recorded. The 1M / 10M comparison has not been run - no
+# Postgres server was available where the partitioned layout was written -
+# so EDGES_PARTITIONED stays off by default until numbers from this script
+# are added here.
+#
+# Run against a local, disposable Postgres, never the Supabase database:
+#   BENCH_DSN="dbname=postgres user=postgres host=localhost" \
+#   python benchmark_edges_partitioning.py [ROWS ...] [--keep]
+BENCH_DSN = os.getenv("BENCH_DSN", "dbname=postgres user=postgres host=localhost")
+
+DEFAULT_SIZES = (1_000_000, 10_000_000)
+
+# Share of each relationship type in the generated rows; roughly what the
+# extraction produces, plus a few types that fall into edges_live_other
+TYPE_MIX = (("CITES", 60), ("RELATED", 25), ("BUILDS_ON", 10), ("EXTENDS", 4), ("COMPARES_TO", 1))
+
+EDGES_PER_PAPER = 20
+CLIENT_ROWS = 20_000  # rows sent through insert_edges, as save_to_db would
+REPEATS = 3
+
+QUERIES = {
+    "viewer page (ORDER BY id DESC LIMIT 1000)":
+        "SELECT * FROM edges WHERE NOT archived ORDER BY id DESC LIMIT 1000;",
+    "one type count (EXTENDS)":
+        "SELECT COUNT(*) FROM edges WHERE NOT archived AND relationship_type = 'EXTENDS';",
+    "one paper's edges (source_id)":
+        "SELECT * FROM edges WHERE NOT archived AND source_id = 'p123';",
+    "live histogram (full scan)":
+        "SELECT relationship_type, COUNT(*) FROM edges WHERE NOT archived GROUP BY 1;",
+}
+
+
+def create_single(cur):
+    """The unpartitioned table as setup_supabase.py creates it"""
+    cur.execute("""
+        CREATE TABLE edges (
+            id SERIAL PRIMARY KEY,
+            source_id TEXT,
+            target_id TEXT,
+            relationship_type TEXT,
+            reasoning TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            archived BOOLEAN NOT NULL DEFAULT FALSE,
+            archived_at TIMESTAMP
+        );
+    """)
+    cur.execute("CREATE INDEX edges_source_idx ON edges (source_id);")
+    cur.execute("CREATE INDEX edges_target_idx ON edges (target_id);")
+
+
+def type_expression(column="g"):
+    """SQL CASE mapping a series value onto TYPE_MIX"""
+    cases, upper = [], 0
+    for kind, share in TYPE_MIX:
+        upper += share
+        cases.append(f"WHEN {column} %% 100 < {upper} THEN '{kind}'")  # %% - used with params
+    return "CASE " + " ".join(cases) + " END"
+
+
+def timed(conn, sql, params=None, repeats=1):
+    """Best wall time of `repeats` runs, in seconds"""
+    best = None
+    cur = conn.cursor()
+    for _ in range(repeats):
+        start = time.perf_counter()
+        cur.execute(sql, params)
+        if cur.description:
+            cur.fetchall()
+        conn.commit()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    cur.close()
+    return best
+
+
+def run_layout(conn, layout, rows):
+    schema = f"bench_{layout}"
+    cur = conn.cursor()
+    cur.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE;")
+    cur.execute(f"CREATE SCHEMA {schema};")
+    cur.execute(f"SET search_path TO {schema};")
+    (create_partitioned if layout == "partitioned" else create_single)(cur)
+    conn.commit()
+    cur.close()
+
+    results = {}
+    results["bulk insert (server-side)"] = timed(conn, f"""
+        INSERT INTO edges (source_id, target_id, relationship_type, reasoning)
+        SELECT 'p' || (g / {EDGES_PER_PAPER}), 'p' || ((g * 7919) %% %s), {type_expression()},
+               'generated edge ' || g
+        FROM generate_series(1, %s) g;
+    """, (max(rows // EDGES_PER_PAPER, 1), rows))
+
+    batch = [(f"c{i // EDGES_PER_PAPER}", f"p{i}", TYPE_MIX[i % len(TYPE_MIX)][0].lower(), "client edge")
+             for i in range(CLIENT_ROWS)]
+    cur = conn.cursor()
+    start = time.perf_counter()
+    insert_edges(cur, batch)
+    conn.commit()
+    results[f"client insert_edges ({CLIENT_ROWS:,} rows)"] = time.perf_counter() - start
+    cur.execute("ANALYZE edges;")
+    conn.commit()
+    cur.close()
+
+    for label, sql in QUERIES.items():
+        results[label] = timed(conn, sql, repeats=REPEATS)
+    results["archive 10% (UPDATE archived)"] = timed(conn, """
+        UPDATE edges SET archived = TRUE, archived_at = CURRENT_TIMESTAMP
+        WHERE NOT archived AND id % 10 = 0;
+    """)
+    results["live histogram after archive"] = timed(conn, QUERIES["live histogram (full scan)"], repeats=REPEATS)
+    return results
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    sizes = [int(a.replace("_", "")) for a in args if not a.startswith("--")] or list(DEFAULT_SIZES)
+    print("=" * 70)
+    print("EDGES PARTITIONING BENCHMARK")
+    print("=" * 70)
+    try:
+        conn = psycopg2.connect(BENCH_DSN)
+        cur = conn.cursor()
+        cur.execute("SHOW server_version;")
+        print(f"Postgres {cur.fetchone()[0]} ({BENCH_DSN})")
+        cur.close()
+        conn.commit()
+
+        for rows in sizes:
+            print(f"\n{rows:,} rows (best of {REPEATS} for queries, seconds)")
+            single = run_layout(conn, "single", rows)
+            partitioned = run_layout(conn, "partitioned", rows)
+            print(f"  {'':45} {'single':>9} {'partitioned':>12} {'ratio':>7}")
+            for label in single:
+                a, b = single[label], partitioned[label]
+                print(f"  {label:45} {a:9.3f} {b:12.3f} {a / b if b else 0:6.2f}x")
+
+        if "--keep" not in args:
+            cur = conn.cursor()
+            cur.execute("DROP SCHEMA IF EXISTS bench_single CASCADE;")
+            cur.execute("DROP SCHEMA IF EXISTS bench_partitioned CASCADE;")
+            conn.commit()
+            cur.close()
+        conn.close()
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,259 @@
+import psycopg2
+import gzip
+import hashlib
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime
+
+from export_tables import DB_CONFIG, EXPORT_OVERLAP_SECONDS, stream_query
+
+# Static files the viewer loads instead of the /api routes. The directory is
+# tracked in git, because the Vercel deploy builds from the repository: run
+# `python build_viewer_snapshot.py --stage`, then commit and push.
+VIEWER_DATA_DIR = os.path.join("web-viewer", "data")
+
+# Previous rows and watermarks, so a rebuild only fetches what changed
+CACHE_FILE = os.path.join("snapshots", "viewer_cache.json")
+
+# Snapshot files kept besides the current one, for clients holding an older manifest
+KEEP_PREVIOUS = 2
+
+# Only what index.html renders: the papers table shows three badges and the
+# edges table the first 100 characters of the reasoning
+PAPER_COLUMNS = ("arxiv_id", "title", "authors", "year", "methods", "datasets",
+                 "citation_count", "last_updated")
+MAX_BADGES = 3
+MAX_REASONING = 100
+
+FORMAT_VERSION = 1
+
+# Cache layout; caches from an older layout are rebuilt from scratch
+CACHE_VERSION = 2
+
+
+def _timestamp(value):
+    return value.isoformat() if value else None
+
+
+class ViewerSnapshotBuilder:
+    """Writes web-viewer/data/graph.<hash>.json.gz (+ .br) and manifest.json"""
+
+    def __init__(self, conn, data_dir=VIEWER_DATA_DIR, cache_file=CACHE_FILE):
+        self.conn = conn
+        self.data_dir = data_dir
+        self.manifest_path = os.path.join(data_dir, "manifest.json")
+        self.cache_file = cache_file
+
+    def counts(self):
+        cur = self.conn.cursor()
+        cur.execute("""
+            SELECT (SELECT COUNT(*) FROM nodes), (SELECT COUNT(*) FROM edges WHERE NOT archived),
+                   (SELECT COUNT(*) FROM metadata);
+        """)
+        nodes, edges, metadata = cur.fetchone()
+        cur.close()
+        return {"nodes": nodes, "edges": edges, "metadata": metadata}
+
+    def load_cache(self):
+        if not os.path.exists(self.cache_file):
+            return None
+        with open(self.cache_file, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+        return cache if cache.get("version") == CACHE_VERSION else None
+
+    def fetch(self, cache):
+        """Pull rows changed since the cached watermarks (all rows without a cache).
+
+        Watermarks are timestamps, re-read with EXPORT_OVERLAP_SECONDS of
+        overlap so rows from transactions that committed late are not
+        missed; re-fetched rows just overwrite their cache entry.
+        """
+        if cache is None:
+            cache = {"version": CACHE_VERSION,
+                     "watermarks": {"nodes": None, "edges": None, "metadata": None},
+                     "papers": {}, "citations": {}, "edges": {}}
+        marks = cache["watermarks"]
+        since = "%s IS NULL OR {} >= %s::TIMESTAMP - %s * INTERVAL '1 second'"
+
+        for rows in stream_query(self.conn, f"""
+            SELECT arxiv_id, title, authors, year, methods, datasets, updated_at
+            FROM nodes WHERE {since.format("updated_at")};
+        """, (marks["nodes"], marks["nodes"], EXPORT_OVERLAP_SECONDS), name="viewer_nodes"):
+            for arxiv_id, title, authors, year, methods, datasets, updated_at in rows:
+                cache["papers"][arxiv_id] = [
+                    title or "", authors or "", year or 0,
+                    list(methods or [])[:MAX_BADGES], list(datasets or [])[:MAX_BADGES],
+                ]
+                marks["nodes"] = max(marks["nodes"] or "", _timestamp(updated_at) or "") or None
+
+        for rows in stream_query(self.conn, f"""
+            SELECT arxiv_id, citation_count, last_updated
+            FROM metadata WHERE {since.format("last_updated")};
+        """, (marks["metadata"], marks["metadata"], EXPORT_OVERLAP_SECONDS), name="viewer_metadata"):
+            for arxiv_id, citation_count, last_updated in rows:
+                cache["citations"][arxiv_id] = [citation_count or 0, _timestamp(last_updated)]
+                marks["metadata"] = max(marks["metadata"] or "", _timestamp(last_updated) or "") or None
+
+        # updated_at (kept by the export_tables triggers) rather than the id,
+        # so edits and archiving reach the snapshot, not just new rows
+        for rows in stream_query(self.conn, f"""
+            SELECT id, source_id, target_id, relationship_type, reasoning, archived, updated_at
+            FROM edges WHERE {since.format("updated_at")};
+        """, (marks["edges"], marks["edges"], EXPORT_OVERLAP_SECONDS), name="viewer_edges"):
+            for edge_id, source_id, target_id, relationship_type, reasoning, archived, updated_at in rows:
+                if archived:
+                    cache["edges"].pop(str(edge_id), None)
+                else:
+                    cache["edges"][str(edge_id)] = [source_id, target_id, relationship_type or "",
+                                                    (reasoning or "")[:MAX_REASONING]]
+                marks["edges"] = max(marks["edges"] or "", _timestamp(updated_at) or "") or None
+        return cache
+
+    def assemble(self, cache):
+        """Pre-joined, integer-indexed graph document.
+
+        ids lists every paper first (same order as papers.rows), then edge
+        endpoints that aren't papers; edges reference positions in ids.
+        Metadata rows without a paper are left out.
+        """
+        paper_ids = sorted(cache["papers"], reverse=True)
+        ids = list(paper_ids)
+        index = {arxiv_id: i for i, arxiv_id in enumerate(ids)}
+        rows = []
+        for arxiv_id in paper_ids:
+            title, authors, year, methods, datasets = cache["papers"][arxiv_id]
+            citation_count, last_updated = cache["citations"].get(arxiv_id, (None, None))
+            rows.append([arxiv_id, title, authors, year, methods, datasets, citation_count, last_updated])
+
+        types, type_index = [], {}
+        source, target, kind, reasoning = [], [], [], []
+        for edge_id in sorted(cache["edges"], key=int, reverse=True):
+            source_id, target_id, relationship_type, text = cache["edges"][edge_id]
+            for endpoint in (source_id, target_id):
+                if endpoint not in index:
+                    index[endpoint] = len(ids)
+                    ids.append(endpoint)
+            if relationship_type not in type_index:
+                type_index[relationship_type] = len(types)
+                types.append(relationship_type)
+            source.append(index[source_id])
+            target.append(index[target_id])
+            kind.append(type_index[relationship_type])
+            reasoning.append(text)
+
+        return {
+            "version": FORMAT_VERSION,
+            "ids": ids,
+            "papers": {"columns": list(PAPER_COLUMNS), "rows": rows},
+            "relationship_types": types,
+            "edges": {"source": source, "target": target, "type": kind, "reasoning": reasoning},
+        }
+
+    def write(self, graph, fingerprint):
+        """Compress, content-hash and publish; returns the manifest"""
+        payload = json.dumps(graph, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        digest = hashlib.sha256(payload).hexdigest()[:16]
+        base = f"graph.{digest}.json"
+        os.makedirs(self.data_dir, exist_ok=True)
+
+        files = {"gzip": base + ".gz"}
+        # mtime=0 keeps the .gz bytes identical for identical content
+        with open(os.path.join(self.data_dir, files["gzip"]), "wb") as f:
+            f.write(gzip.compress(payload, compresslevel=9, mtime=0))
+        try:
+            import brotli
+        except ImportError:
+            brotli = None
+        if brotli:
+            files["br"] = base + ".br"
+            with open(os.path.join(self.data_dir, files["br"]), "wb") as f:
+                f.write(brotli.compress(payload, quality=11))
+
+        manifest = {
+            "version": FORMAT_VERSION,
+            "hash": digest,
+            "fingerprint": fingerprint,
+            "files": files,
+            "bytes": len(payload),
+            "papers": len(graph["papers"]["rows"]),
+            "edges": len(graph["edges"]["source"]),
+            "generated_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp, self.manifest_path)
+        self.prune(digest)
+        return manifest
+
+    def prune(self, current):
+        """Delete all but the newest few snapshot files"""
+        snapshots = {}
+        for name in os.listdir(self.data_dir):
+            if name.startswith("graph.") and name.split(".")[1] != current:
+                path = os.path.join(self.data_dir, name)
+                snapshots.setdefault(name.split(".")[1], []).append(path)
+        stale = sorted(snapshots.values(), key=lambda paths: os.path.getmtime(paths[0]), reverse=True)
+        for paths in stale[KEEP_PREVIOUS:]:
+            for path in paths:
+                os.remove(path)
+
+    def build(self, full=False):
+        """Rebuild if the database changed; returns (manifest, rebuilt)"""
+        cache = None if full else self.load_cache()
+        counts = self.counts()
+        cache = self.fetch(cache)
+
+        # Deleted (or archived) rows don't show up past a watermark; counts reveal them
+        if (len(cache["papers"]), len(cache["edges"]), len(cache["citations"])) != \
+                (counts["nodes"], counts["edges"], counts["metadata"]) and not full:
+            print("  ↻ Rows were deleted since the last build - refetching everything")
+            cache = self.fetch(None)
+
+        fingerprint = hashlib.sha256(
+            json.dumps([cache["watermarks"], counts], sort_keys=True).encode("utf-8")
+        ).hexdigest()[:16]
+        if os.path.exists(self.manifest_path) and not full:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest.get("fingerprint") == fingerprint and \
+                    os.path.exists(os.path.join(self.data_dir, manifest["files"]["gzip"])):
+                return manifest, False
+
+        manifest = self.write(self.assemble(cache), fingerprint)
+
+        os.makedirs(os.path.dirname(self.cache_file) or ".", exist_ok=True)
+        with open(self.cache_file, "w", encoding="utf-8") as f:
+            json.dump(cache, f, ensure_ascii=False, separators=(",", ":"))
+        return manifest, True
+
+    def stage(self):
+        """git add the data directory (new snapshot, manifest and pruned files)"""
+        subprocess.run(["git", "add", "-A", "--", self.data_dir], check=True)
+
+
+if __name__ == "__main__":
+    # python build_viewer_snapshot.py [--full] [--stage]
+    #   --stage  git add web-viewer/data afterwards; commit and push to deploy
+    print("=" * 70)
+    print("VIEWER SNAPSHOT")
+    print("=" * 70)
+    try:
+        conn = psycopg2.connect(**DB_CONFIG)
+        builder = ViewerSnapshotBuilder(conn)
+        manifest, rebuilt = builder.build(full="--full" in sys.argv[1:])
+        conn.close()
+        if rebuilt:
+            print(f"✓ Wrote {', '.join(manifest['files'].values())} "
+                  f"({manifest['papers']} papers, {manifest['edges']} edges, {manifest['bytes']:,} bytes raw)")
+        else:
+            print(f"✓ Unchanged since {manifest['generated_at']} ({manifest['files']['gzip']})")
+        if "--stage" in sys.argv[1:]:
+            builder.stage()
+            print(f"✓ Staged {builder.data_dir} - commit and push to deploy")
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+        import traceback
+        traceback.print_exc()
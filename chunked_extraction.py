@@ -0,0 +1,204 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from edge_resolver import normalize_title
+from extraction import TEXT_LIMIT, build_prompt, call_groq_with_stats, failure_stats, parse_response
+from normalize_entities import ENTITY_COLUMNS, canonical_key
+from profiling import carry_stage
+
+# Text after the first TEXT_LIMIT characters is split into chunks of this
+# size; consecutive chunks overlap so an edge cut at a boundary is seen whole
+CHUNK_CHARS = int(os.getenv("CHUNK_CHARS", str(TEXT_LIMIT)))
+CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "1000"))
+
+# Upper bound on requests per paper; very long papers get larger chunks instead
+MAX_CHUNKS = int(os.getenv("MAX_CHUNKS", "8"))
+
+# Chunk requests in flight at once for one paper; all of them by default,
+# so a long paper takes about as long as a single call
+CHUNK_WORKERS = int(os.getenv("CHUNK_WORKERS", str(MAX_CHUNKS)))
+
+# Output budget of a later chunk, sized from its text: a references section
+# yields an edge every line or two, so a fixed 1024 tokens cut those off
+CHUNK_MIN_TOKENS = 2048
+CHUNK_MAX_TOKENS = 8192
+CHARS_PER_TOKEN = 4
+
+# A later chunk whose response is truncated or unparseable is retried as two
+# halves, at most this many times over, down to MIN_SPLIT_CHARS
+MAX_SPLITS = 2
+MIN_SPLIT_CHARS = 2000
+
+
+def split_chunks(raw_text, head=TEXT_LIMIT, size=CHUNK_CHARS, overlap=CHUNK_OVERLAP, max_chunks=MAX_CHUNKS):
+    """First TEXT_LIMIT chars (what a single call sees), then overlapping chunks.
+
+    Chunk ends are moved back to the nearest line break in the last tenth of
+    the chunk, so references are not cut mid-entry where possible.
+    """
+    chunks = [raw_text[:head]]
+    if len(raw_text) <= head or max_chunks <= 1:
+        return chunks
+    start = max(head - overlap, 0)
+    # Grow the chunks rather than exceed max_chunks requests
+    size = max(size, -(-(len(raw_text) - start - overlap) // (max_chunks - 1)) + overlap)
+    while True:
+        end = min(start + size, len(raw_text))
+        if len(chunks) == max_chunks - 1:
+            end = len(raw_text)
+        elif end < len(raw_text):
+            cut = raw_text.rfind("\n", start + size * 9 // 10, end)
+            if cut > start:
+                end = cut
+        chunks.append(raw_text[start:end])
+        if end >= len(raw_text):
+            return chunks
+        start = end - overlap
+
+
+def chunk_max_tokens(chunk):
+    return max(CHUNK_MIN_TOKENS, min(CHUNK_MAX_TOKENS, len(chunk) // CHARS_PER_TOKEN))
+
+
+def split_in_two(chunk):
+    """Halves of a chunk, cut at the line break closest before the middle"""
+    middle = len(chunk) // 2
+    cut = chunk.rfind("\n", len(chunk) // 4, middle)
+    cut = cut if cut > 0 else middle
+    return chunk[:cut], chunk[cut:]
+
+
+def build_chunk_prompt(arxiv_id, chunk, part, parts):
+    """Prompt for a later part of a paper: entity lists and edges only"""
+    return f"""
+This is part {part} of {parts} of the research paper "{arxiv_id}" (the title page was sent separately).
+Extract only what appears in THIS part and return ONLY valid JSON (no markdown):
+
+{{
+  "methods": ["method1"],
+  "datasets": ["dataset1"],
+  "metrics": ["metric1"],
+  "edges": [
+    {{"target_arxiv_id": "related_paper_id", "relationship_type": "CITES", "reasoning": "why"}}
+  ]
+}}
+
+Use empty lists when nothing is found. References sections count: every cited
+paper is a CITES edge with its arXiv id or title as target_arxiv_id. Leave
+"reasoning" empty ("") for CITES edges; give it only for other types.
+
+Paper text (part {part} of {parts}):
+{chunk}
+"""
+
+
+def merge_extractions(first, parts):
+    """Reduce step: node and metadata from the first chunk, lists and edges unioned.
+
+    Entity names are deduplicated by canonical key and edges by
+    (normalized target, relationship type); the first occurrence wins.
+    """
+    node = dict(first.get("node") or {})
+    for column, kind in ENTITY_COLUMNS.items():
+        merged, seen = [], set()
+        for values in [node.get(column)] + [p.get(column) for p in parts]:
+            for value in values or []:
+                if not isinstance(value, str) or not value.strip():
+                    continue
+                key = canonical_key(value)
+                if key not in seen:
+                    seen.add(key)
+                    merged.append(value.strip())
+        node[column] = merged
+
+    edges, seen = [], set()
+    for part_edges in [first.get("edges")] + [p.get("edges") for p in parts]:
+        for edge in part_edges or []:
+            if not isinstance(edge, dict):
+                continue
+            target = normalize_title(str(edge.get("target_arxiv_id") or ""))
+            if not target:
+                continue
+            key = (target, str(edge.get("relationship_type") or "").upper())
+            if key not in seen:
+                seen.add(key)
+                edges.append(edge)
+
+    return {"node": node, "edges": edges, "metadata": first.get("metadata") or {}}
+
+
+def extract_part(client, arxiv_id, chunk, part, parts, record, splits=MAX_SPLITS):
+    """One later chunk -> list of parsed parts.
+
+    A response cut off at max_tokens (or otherwise unparseable) is retried
+    as two halves instead of being dropped; a half that still fails only
+    loses its own edges.
+    """
+    try:
+        response, stats = call_groq_with_stats(client, build_chunk_prompt(arxiv_id, chunk, part, parts),
+                                               max_tokens=chunk_max_tokens(chunk))
+    except Exception as e:
+        record(None, failure_stats(e), len(chunk))
+        raise
+    truncated = getattr(response.choices[0], "finish_reason", None) == "length"
+    try:
+        if truncated:
+            raise ValueError("response truncated at max_tokens")
+        data = parse_response(response.choices[0].message.content)
+    except Exception as e:
+        record(response, {**stats, "status": "truncated" if truncated else "parse_error"}, len(chunk))
+        if splits <= 0 or len(chunk) < MIN_SPLIT_CHARS:
+            raise
+        print(f"  ↻ Part {part}/{parts}: {e} - retrying in two halves")
+        results = []
+        for half in split_in_two(chunk):
+            try:
+                results += extract_part(client, arxiv_id, half, part, parts, record, splits - 1)
+            except Exception as half_error:
+                print(f"  ⚠ Half of part {part}/{parts} failed ({half_error}) - its edges are skipped")
+        return results
+    record(response, stats, len(chunk))
+    return [data] if isinstance(data, dict) else []
+
+
+def extract_chunked(client, arxiv_id, raw_text, record=None, max_workers=CHUNK_WORKERS):
+    """Map-reduce extraction over the whole paper.
+
+    All chunk requests run concurrently, so wall-clock time is close to one
+    call. record(response, stats, text_chars) is called for every request,
+    failed ones included (response None, stats["status"] "error",
+    "parse_error" or "truncated"), before anything is raised; it may be
+    called from worker threads. A failed later chunk only loses its own
+    edges (see extract_part); a failed first chunk raises, since the node
+    comes from it. Returns the merged data.
+    """
+    record = record or (lambda response, stats, text_chars: None)
+    chunks = split_chunks(raw_text)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(chunks)))) as pool:
+        # Pool threads are profiled under the caller's stage (e.g. "llm")
+        first_future = pool.submit(carry_stage(call_groq_with_stats), client,
+                                   build_prompt(arxiv_id, chunks[0]), 2048)
+        futures = [pool.submit(carry_stage(extract_part), client, arxiv_id, chunk, i + 2, len(chunks), record)
+                   for i, chunk in enumerate(chunks[1:])]
+
+    parts = []
+    for index, future in enumerate(futures, 2):
+        try:
+            parts += future.result()
+        except Exception as e:
+            print(f"  ⚠ Chunk {index}/{len(chunks)} failed ({e}) - its edges are skipped")
+
+    # Recorded after the later chunks, so their calls are in even if this raises
+    try:
+        response, stats = first_future.result()
+    except Exception as e:
+        record(None, failure_stats(e), len(chunks[0]))
+        raise
+    try:
+        first = parse_response(response.choices[0].message.content)
+    except Exception:
+        record(response, {**stats, "status": "parse_error"}, len(chunks[0]))
+        raise
+    record(response, stats, len(chunks[0]))
+    return merge_extractions(first, parts)
@@ -0,0 +1,282 @@
+import psycopg2
+import numpy as np
+import json
+import os
+import sys
+
+from export_tables import DB_CONFIG, stream_query
+from normalize_entities import ENTITY_COLUMNS, EntityNormalizer, canonical_key
+
+# Cached incidence matrices, refreshed incrementally after ingestion
+COOCCURRENCE_CACHE = os.getenv("COOCCURRENCE_CACHE", os.path.join("snapshots", "cooccurrence.npz"))
+
+KINDS = tuple(ENTITY_COLUMNS.values())  # method, dataset, metric
+
+
+class Incidence:
+    """Binary papers x entities matrix in CSR form (codes + row offsets).
+
+    `keys` holds the canonical key of each column and `names` the first raw
+    spelling seen for it, which is what results are displayed with.
+    """
+
+    def __init__(self, keys=(), names=(), codes=None, offsets=None):
+        self.keys = list(keys)
+        self.names = list(names)
+        self.index = {key: i for i, key in enumerate(self.keys)}
+        self.codes = np.zeros(0, dtype=np.int32) if codes is None else codes
+        self.offsets = np.zeros(1, dtype=np.int64) if offsets is None else offsets
+
+    def append_rows(self, rows):
+        """Append one row per paper; rows are lists of (key, raw name)"""
+        codes, lengths = [], []
+        for row in rows:
+            seen = dict(row)  # one entry per key even if the paper lists it twice
+            for key, name in seen.items():
+                if key not in self.index:
+                    self.index[key] = len(self.keys)
+                    self.keys.append(key)
+                    self.names.append(name)
+                codes.append(self.index[key])
+            lengths.append(len(seen))
+        self.codes = np.concatenate([self.codes, np.asarray(codes, dtype=np.int32)])
+        self.offsets = np.concatenate([self.offsets, self.offsets[-1] + np.cumsum(lengths, dtype=np.int64)])
+
+    def take(self, keep):
+        """Keep only the rows where the boolean mask is set"""
+        lengths = np.diff(self.offsets)
+        self.codes = self.codes[np.repeat(keep, lengths)]
+        self.offsets = np.concatenate([[0], np.cumsum(lengths[keep])]).astype(np.int64)
+
+    @property
+    def row_ids(self):
+        """Row number of every stored element (COO row indices)"""
+        return np.repeat(np.arange(len(self.offsets) - 1), np.diff(self.offsets))
+
+    def rows_with(self, code):
+        """Papers whose row contains a column, i.e. one column of the matrix"""
+        return np.unique(self.row_ids[self.codes == code])
+
+    def gather(self, rows):
+        """Codes of the given rows, concatenated, with the row of each code"""
+        starts = self.offsets[rows]
+        lengths = self.offsets[rows + 1] - starts
+        first = np.repeat(starts - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths)
+        positions = first + np.arange(lengths.sum())
+        return self.codes[positions], np.repeat(rows, lengths)
+
+
+class CooccurrenceIndex:
+    """Papers x methods / datasets / metrics incidence with sparse co-occurrence queries.
+
+    All counts are products of the incidence matrices (A_kind^T A_other),
+    computed with vectorized NumPy over the CSR arrays rather than per-row loops.
+    """
+
+    def __init__(self, path=COOCCURRENCE_CACHE):
+        self.path = path
+        self.reset()
+        if os.path.exists(path):
+            self.load()
+
+    def reset(self):
+        self.ids = []
+        self.years = np.zeros(0, dtype=np.int32)
+        self.matrices = {kind: Incidence() for kind in KINDS}
+        self.aliases = {}
+        self.watermark = None
+
+    # -- persistence -----------------------------------------------------
+
+    def load(self):
+        data = np.load(self.path, allow_pickle=False)
+        self.ids = data["ids"].tolist()
+        self.years = data["years"]
+        state = json.loads(str(data["state"]))
+        self.watermark = state["watermark"]
+        self.aliases = state["aliases"]
+        for kind in KINDS:
+            self.matrices[kind] = Incidence(
+                data[f"{kind}.keys"].tolist(), data[f"{kind}.names"].tolist(),
+                data[f"{kind}.codes"], data[f"{kind}.offsets"],
+            )
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        arrays = {
+            "ids": np.array(self.ids, dtype=str),
+            "years": self.years,
+            "state": np.array(json.dumps({"watermark": self.watermark, "aliases": self.aliases})),
+        }
+        for kind, m in self.matrices.items():
+            arrays[f"{kind}.keys"] = np.array(m.keys, dtype=str)
+            arrays[f"{kind}.names"] = np.array(m.names, dtype=str)
+            arrays[f"{kind}.codes"] = m.codes
+            arrays[f"{kind}.offsets"] = m.offsets
+        tmp = self.path + ".tmp.npz"
+        np.savez(tmp, **arrays)
+        os.replace(tmp, self.path)
+
+    # -- building ----------------------------------------------------------
+
+    def refresh(self, conn, full=False):
+        """Bring the matrices up to date with one streamed scan of changed nodes.
+
+        Rows for updated papers are replaced and deleted papers are dropped;
+        with full=True (or no cache) every node is read.
+        """
+        if full:
+            self.reset()
+        normalizer = EntityNormalizer(conn)
+        self.aliases = normalizer.aliases
+
+        current = set()
+        for rows in stream_query(conn, "SELECT arxiv_id FROM nodes;", name="cooccur_ids"):
+            current.update(arxiv_id for (arxiv_id,) in rows)
+
+        changed_ids, changed_years = [], []
+        changed_rows = {kind: [] for kind in KINDS}
+        for rows in stream_query(conn, """
+            SELECT arxiv_id, year, methods, datasets, metrics, updated_at
+            FROM nodes WHERE %s IS NULL OR updated_at >= %s
+            ORDER BY arxiv_id;
+        """, (self.watermark, self.watermark), name="cooccur_nodes"):
+            for arxiv_id, year, methods, datasets, metrics, updated_at in rows:
+                changed_ids.append(arxiv_id)
+                changed_years.append(year or 0)
+                for column, values in (("methods", methods), ("datasets", datasets), ("metrics", metrics)):
+                    kind = ENTITY_COLUMNS[column]
+                    changed_rows[kind].append([
+                        (normalizer.resolve(kind, v), v.strip()) for v in values or [] if v and v.strip()
+                    ])
+                if updated_at:
+                    self.watermark = max(self.watermark or "", updated_at.isoformat())
+
+        # Drop deleted papers and the old versions of changed ones, then append
+        replaced = set(changed_ids)
+        removed = sum(1 for i in self.ids if i not in current)
+        keep = np.fromiter((i in current and i not in replaced for i in self.ids),
+                           dtype=bool, count=len(self.ids))
+        if not keep.all():
+            self.ids = [i for i, k in zip(self.ids, keep) if k]
+            self.years = self.years[keep]
+            for m in self.matrices.values():
+                m.take(keep)
+        self.ids.extend(changed_ids)
+        self.years = np.concatenate([self.years, np.asarray(changed_years, dtype=np.int32)])
+        for kind, m in self.matrices.items():
+            m.append_rows(changed_rows[kind])
+        return len(changed_ids), removed
+
+    # -- queries -----------------------------------------------------------
+
+    def code(self, kind, name):
+        key = canonical_key(name)
+        key = self.aliases.get(kind, {}).get(key, key)
+        code = self.matrices[kind].index.get(key)
+        if code is None:
+            raise KeyError(f"unknown {kind}: {name}")
+        return code
+
+    def _top(self, counts, names, k):
+        k = min(k, int((counts > 0).sum()))
+        if k == 0:
+            return []
+        top = np.argpartition(-counts, k - 1)[:k]
+        top = top[np.argsort(-counts[top], kind="stable")]
+        return [(names[i], int(counts[i])) for i in top]
+
+    def with_entity(self, kind, name, other_kind, k=10):
+        """Top other_kind entities used together with one entity (a row of A^T B)"""
+        rows = self.matrices[kind].rows_with(self.code(kind, name))
+        other = self.matrices[other_kind]
+        codes, _ = other.gather(rows)
+        counts = np.bincount(codes, minlength=len(other.keys))
+        if other_kind == kind:
+            counts[self.code(kind, name)] = 0
+        return self._top(counts, other.names, k)
+
+    def pairs(self, kind, other_kind):
+        """Sparse A_kind^T A_other as COO triplets (kind codes, other codes, papers)"""
+        a, b = self.matrices[kind], self.matrices[other_kind]
+        len_a, len_b = np.diff(a.offsets), np.diff(b.offsets)
+        per_row = len_a * len_b
+        row = np.repeat(np.arange(len(per_row)), per_row)
+        within = np.arange(per_row.sum()) - np.repeat(np.cumsum(per_row) - per_row, per_row)
+        codes_a = a.codes[a.offsets[row] + within // len_b[row]]
+        codes_b = b.codes[b.offsets[row] + within % len_b[row]]
+        if kind == other_kind:
+            off_diagonal = codes_a != codes_b
+            codes_a, codes_b = codes_a[off_diagonal], codes_b[off_diagonal]
+        flat, counts = np.unique(codes_a.astype(np.int64) * len(b.keys) + codes_b, return_counts=True)
+        return flat // len(b.keys), flat % len(b.keys), counts
+
+    def top_pairs(self, kind, other_kind, k=20):
+        rows, cols, counts = self.pairs(kind, other_kind)
+        if kind == other_kind:  # each unordered pair appears twice
+            upper = rows < cols
+            rows, cols, counts = rows[upper], cols[upper], counts[upper]
+        order = np.argsort(-counts, kind="stable")[:k]
+        a, b = self.matrices[kind], self.matrices[other_kind]
+        return [(a.names[rows[i]], b.names[cols[i]], int(counts[i])) for i in order]
+
+    def trend(self, kind, name):
+        """Papers per year using an entity"""
+        rows = self.matrices[kind].rows_with(self.code(kind, name))
+        years = self.years[rows]
+        years = years[years > 0]
+        if not len(years):
+            return {}
+        counts = np.bincount(years - years.min())
+        return {int(years.min()) + i: int(c) for i, c in enumerate(counts) if c}
+
+    def top_per_year(self, kind, name, other_kind, k=1):
+        """Top other_kind entities per year among papers using an entity"""
+        rows = self.matrices[kind].rows_with(self.code(kind, name))
+        other = self.matrices[other_kind]
+        codes, code_rows = other.gather(rows)
+        years = self.years[code_rows]
+        valid = years > 0
+        codes, years = codes[valid], years[valid]
+        result = {}
+        for year in np.unique(years):
+            counts = np.bincount(codes[years == year], minlength=len(other.keys))
+            result[int(year)] = self._top(counts, other.names, k)
+        return result
+
+
+if __name__ == "__main__":
+    # python cooccurrence.py refresh [--full]
+    # python cooccurrence.py with dataset ImageNet method
+    # python cooccurrence.py pairs dataset metric
+    # python cooccurrence.py trend method "vision transformer"
+    # python cooccurrence.py yearly dataset ImageNet metric
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    command = args[0] if args else "refresh"
+    try:
+        index = CooccurrenceIndex()
+        if command == "refresh" or not index.ids:
+            conn = psycopg2.connect(**DB_CONFIG)
+            changed, removed = index.refresh(conn, full="--full" in sys.argv[1:])
+            conn.close()
+            index.save()
+            print(f"✓ {len(index.ids):,} papers indexed ({changed} refreshed, {removed} removed)")
+            for kind, m in index.matrices.items():
+                print(f"  {kind:8} {len(m.keys):6,} entities  {len(m.codes):8,} links")
+
+        if command == "with":
+            for name, papers in index.with_entity(args[1], args[2], args[3]):
+                print(f"  {papers:5d}  {name}")
+        elif command == "pairs":
+            for a, b, papers in index.top_pairs(args[1], args[2]):
+                print(f"  {papers:5d}  {a}  ×  {b}")
+        elif command == "trend":
+            for year, papers in index.trend(args[1], args[2]).items():
+                print(f"  {year}  {papers:5d}")
+        elif command == "yearly":
+            for year, top in index.top_per_year(args[1], args[2], args[3]).items():
+                print(f"  {year}  " + ", ".join(f"{name} ({n})" for name, n in top))
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+        import traceback
+        traceback.print_exc()
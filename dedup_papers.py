@@ -0,0 +1,216 @@
+import numpy as np
+import json
+import os
+import re
+import sys
+import zlib
+
+# Persistent MinHash signatures of every paper that made it into the database
+DEDUP_INDEX = os.getenv("DEDUP_INDEX", os.path.join("dedup", "minhash_index.npz"))
+DEDUP_REPORT = os.path.join("dedup", "dedup_report.json")
+
+# Estimated Jaccard similarity at or above which a paper is skipped as a duplicate
+DUPLICATE_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.85"))
+
+# Similar enough to be a revised version - still processed, but flagged
+REVISION_THRESHOLD = float(os.getenv("DEDUP_REVISION_THRESHOLD", "0.6"))
+
+NUM_PERM = 128
+BANDS = 32          # 32 bands x 4 rows: pairs above ~0.5 almost always collide
+SHINGLE_WORDS = 5
+
+# Universal hashing (a*x + b) mod P; with x, a < 2^32 the product fits in uint64
+_PRIME = np.uint64(4294967311)
+_rng = np.random.RandomState(42)
+_A = _rng.randint(1, 2**32 - 1, size=NUM_PERM, dtype=np.uint64)
+_B = _rng.randint(0, 2**32 - 1, size=NUM_PERM, dtype=np.uint64)
+
+_WORD = re.compile(r"\w+")
+
+
+def shingle_hashes(text):
+    """CRC32 of every overlapping word n-gram in the text.
+
+    Empty for texts shorter than one shingle: scanned or image-only PDFs
+    would otherwise all share one signature and match each other.
+    """
+    words = _WORD.findall(text.lower())
+    shingles = {
+        zlib.crc32(" ".join(words[i:i + SHINGLE_WORDS]).encode("utf-8"))
+        for i in range(len(words) - SHINGLE_WORDS + 1)
+    }
+    return np.fromiter(shingles, dtype=np.uint64, count=len(shingles))
+
+
+def minhash(text):
+    """128-value MinHash signature of a document, or None if it has no shingles"""
+    hashes = shingle_hashes(text)
+    if not len(hashes):
+        return None
+    signature = np.empty(NUM_PERM, dtype=np.uint64)
+    # Permute in blocks so a long paper doesn't allocate shingles x 128 at once
+    for start in range(0, NUM_PERM, 16):
+        a = _A[start:start + 16, None]
+        b = _B[start:start + 16, None]
+        signature[start:start + 16] = ((a * hashes[None, :] + b) % _PRIME).min(axis=1)
+    return signature
+
+
+class DedupIndex:
+    """MinHash LSH index persisted as an .npz file"""
+
+    def __init__(self, path=DEDUP_INDEX, threshold=DUPLICATE_THRESHOLD,
+                 revision_threshold=REVISION_THRESHOLD):
+        self.path = path
+        self.threshold = threshold
+        self.revision_threshold = revision_threshold
+        self.ids = []
+        self.positions = {}  # arxiv_id -> position in ids / signatures
+        self.signatures = []
+        self.buckets = {}
+        self.report = []
+        if os.path.exists(path):
+            data = np.load(path, allow_pickle=False)
+            for arxiv_id, signature in zip(data["ids"].tolist(), data["signatures"]):
+                self._index(arxiv_id, signature)
+
+    def _bands(self, signature):
+        rows = NUM_PERM // BANDS
+        for band in range(BANDS):
+            yield band, signature[band * rows:(band + 1) * rows].tobytes()
+
+    def _unbucket(self, position):
+        for key in self._bands(self.signatures[position]):
+            self.buckets[key].remove(position)
+            if not self.buckets[key]:
+                del self.buckets[key]
+
+    def _bucket(self, position):
+        for key in self._bands(self.signatures[position]):
+            self.buckets.setdefault(key, []).append(position)
+
+    def _index(self, arxiv_id, signature):
+        position = self.positions.get(arxiv_id)
+        if position is None:
+            position = self.positions[arxiv_id] = len(self.ids)
+            self.ids.append(arxiv_id)
+            self.signatures.append(signature)
+        else:
+            # Re-ingested paper: drop the stale signature's buckets first
+            self._unbucket(position)
+            self.signatures[position] = signature
+        self._bucket(position)
+
+    def query(self, signature):
+        """Best (arxiv_id, similarity) among LSH candidates, or (None, 0.0)"""
+        candidates = set()
+        for key in self._bands(signature):
+            candidates.update(self.buckets.get(key, ()))
+        best, best_score = None, 0.0
+        for position in candidates:
+            score = float(np.mean(self.signatures[position] == signature))
+            if score > best_score:
+                best, best_score = self.ids[position], score
+        return best, best_score
+
+    def check(self, arxiv_id, text, source=None):
+        """Classify a paper before it is sent to the LLM.
+
+        Returns (verdict, signature, match) where verdict is "duplicate",
+        "revision" or "new" and match is the report entry for duplicates and
+        revisions (None for new papers). Matches are added to the report.
+        """
+        return self.check_signature(arxiv_id, minhash(text), source)
+
+    def check_signature(self, arxiv_id, signature, source=None):
+        """check() for a signature computed elsewhere (e.g. in a worker process)"""
+        if signature is None:
+            return "new", None, None  # too short to compare; never indexed
+        match, score = self.query(signature)
+        if match is None or match == arxiv_id or score < self.revision_threshold:
+            return "new", signature, None
+
+        verdict = "duplicate" if score >= self.threshold else "revision"
+        entry = {
+            "arxiv_id": arxiv_id,
+            "source": source,
+            "verdict": verdict,
+            "matches": match,
+            "similarity": round(score, 3),
+        }
+        self.report.append(entry)
+        return verdict, signature, entry
+
+    def add(self, arxiv_id, signature):
+        """Remember a paper that was saved to the database (replaces an older signature)"""
+        if signature is not None:
+            self._index(arxiv_id, signature)
+
+    def discard(self, arxiv_id):
+        """Forget a paper, e.g. one added early whose ingest then failed"""
+        position = self.positions.pop(arxiv_id, None)
+        if position is None:
+            return
+        self._unbucket(position)
+        last = len(self.ids) - 1
+        if position != last:
+            # Move the last paper into the gap so positions stay dense
+            self._unbucket(last)
+            moved = self.ids[position] = self.ids[last]
+            self.signatures[position] = self.signatures[last]
+            self.positions[moved] = position
+            self._bucket(position)
+        self.ids.pop()
+        self.signatures.pop()
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        signatures = np.vstack(self.signatures) if self.signatures else np.empty((0, NUM_PERM), dtype=np.uint64)
+        np.savez(self.path, ids=np.array(self.ids, dtype=str), signatures=signatures)
+
+    def save_report(self, path=DEDUP_REPORT):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report, f, indent=2)
+
+    def print_report(self):
+        skipped = [r for r in self.report if r["verdict"] == "duplicate"]
+        flagged = [r for r in self.report if r["verdict"] == "revision"]
+        print(f"⊘ Skipped as duplicate:   {len(skipped)}")
+        for r in skipped:
+            print(f"    {r['arxiv_id']} ≈ {r['matches']} ({r['similarity']:.2f})")
+        print(f"⚑ Flagged as revision:    {len(flagged)}")
+        for r in flagged:
+            print(f"    {r['arxiv_id']} ~ {r['matches']} ({r['similarity']:.2f})")
+
+
+if __name__ == "__main__":
+    # Seed the index from PDFs that are already in the database and report
+    # duplicates among them: python dedup_papers.py Alaris/papers
+    from pdf_extractors import extract_pdf_text
+    from process_all_papers import arxiv_id_from_filename
+
+    papers_dir = sys.argv[1] if len(sys.argv) > 1 else r"Alaris/papers"
+    index = DedupIndex()
+
+    print("=" * 70)
+    print("DUPLICATE SCAN")
+    print("=" * 70)
+    for filename in sorted(os.listdir(papers_dir)):
+        if not filename.endswith('.pdf'):
+            continue
+        arxiv_id = arxiv_id_from_filename(filename)
+        try:
+            text, _ = extract_pdf_text(os.path.join(papers_dir, filename))
+        except Exception as e:
+            print(f"  ✗ {filename}: {e}")
+            continue
+        verdict, signature, _ = index.check(arxiv_id, text, source=filename)
+        if verdict != "duplicate":
+            index.add(arxiv_id, signature)
+
+    index.save()
+    index.save_report()
+    print()
+    index.print_report()
+    print(f"\n✓ Index: {index.path} ({len(index.ids)} paper(s))")
@@ -0,0 +1,193 @@
+from psycopg2 import extras
+import os
+
+# Optional declarative partitioning of `edges` (set EDGES_PARTITIONED=1 before
+# running setup_supabase.py). The layout is
+#
+#   edges                      PARTITION BY LIST (archived)
+#   ├── edges_live             FOR VALUES IN (FALSE), PARTITION BY LIST (relationship_type)
+#   │   ├── edges_live_cites   FOR VALUES IN ('CITES')
+#   │   ├── ...                one per LIVE_TYPES entry
+#   │   └── edges_live_other   DEFAULT
+#   └── edges_archive          FOR VALUES IN (TRUE)
+#
+# Everything reading the graph filters on NOT archived, which prunes the
+# archive away; per-type scans only touch their own partition. Relationship
+# types are a handful of values, so LIST beats a source hash here: a hash
+# would spread each paper's edges evenly but prune nothing the viewer asks for.
+EDGES_PARTITIONED = os.getenv("EDGES_PARTITIONED", "0") == "1"
+
+# Types the extraction prompt and similarity engine produce; anything else
+# lands in edges_live_other
+LIVE_TYPES = ("CITES", "BUILDS_ON", "EXTENDS", "RELATED")
+
+DEFAULT_TYPE = "RELATED"
+
+
+def normalize_relationship(value):
+    """Upper-case, underscore-separated type, so rows hit their partition"""
+    value = "_".join(str(value or "").upper().replace("-", " ").split())
+    return value or DEFAULT_TYPE
+
+
+def is_partitioned(cur):
+    cur.execute("""
+        SELECT EXISTS (
+            SELECT 1 FROM pg_partitioned_table p
+            JOIN pg_class c ON c.oid = p.partrelid
+            WHERE c.relname = 'edges' AND c.relnamespace = 'public'::regnamespace
+        );
+    """)
+    return cur.fetchone()[0]
+
+
+def create_partitioned(cur, table="edges"):
+    cur.execute(f"""
+        CREATE TABLE {table} (
+            id BIGSERIAL,
+            source_id TEXT,
+            target_id TEXT,
+            relationship_type TEXT NOT NULL DEFAULT '{DEFAULT_TYPE}',
+            reasoning TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            archived BOOLEAN NOT NULL DEFAULT FALSE,
+            archived_at TIMESTAMP,
+            -- unique keys on a partitioned table must contain every partition key
+            PRIMARY KEY (id, archived, relationship_type)
+        ) PARTITION BY LIST (archived);
+    """)
+    cur.execute(f"""
+        CREATE TABLE {table}_live PARTITION OF {table} FOR VALUES IN (FALSE)
+        PARTITION BY LIST (relationship_type);
+    """)
+    for kind in LIVE_TYPES:
+        cur.execute(f"""
+            CREATE TABLE {table}_live_{kind.lower()} PARTITION OF {table}_live
+            FOR VALUES IN ('{kind}');
+        """)
+    cur.execute(f"CREATE TABLE {table}_live_other PARTITION OF {table}_live DEFAULT;")
+    cur.execute(f"CREATE TABLE {table}_archive PARTITION OF {table} FOR VALUES IN (TRUE);")
+    # Created on the parent, so every partition (present and future) gets them
+    cur.execute(f"CREATE INDEX {table}_id_idx ON {table} (id);")
+    cur.execute(f"CREATE INDEX {table}_source_idx ON {table} (source_id);")
+    cur.execute(f"CREATE INDEX {table}_target_idx ON {table} (target_id);")
+
+
+def install(conn):
+    """Create or upgrade `edges`; partitioned when EDGES_PARTITIONED=1.
+
+    An existing unpartitioned table is converted in one transaction (rows
+    copied with their ids, relationship types normalized). Dropping the old
+    table drops its graph_stats triggers, so run graph_stats.install after.
+    Switching a partitioned table back is not done automatically.
+    Returns a short description of what was done.
+    """
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT to_regclass('public.edges') IS NOT NULL;")
+        exists = cur.fetchone()[0]
+        partitioned = exists and is_partitioned(cur)
+
+        if not EDGES_PARTITIONED or partitioned:
+            if not exists:
+                cur.execute("""
+                    CREATE TABLE edges (
+                        id SERIAL PRIMARY KEY,
+                        source_id TEXT,
+                        target_id TEXT,
+                        relationship_type TEXT,
+                        reasoning TEXT
+                    );
+                """)
+            # Archival columns exist in both layouts so readers can always
+            # filter on NOT archived; older databases lack them
+            cur.execute("""
+                ALTER TABLE edges
+                ADD COLUMN IF NOT EXISTS created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                ADD COLUMN IF NOT EXISTS archived BOOLEAN NOT NULL DEFAULT FALSE,
+                ADD COLUMN IF NOT EXISTS archived_at TIMESTAMP;
+            """)
+            cur.execute("CREATE INDEX IF NOT EXISTS edges_source_idx ON edges (source_id);")
+            conn.commit()
+            if partitioned and not EDGES_PARTITIONED:
+                return "partitioned (left as is; EDGES_PARTITIONED is not set)"
+            return "partitioned" if partitioned else "single table"
+
+        if not exists:
+            create_partitioned(cur)
+            conn.commit()
+            return "partitioned (new)"
+
+        # Convert: build the new layout beside the old table, copy, swap
+        cur.execute("LOCK TABLE edges IN EXCLUSIVE MODE;")
+        cur.execute("""
+            ALTER TABLE edges
+            ADD COLUMN IF NOT EXISTS created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            ADD COLUMN IF NOT EXISTS archived BOOLEAN NOT NULL DEFAULT FALSE,
+            ADD COLUMN IF NOT EXISTS archived_at TIMESTAMP;
+        """)
+        create_partitioned(cur, "edges_new")
+        cur.execute("""
+            INSERT INTO edges_new (id, source_id, target_id, relationship_type, reasoning,
+                                   created_at, updated_at, archived, archived_at)
+            SELECT id, source_id, target_id,
+                   COALESCE(NULLIF(regexp_replace(upper(btrim(relationship_type)), '[\\s-]+', '_', 'g'), ''), %s),
+                   reasoning, created_at, updated_at, archived, archived_at
+            FROM edges;
+        """, (DEFAULT_TYPE,))
+        copied = cur.rowcount
+        cur.execute("DROP TABLE edges;")
+        cur.execute("ALTER TABLE edges_new RENAME TO edges;")
+        for name in ["live", "live_other", "archive"] + [f"live_{k.lower()}" for k in LIVE_TYPES]:
+            cur.execute(f"ALTER TABLE edges_new_{name} RENAME TO edges_{name};")
+        for index in ("id", "source", "target"):
+            cur.execute(f"ALTER INDEX edges_new_{index}_idx RENAME TO edges_{index}_idx;")
+        cur.execute("ALTER INDEX edges_new_pkey RENAME TO edges_pkey;")
+        cur.execute("ALTER SEQUENCE edges_new_id_seq RENAME TO edges_id_seq;")
+        cur.execute("SELECT setval('edges_id_seq', GREATEST(COALESCE(MAX(id), 0), 1)) FROM edges;")
+        conn.commit()
+        return f"partitioned (converted {copied:,} rows)"
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+def edge_rows(rows):
+    """(source_id, target_id, relationship_type, reasoning) rows with types
+    normalized and grouped, so on the partitioned layout each page routes to
+    as few partitions as possible"""
+    return sorted(
+        ((source, target, normalize_relationship(kind), reasoning)
+         for source, target, kind, reasoning in rows),
+        key=lambda row: row[2],
+    )
+
+
+def insert_edges(cur, rows, page_size=1000):
+    """Batched INSERT of (source_id, target_id, relationship_type, reasoning).
+
+    Works the same on the single table and the partitioned layout.
+    """
+    rows = edge_rows(rows)
+    if rows:
+        extras.execute_values(cur, """
+            INSERT INTO edges (source_id, target_id, relationship_type, reasoning)
+            VALUES %s;
+        """, rows, page_size=page_size)
+    return len(rows)
+
+
+async def insert_edges_async(conn, rows):
+    """insert_edges for an asyncpg connection"""
+    rows = edge_rows(rows)
+    if rows:
+        await conn.executemany("""
+            INSERT INTO edges (source_id, target_id, relationship_type, reasoning)
+            VALUES ($1, $2, $3, $4);
+        """, rows)
+    return len(rows)
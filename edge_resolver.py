@@ -0,0 +1,194 @@
+import psycopg2
+from psycopg2 import extras
+import re
+import unicodedata
+from collections import Counter
+
+from edge_partitions import insert_edges
+from export_tables import DB_CONFIG, stream_query
+
+# Minimum trigram Jaccard similarity for a fuzzy title match
+FUZZY_THRESHOLD = 0.6
+
+# Targets shorter than this are never fuzzy-matched (too ambiguous)
+MIN_FUZZY_LENGTH = 12
+
+# Parked edges fetched and committed per re-resolution round trip
+RERESOLVE_BATCH = 5000
+
+# New-style (2401.12345) and old-style (cs/0601001) arXiv identifiers
+ARXIV_PATTERN = re.compile(r"(\d{4}\.\d{4,5}|[a-z\-]+(?:\.[A-Z]{2})?/\d{7})(?:v\d+)?", re.IGNORECASE)
+
+_NON_WORD = re.compile(r"[^\w]+")
+
+
+def normalize_title(title):
+    """Lowercase, accent- and punctuation-free title for exact matching"""
+    title = unicodedata.normalize("NFKD", title or "")
+    title = "".join(c for c in title if not unicodedata.combining(c)).lower()
+    return " ".join(_NON_WORD.sub(" ", title).split())
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def arxiv_ids_in(text):
+    """Bare arXiv ids (without version) mentioned in a string"""
+    return [m.group(1).lower() for m in ARXIV_PATTERN.finditer(text or "")]
+
+
+class EdgeTargetResolver:
+    """In-memory index of existing nodes for resolving LLM edge targets.
+
+    Targets are matched, in order, by exact node id, arXiv id found in the
+    node's links, normalized title, and trigram-similar title.
+    """
+
+    def __init__(self, conn, threshold=FUZZY_THRESHOLD):
+        self.conn = conn
+        self.threshold = threshold
+        self.ids = set()
+        self.by_key = {}      # lowercase node id / arXiv id -> node id
+        self.by_title = {}    # normalized title -> node id
+        self.titles = []      # fuzzy index position -> (node id, trigram set)
+        self.postings = {}    # trigram -> [fuzzy index positions]
+        self.load()
+
+    def load(self):
+        """Build the index with one streamed scan of nodes"""
+        for rows in stream_query(self.conn, """
+            SELECT arxiv_id, title, pdf_link, project_page FROM nodes;
+        """, name="resolver_nodes"):
+            for arxiv_id, title, pdf_link, project_page in rows:
+                self.add_node(arxiv_id, title, pdf_link, project_page)
+
+    def add_node(self, arxiv_id, title, pdf_link=None, project_page=None):
+        """Make a newly saved paper resolvable without reloading"""
+        if arxiv_id in self.ids:
+            return
+        self.ids.add(arxiv_id)
+        self.by_key[arxiv_id.lower()] = arxiv_id
+        for link in (pdf_link, project_page):
+            for ref in arxiv_ids_in(link):
+                self.by_key.setdefault(ref, arxiv_id)
+
+        key = normalize_title(title)
+        if not key:
+            return
+        self.by_title.setdefault(key, arxiv_id)
+        grams = trigrams(key)
+        position = len(self.titles)
+        self.titles.append((arxiv_id, grams))
+        for gram in grams:
+            self.postings.setdefault(gram, []).append(position)
+
+    def resolve(self, target):
+        """Node id for a single target reference, or None"""
+        if not target:
+            return None
+        target = str(target).strip()
+        if target in self.ids:
+            return target
+
+        found = self.by_key.get(target.lower())
+        if found:
+            return found
+        for ref in arxiv_ids_in(target):
+            if ref in self.by_key:
+                return self.by_key[ref]
+
+        key = normalize_title(target)
+        if key in self.by_title:
+            return self.by_title[key]
+        if len(key) < MIN_FUZZY_LENGTH:
+            return None
+
+        # Count shared trigrams per candidate through the inverted index,
+        # then score only the candidates that share anything at all
+        grams = trigrams(key)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self.postings.get(gram, ()))
+        best, best_score = None, self.threshold
+        for position, common in shared.most_common(20):
+            arxiv_id, other = self.titles[position]
+            score = common / (len(grams) + len(other) - common)
+            if score >= best_score:
+                best, best_score = arxiv_id, score
+        return best
+
+    def resolve_many(self, targets):
+        """Resolve a whole batch in one pass: {target: node id or None}"""
+        return {target: self.resolve(target) for target in set(targets) if target}
+
+    def record_unresolved(self, cur, source_id, edges):
+        """Park edges (records.Edge) whose target isn't a known node yet"""
+        if not edges:
+            return
+        extras.execute_values(cur, """
+            INSERT INTO unresolved_edges (source_id, target_ref, relationship_type, reasoning)
+            VALUES %s;
+        """, [
+            (source_id, edge.target_arxiv_id, edge.relationship_type, edge.reasoning)
+            for edge in edges
+        ])
+
+    def reresolve(self, batch_size=RERESOLVE_BATCH):
+        """Retry parked edges against the current node index.
+
+        Run after new papers land; resolved edges move into `edges`. The
+        table is walked in id order one batch at a time, and rows whose
+        target resolves back to their own source are dropped.
+        """
+        cur = self.conn.cursor()
+        last_id, seen, moved = 0, 0, 0
+        while True:
+            cur.execute("""
+                SELECT id, source_id, target_ref, relationship_type, reasoning
+                FROM unresolved_edges
+                WHERE id > %s
+                ORDER BY id
+                LIMIT %s;
+            """, (last_id, batch_size))
+            pending = cur.fetchall()
+            if not pending:
+                break
+            last_id = pending[-1][0]
+            seen += len(pending)
+            resolved = self.resolve_many(row[2] for row in pending)
+
+            found = [
+                (row[0], row[1], resolved[row[2]], row[3], row[4])
+                for row in pending
+                if resolved.get(row[2]) and resolved[row[2]] != row[1]
+            ]
+            done = [row[0] for row in found]
+            done += [row[0] for row in pending if resolved.get(row[2]) == row[1]]
+            if found:
+                insert_edges(cur, [row[1:] for row in found])
+            if done:
+                cur.execute("DELETE FROM unresolved_edges WHERE id = ANY(%s);", (done,))
+            self.conn.commit()
+            moved += len(found)
+        cur.close()
+
+        print(f"  ✓ Re-resolved {moved} of {seen} pending edge target(s)")
+        return moved
+
+if __name__ == "__main__":
+    print("=" * 70)
+    print("EDGE TARGET RE-RESOLUTION")
+    print("=" * 70)
+
+    try:
+        conn = psycopg2.connect(**DB_CONFIG)
+        resolver = EdgeTargetResolver(conn)
+        print(f"\n✓ Indexed {len(resolver.ids):,} node(s)")
+        resolver.reresolve()
+        conn.close()
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,380 @@
+import psycopg2
+import csv
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+
+# Database Configuration - Supabase
+DB_CONFIG = {
+    "dbname": os.getenv("DB_NAME", "postgres"),
+    "user": os.getenv("DB_USER", "postgres"),
+    "password": os.getenv("DB_PASSWORD"),
+    "host": "db.qcrgyeosydtcptrantke.supabase.co",
+    "port": "5432"
+}
+
+# Rows pulled from the server-side cursor per round trip
+FETCH_SIZE = 2000
+
+# Where exports and the incremental watermark file are written
+EXPORT_DIR = "exports"
+STATE_FILE = os.path.join(EXPORT_DIR, ".export_state.json")
+
+# Incremental exports re-read this far behind the last watermark, so rows
+# stamped before a long transaction committed are still picked up. Rows
+# already exported with the same timestamp are skipped, so deltas don't repeat.
+EXPORT_OVERLAP_SECONDS = int(os.getenv("EXPORT_OVERLAP_SECONDS", "600"))
+
+# Table layout: output name, columns, primary key, and the timestamp column
+# used as the incremental watermark. The triggers below keep the watermark
+# current on every write, and record deletes in export_tombstones.
+TABLES = {
+    "nodes": {
+        "name": "Nodes",
+        "columns": [
+            ("arxiv_id", "text"), ("title", "text"), ("authors", "text"),
+            ("year", "int"), ("summary", "text"), ("methods", "list"),
+            ("datasets", "list"), ("metrics", "list"),
+            ("project_page", "text"), ("pdf_link", "text"),
+            ("updated_at", "timestamp"),
+        ],
+        "key": "arxiv_id",
+        "watermark": "updated_at",
+        "order_by": "arxiv_id",
+    },
+    "edges": {
+        "name": "Edges",
+        "columns": [
+            ("id", "int"), ("source_id", "text"), ("target_id", "text"),
+            ("relationship_type", "text"), ("reasoning", "text"),
+            ("archived", "bool"), ("updated_at", "timestamp"),
+        ],
+        "key": "id",
+        "watermark": "updated_at",
+        "order_by": "id",
+    },
+    "metadata": {
+        "name": "Metadata",
+        "columns": [
+            ("arxiv_id", "text"), ("citation_count", "int"),
+            ("last_updated", "timestamp"),
+        ],
+        "key": "arxiv_id",
+        "watermark": "last_updated",
+        "order_by": "arxiv_id",
+    },
+}
+
+FORMATS = ("xlsx", "csv", "parquet")
+
+CHANGE_TRACKING_SQL = """
+CREATE TABLE IF NOT EXISTS export_tombstones (
+    table_name TEXT NOT NULL,
+    row_key TEXT NOT NULL,
+    deleted_at TIMESTAMP NOT NULL DEFAULT clock_timestamp()
+);
+
+CREATE INDEX IF NOT EXISTS export_tombstones_idx ON export_tombstones (table_name, deleted_at);
+
+-- Sets the watermark column named by TG_ARGV[0]. clock_timestamp() rather
+-- than the transaction start keeps the gap to commit time small.
+CREATE OR REPLACE FUNCTION export_touch() RETURNS TRIGGER AS $$
+BEGIN
+    NEW := jsonb_populate_record(NEW, jsonb_build_object(TG_ARGV[0], clock_timestamp()));
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- TG_ARGV: table, key column. An UPDATE that moves a row between partitions
+-- fires DELETE on the old partition; the row still exists, so no tombstone.
+CREATE OR REPLACE FUNCTION export_tombstone() RETURNS TRIGGER AS $$
+DECLARE
+    row_key TEXT := to_jsonb(OLD) ->> TG_ARGV[1];
+    still_there BOOLEAN;
+BEGIN
+    EXECUTE format('SELECT EXISTS (SELECT 1 FROM %I WHERE %I = ($1).%I)', TG_ARGV[0], TG_ARGV[1], TG_ARGV[1])
+        INTO still_there USING OLD;
+    IF NOT still_there THEN
+        INSERT INTO export_tombstones (table_name, row_key) VALUES (TG_ARGV[0], row_key);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+TOMBSTONE_COLUMNS = [("row_key", "text"), ("deleted_at", "timestamp")]
+
+
+def install_change_tracking(cur):
+    """Watermark and tombstone triggers on every exported table (idempotent)"""
+    cur.execute(CHANGE_TRACKING_SQL)
+    for table, spec in TABLES.items():
+        cur.execute(f"DROP TRIGGER IF EXISTS {table}_export_touch ON {table};")
+        cur.execute(f"""
+            CREATE TRIGGER {table}_export_touch BEFORE INSERT OR UPDATE ON {table}
+            FOR EACH ROW EXECUTE FUNCTION export_touch('{spec['watermark']}');
+        """)
+        cur.execute(f"DROP TRIGGER IF EXISTS {table}_export_tombstone ON {table};")
+        cur.execute(f"""
+            CREATE TRIGGER {table}_export_tombstone AFTER DELETE ON {table}
+            FOR EACH ROW EXECUTE FUNCTION export_tombstone('{table}', '{spec['key']}');
+        """)
+
+
+def stream_query(conn, query, params=None, name="stream", fetch_size=FETCH_SIZE):
+    """Yield lists of rows from a server-side (named) cursor.
+
+    Only `fetch_size` rows are held client-side at a time, so memory stays
+    flat no matter how large the table is.
+    """
+    cur = conn.cursor(name=name)
+    cur.itersize = fetch_size
+    try:
+        cur.execute(query, params)
+        while True:
+            rows = cur.fetchmany(fetch_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        cur.close()
+
+
+def _within_overlap(stamps, high_water):
+    """Entries of {key: iso timestamp} the next overlapping read will see again"""
+    cutoff = (datetime.fromisoformat(high_water) - timedelta(seconds=EXPORT_OVERLAP_SECONDS)).isoformat()
+    return {key: stamp for key, stamp in stamps.items() if stamp >= cutoff}
+
+
+def _flatten(value):
+    """Make a value safe for XLSX/CSV cells"""
+    if isinstance(value, list):
+        return "; ".join(str(v) for v in value)
+    return value
+
+
+class CsvWriter:
+    def __init__(self, path, columns):
+        self.file = open(path, "w", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow([name for name, _ in columns])
+
+    def write_rows(self, rows):
+        self.writer.writerows([[_flatten(v) for v in row] for row in rows])
+
+    def close(self):
+        self.file.close()
+
+
+class XlsxWriter:
+    def __init__(self, path, columns):
+        from openpyxl import Workbook  # only needed for xlsx output
+
+        self.path = path
+        # write_only workbooks stream rows to disk instead of keeping cells
+        self.workbook = Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet()
+        self.sheet.append([name for name, _ in columns])
+
+    def write_rows(self, rows):
+        for row in rows:
+            self.sheet.append([_flatten(v) for v in row])
+
+    def close(self):
+        self.workbook.save(self.path)
+
+
+class ParquetWriter:
+    def __init__(self, path, columns):
+        import pyarrow as pa  # only needed for parquet output
+        import pyarrow.parquet as pq
+
+        types = {
+            "text": pa.string(),
+            "int": pa.int64(),
+            "list": pa.list_(pa.string()),
+            "bool": pa.bool_(),
+            "timestamp": pa.timestamp("us"),
+        }
+        self.pa = pa
+        self.schema = pa.schema([(name, types[kind]) for name, kind in columns])
+        self.writer = pq.ParquetWriter(path, self.schema, compression="zstd")
+
+    def write_rows(self, rows):
+        # One row group per fetched batch
+        columns = list(zip(*rows))
+        arrays = [
+            self.pa.array(list(col), type=field.type)
+            for col, field in zip(columns, self.schema)
+        ]
+        self.writer.write_table(self.pa.Table.from_arrays(arrays, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+WRITERS = {"xlsx": XlsxWriter, "csv": CsvWriter, "parquet": ParquetWriter}
+
+
+class TableExporter:
+    def __init__(self, export_dir=EXPORT_DIR, formats=FORMATS):
+        self.conn = psycopg2.connect(**DB_CONFIG)
+        self.export_dir = export_dir
+        self.formats = formats
+        self.state_file = os.path.join(export_dir, os.path.basename(STATE_FILE))
+        os.makedirs(export_dir, exist_ok=True)
+        self.state = self.load_state()
+
+        # Deletes after this point belong in the next delta
+        cur = self.conn.cursor()
+        cur.execute("SELECT clock_timestamp()::TIMESTAMP;")
+        self.started = cur.fetchone()[0].isoformat()
+        cur.close()
+
+    def load_state(self):
+        """Load watermarks from the last export"""
+        if os.path.exists(self.state_file):
+            with open(self.state_file, encoding="utf-8") as f:
+                return json.load(f)
+        return {}
+
+    def save_state(self):
+        with open(self.state_file, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, indent=2)
+
+    def export_rows(self, query, params, columns, key, watermark, base, previous, name, keep_empty):
+        """Stream a query into every requested format.
+
+        `previous` is {"watermark": iso, "recent": {key: iso}}: rows in
+        `recent` with an unchanged timestamp were already exported from the
+        overlap window and are skipped. Returns (rows written, new state).
+        """
+        names = [column for column, _ in columns]
+        key_idx, ts_idx = names.index(key), names.index(watermark)
+        recent = previous["recent"] if previous else {}
+        paths = [os.path.join(self.export_dir, f"{base}.{fmt}") for fmt in self.formats]
+        writers = [WRITERS[fmt](path, columns) for fmt, path in zip(self.formats, paths)]
+
+        total = 0
+        high_water = None
+        seen = {}  # key -> timestamp of rows that may fall in the next overlap window
+        try:
+            for rows in stream_query(self.conn, query, params, name=f"export_{name.replace('.', '_')}"):
+                fresh = []
+                for row in rows:
+                    stamp = row[ts_idx].isoformat() if row[ts_idx] is not None else None
+                    row_key = str(row[key_idx])
+                    if stamp is not None:
+                        seen[row_key] = stamp
+                        high_water = max(high_water or stamp, stamp)
+                    if stamp is None or recent.get(row_key) != stamp:
+                        fresh.append(row)
+                if fresh:
+                    for writer in writers:
+                        writer.write_rows(fresh)
+                    total += len(fresh)
+                if len(seen) > 10 * FETCH_SIZE:
+                    seen = _within_overlap(seen, high_water)
+        finally:
+            for writer in writers:
+                writer.close()
+
+        if total == 0 and not keep_empty:
+            # Nothing changed - don't leave empty delta files behind
+            for path in paths:
+                os.remove(path)
+
+        if high_water is None:
+            return total, previous
+        recent = _within_overlap(seen, high_water)
+        if previous and previous["watermark"] > high_water:
+            high_water = previous["watermark"]
+        return total, {"watermark": high_water, "recent": recent}
+
+    def export_table(self, table, incremental=False):
+        """Stream one table (and, for deltas, its deletions) into every requested format"""
+        spec = TABLES[table]
+        columns = spec["columns"]
+        watermark_col = spec["watermark"]
+
+        since = self.state.get(table) if incremental else None
+        if since is not None and not isinstance(since, dict):
+            print(f"  ↻ {table}: watermark from an older exporter - exporting everything")
+            since = None
+
+        query = f"SELECT {', '.join(name for name, _ in columns)} FROM {table}"
+        params = None
+        if since is not None:
+            query += f" WHERE {watermark_col} >= %s::TIMESTAMP - %s * INTERVAL '1 second'"
+            params = (since["watermark"], EXPORT_OVERLAP_SECONDS)
+        query += f" ORDER BY {spec['order_by']};"
+
+        # Full exports replace the snapshot, incremental ones write delta files
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        base = f"{spec['name']}.delta_{stamp}" if since is not None else spec["name"]
+
+        total, state = self.export_rows(query, params, columns, spec["key"], watermark_col, base,
+                                        since, table, keep_empty=since is None)
+        if state is not None:
+            self.state[table] = state
+
+        deleted = 0
+        tombstones = f"{table}.deleted"
+        if since is not None and self.state.get(tombstones):
+            previous = self.state[tombstones]
+            deleted, state = self.export_rows("""
+                SELECT row_key, deleted_at FROM export_tombstones
+                WHERE table_name = %s AND deleted_at >= %s::TIMESTAMP - %s * INTERVAL '1 second'
+                ORDER BY deleted_at;
+            """, (table, previous["watermark"], EXPORT_OVERLAP_SECONDS), TOMBSTONE_COLUMNS, "row_key",
+                "deleted_at", f"{spec['name']}.deleted_{stamp}", previous, tombstones, keep_empty=False)
+            self.state[tombstones] = state
+        elif since is None:
+            # A full snapshot already reflects every earlier delete
+            self.state[tombstones] = {"watermark": self.started, "recent": {}}
+
+        if since is not None and total == 0 and deleted == 0:
+            print(f"  ⊘ {table}: no rows changed since {since['watermark']}")
+        else:
+            print(f"  ✓ {table}: {total:,} row(s) → {base}.{{{','.join(self.formats)}}}"
+                  + (f", {deleted:,} deletion(s)" if deleted else ""))
+        return total
+
+    def export_all(self, incremental=False):
+        """Export nodes, edges and metadata"""
+        print("=" * 70)
+        print("INCREMENTAL EXPORT" if incremental else "FULL EXPORT")
+        print("=" * 70)
+        print(f"Directory: {self.export_dir}")
+        print(f"Formats:   {', '.join(self.formats)}\n")
+
+        for table in TABLES:
+            self.export_table(table, incremental=incremental)
+
+        self.save_state()
+        print("\n✓ Export state saved")
+
+    def close(self):
+        """Close database connection"""
+        self.conn.close()
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    incremental = "--incremental" in args
+    formats = tuple(a.split("=", 1)[1] for a in args if a.startswith("--format="))
+    unknown = [fmt for fmt in formats if fmt not in WRITERS]
+    if unknown:
+        print(f"❌ Unknown format(s): {', '.join(unknown)}")
+        print(f"Usage: python export_tables.py [--incremental] [--format={'|'.join(FORMATS)} ...]")
+        sys.exit(2)
+
+    try:
+        exporter = TableExporter(formats=formats or FORMATS)
+        exporter.export_all(incremental=incremental)
+        exporter.close()
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,185 @@
+import json
+import os
+import time
+
+from records import RecordError, decode_extraction
+
+# Versions recorded on every node. Bump PROMPT_VERSION whenever the prompt
+# below changes and EXTRACTOR_VERSION when text extraction or response
+# parsing changes; backfill_versions.py re-runs rows with stale versions.
+EXTRACTOR_VERSION = "3"
+PROMPT_VERSION = "2"
+MODEL_NAME = os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")
+
+# Characters of paper text sent with a single prompt
+TEXT_LIMIT = 15000
+
+# Batched mode packs papers up to this length into one request, within a
+# total text budget; the per-paper JSON schema is the same as the single
+# prompt's, so batched rows carry the same PROMPT_VERSION
+BATCH_PAPER_CHARS = int(os.getenv("BATCH_PAPER_CHARS", "6000"))
+BATCH_CHAR_BUDGET = int(os.getenv("BATCH_CHAR_BUDGET", "24000"))
+BATCH_TOKENS_PER_PAPER = 1200
+
+
+def build_prompt(arxiv_id, raw_text):
+    """Single-paper extraction prompt"""
+    return f"""
+Extract information from this research paper and return ONLY valid JSON (no markdown):
+
+{{
+  "node": {{
+    "arxiv_id": "{arxiv_id}",
+    "title": "paper title",
+    "authors": "author names",
+    "year": 2024,
+    "summary": "brief summary (1-2 sentences)",
+    "methods": ["method1", "method2"],
+    "datasets": ["dataset1"],
+    "metrics": ["metric1"],
+    "project_page": "",
+    "pdf_link": ""
+  }},
+  "edges": [
+    {{"target_arxiv_id": "related_paper_id", "relationship_type": "CITES", "reasoning": "why"}},
+    {{"target_arxiv_id": "another_paper_id", "relationship_type": "BUILDS_ON", "reasoning": "explanation"}}
+  ],
+  "metadata": {{"citation_count": 0}}
+}}
+
+Paper text (first {TEXT_LIMIT} chars):
+{raw_text[:TEXT_LIMIT]}
+"""
+
+
+def build_batch_prompt(papers):
+    """One prompt for several short papers given as [(arxiv_id, raw_text), ...]"""
+    sections = "\n".join(
+        f"=== PAPER {arxiv_id} ===\n{raw_text[:BATCH_PAPER_CHARS]}\n=== END PAPER {arxiv_id} ===\n"
+        for arxiv_id, raw_text in papers
+    )
+    ids = ", ".join(f'"{arxiv_id}"' for arxiv_id, _ in papers)
+    return f"""
+Extract information from each research paper below and return ONLY valid JSON (no markdown).
+The papers are separated by "=== PAPER <id> ===" / "=== END PAPER <id> ===" lines.
+Return one entry per paper, keyed by its id ({ids}), and never mix information between papers:
+
+{{
+  "papers": {{
+    "<id>": {{
+      "node": {{
+        "arxiv_id": "<id>",
+        "title": "paper title",
+        "authors": "author names",
+        "year": 2024,
+        "summary": "brief summary (1-2 sentences)",
+        "methods": ["method1", "method2"],
+        "datasets": ["dataset1"],
+        "metrics": ["metric1"],
+        "project_page": "",
+        "pdf_link": ""
+      }},
+      "edges": [
+        {{"target_arxiv_id": "related_paper_id", "relationship_type": "CITES", "reasoning": "why"}}
+      ],
+      "metadata": {{"citation_count": 0}}
+    }}
+  }}
+}}
+
+{sections}"""
+
+
+def batch_max_tokens(n_papers):
+    return min(8192, BATCH_TOKENS_PER_PAPER * n_papers)
+
+
+def call_groq(client, prompt, max_tokens=2048, max_retries=3):
+    """Chat completion with retry on rate limits"""
+    response, stats = call_groq_with_stats(client, prompt, max_tokens, max_retries)
+    return response
+
+
+def call_groq_with_stats(client, prompt, max_tokens=2048, max_retries=3):
+    """Like call_groq, but also returns {"latency": seconds, "retries": n, "model": ..., "status": "ok"}.
+
+    The final exception carries the same dict as `.stats` (status "error"),
+    so failed calls can be recorded too.
+    """
+    for attempt in range(max_retries):
+        request_start = time.perf_counter()
+        try:
+            response = client.chat.completions.create(
+                messages=[{"role": "user", "content": prompt}],
+                model=MODEL_NAME,
+                temperature=0.1,
+                max_tokens=max_tokens
+            )
+            # Latency covers the successful request only, not rate-limit waits
+            return response, {
+                "latency": time.perf_counter() - request_start,
+                "retries": attempt,
+                "model": MODEL_NAME,
+                "status": "ok",
+            }
+        except Exception as api_error:
+            if "rate_limit" in str(api_error).lower() and attempt < max_retries - 1:
+                wait_time = (attempt + 1) * 10  # 10, 20, 30 seconds
+                print(f"  ⚠ Rate limit hit - waiting {wait_time}s...")
+                time.sleep(wait_time)
+            else:
+                api_error.stats = {
+                    "latency": time.perf_counter() - request_start,
+                    "retries": attempt,
+                    "model": MODEL_NAME,
+                    "status": "error",
+                }
+                raise  # Re-raise if not rate limit or last attempt
+
+
+def failure_stats(error):
+    """Stats for a call that raised, from call_groq_with_stats's `.stats` where present"""
+    return {"latency": 0.0, "retries": 0, "model": MODEL_NAME, **getattr(error, "stats", {}), "status": "error"}
+
+
+def parse_response(content):
+    """Parse the model's JSON, tolerating a ```json fenced block"""
+    json_data = content.strip()
+    if json_data.startswith('```'):
+        json_data = json_data.split('```')[1]
+        if json_data.startswith('json'):
+            json_data = json_data[4:]
+    json_data = json_data.strip()
+    return json.loads(json_data)
+
+
+def parse_batch_response(content, arxiv_ids):
+    """Split a batched response into ({arxiv_id: ExtractionRecord}, [arxiv_ids that failed]).
+
+    Each entry is decoded on its own, so a missing or malformed paper (or one
+    without a title) fails alone and the others are kept.
+    """
+    try:
+        papers = parse_response(content).get("papers")
+    except (ValueError, AttributeError):
+        papers = None
+    if not isinstance(papers, dict):
+        return {}, list(arxiv_ids)
+
+    results, failed = {}, []
+    for arxiv_id in arxiv_ids:
+        try:
+            record = decode_extraction(papers.get(arxiv_id), arxiv_id)
+        except RecordError:
+            failed.append(arxiv_id)
+            continue
+        if record.paper.title:
+            results[arxiv_id] = record
+        else:
+            failed.append(arxiv_id)
+    return results, failed
+
+
+def versions():
+    """(extractor_version, prompt_version, model_version) for new rows"""
+    return EXTRACTOR_VERSION, PROMPT_VERSION, MODEL_NAME
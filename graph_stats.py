@@ -0,0 +1,385 @@
+import psycopg2
+import sys
+
+from export_tables import DB_CONFIG
+
+# Single-row summary of the graph, kept current by statement-level triggers on
+# nodes / edges / metadata so every writer (batch, async, HTTP, backfill,
+# similarity sync) records its change in the same transaction as its own rows.
+# Histograms are JSONB objects {key: count}; nodes without a year count as "0".
+# Edge counts cover live edges only; archiving (see archive_edges.py) is an
+# UPDATE that moves a row out of the counts.
+#
+# The triggers never update the summary row itself: that would hold its row
+# lock until commit and serialize every concurrent writer. Each statement
+# appends a delta row instead; read() adds the pending deltas to the summary
+# and fold() moves them into it. MIN / MAX citations can't be kept as deltas,
+# so they are read through the citation_count index.
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS graph_stats (
+    id INTEGER PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+    paper_count BIGINT NOT NULL DEFAULT 0,
+    edge_count BIGINT NOT NULL DEFAULT 0,
+    metadata_count BIGINT NOT NULL DEFAULT 0,
+    year_histogram JSONB NOT NULL DEFAULT '{}',
+    relationship_histogram JSONB NOT NULL DEFAULT '{}',
+    citation_sum BIGINT NOT NULL DEFAULT 0,
+    citation_max INTEGER,
+    citation_min INTEGER,
+    papers_with_citations BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS graph_stats_delta (
+    id BIGSERIAL PRIMARY KEY,
+    paper_count BIGINT NOT NULL DEFAULT 0,
+    edge_count BIGINT NOT NULL DEFAULT 0,
+    metadata_count BIGINT NOT NULL DEFAULT 0,
+    year_histogram JSONB NOT NULL DEFAULT '{}',
+    relationship_histogram JSONB NOT NULL DEFAULT '{}',
+    citation_sum BIGINT NOT NULL DEFAULT 0,
+    papers_with_citations BIGINT NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS metadata_citation_count_idx ON metadata (citation_count);
+
+CREATE OR REPLACE FUNCTION stats_merge_counts(hist JSONB, delta JSONB) RETURNS JSONB AS $$
+    SELECT COALESCE(jsonb_object_agg(key, total) FILTER (WHERE total <> 0), '{}'::jsonb)
+    FROM (
+        SELECT key, SUM(value::BIGINT) AS total
+        FROM (SELECT * FROM jsonb_each_text(hist)
+              UNION ALL
+              SELECT * FROM jsonb_each_text(delta)) d
+        GROUP BY key
+    ) t;
+$$ LANGUAGE SQL IMMUTABLE;
+
+CREATE OR REPLACE AGGREGATE stats_sum_counts(JSONB) (
+    SFUNC = stats_merge_counts, STYPE = JSONB, INITCOND = '{}'
+);
+
+-- Sum of the deltas not yet folded into graph_stats
+CREATE OR REPLACE VIEW graph_stats_pending AS
+SELECT COALESCE(SUM(paper_count), 0) AS paper_count,
+       COALESCE(SUM(edge_count), 0) AS edge_count,
+       COALESCE(SUM(metadata_count), 0) AS metadata_count,
+       stats_sum_counts(year_histogram) AS year_histogram,
+       stats_sum_counts(relationship_histogram) AS relationship_histogram,
+       COALESCE(SUM(citation_sum), 0) AS citation_sum,
+       COALESCE(SUM(papers_with_citations), 0) AS papers_with_citations,
+       MAX(created_at) AS updated_at
+FROM graph_stats_delta;
+
+CREATE OR REPLACE FUNCTION stats_nodes_changed() RETURNS TRIGGER AS $$
+DECLARE
+    added BIGINT := 0;
+    removed BIGINT := 0;
+    delta JSONB := '{}';
+    part JSONB;
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        SELECT COALESCE(SUM(c), 0), COALESCE(jsonb_object_agg(y, c), '{}')
+        INTO added, part
+        FROM (SELECT COALESCE(year, 0)::TEXT AS y, COUNT(*) AS c FROM new_rows GROUP BY 1) t;
+        delta := stats_merge_counts(delta, part);
+    END IF;
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        SELECT COALESCE(SUM(c), 0), COALESCE(jsonb_object_agg(y, -c), '{}')
+        INTO removed, part
+        FROM (SELECT COALESCE(year, 0)::TEXT AS y, COUNT(*) AS c FROM old_rows GROUP BY 1) t;
+        delta := stats_merge_counts(delta, part);
+    END IF;
+    IF added = removed AND delta = '{}' THEN
+        RETURN NULL;  -- nothing that the stats track changed
+    END IF;
+    INSERT INTO graph_stats_delta (paper_count, year_histogram)
+    VALUES (added - removed, delta);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION stats_edges_changed() RETURNS TRIGGER AS $$
+DECLARE
+    added BIGINT := 0;
+    removed BIGINT := 0;
+    delta JSONB := '{}';
+    part JSONB;
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        SELECT COALESCE(SUM(c), 0), COALESCE(jsonb_object_agg(r, c), '{}')
+        INTO added, part
+        FROM (SELECT COALESCE(relationship_type, 'UNKNOWN') AS r, COUNT(*) AS c
+              FROM new_rows WHERE NOT archived GROUP BY 1) t;
+        delta := stats_merge_counts(delta, part);
+    END IF;
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        SELECT COALESCE(SUM(c), 0), COALESCE(jsonb_object_agg(r, -c), '{}')
+        INTO removed, part
+        FROM (SELECT COALESCE(relationship_type, 'UNKNOWN') AS r, COUNT(*) AS c
+              FROM old_rows WHERE NOT archived GROUP BY 1) t;
+        delta := stats_merge_counts(delta, part);
+    END IF;
+    IF added = removed AND delta = '{}' THEN
+        RETURN NULL;  -- nothing that the stats track changed
+    END IF;
+    INSERT INTO graph_stats_delta (edge_count, relationship_histogram)
+    VALUES (added - removed, delta);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION stats_metadata_changed() RETURNS TRIGGER AS $$
+DECLARE
+    add_n BIGINT := 0; add_sum BIGINT := 0; add_pos BIGINT := 0;
+    del_n BIGINT := 0; del_sum BIGINT := 0; del_pos BIGINT := 0;
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        SELECT COUNT(*), COALESCE(SUM(citation_count), 0),
+               COUNT(*) FILTER (WHERE citation_count > 0)
+        INTO add_n, add_sum, add_pos
+        FROM new_rows;
+    END IF;
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        SELECT COUNT(*), COALESCE(SUM(citation_count), 0),
+               COUNT(*) FILTER (WHERE citation_count > 0)
+        INTO del_n, del_sum, del_pos
+        FROM old_rows;
+    END IF;
+    IF add_n = 0 AND del_n = 0 THEN
+        RETURN NULL;
+    END IF;
+    INSERT INTO graph_stats_delta (metadata_count, citation_sum, papers_with_citations)
+    VALUES (add_n - del_n, add_sum - del_sum, add_pos - del_pos);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+# Transition tables allow a single event per trigger, hence three per table.
+# ON CONFLICT DO UPDATE fires both the insert and the update trigger, each
+# seeing only its own rows. On a partitioned edges table the triggers sit on
+# the parent, whose transition tables collect rows from every partition
+# (including rows an UPDATE moved between partitions); partitions themselves
+# cannot have transition-table triggers.
+TRIGGERED_TABLES = {
+    "nodes": "stats_nodes_changed",
+    "edges": "stats_edges_changed",
+    "metadata": "stats_metadata_changed",
+}
+
+_TRANSITIONS = {
+    "INSERT": "REFERENCING NEW TABLE AS new_rows",
+    "UPDATE": "REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows",
+    "DELETE": "REFERENCING OLD TABLE AS old_rows",
+}
+
+
+def install(conn):
+    """Create the stats tables, functions and triggers (idempotent).
+
+    Ends with rebuild(), so the summary row the deltas fold into exists
+    as soon as the triggers do.
+    """
+    cur = conn.cursor()
+    cur.execute(SCHEMA_SQL)
+    for table, function in TRIGGERED_TABLES.items():
+        for event, referencing in _TRANSITIONS.items():
+            name = f"{table}_stats_{event.lower()}"
+            cur.execute(f"DROP TRIGGER IF EXISTS {name} ON {table};")
+            cur.execute(f"""
+                CREATE TRIGGER {name} AFTER {event} ON {table}
+                {referencing}
+                FOR EACH STATEMENT EXECUTE FUNCTION {function}();
+            """)
+    cur.close()
+    rebuild(conn)
+
+
+def rebuild(conn):
+    """Recompute the stats row from scratch and clear the pending deltas.
+
+    Locks the three source tables against writes for the duration, so every
+    delta written before the lock is committed (and cleared) and none is
+    written during the recount.
+    """
+    autocommit = conn.autocommit
+    conn.autocommit = False  # LOCK TABLE needs a transaction
+    cur = conn.cursor()
+    try:
+        cur.execute("LOCK TABLE nodes, edges, metadata IN SHARE MODE;")
+        cur.execute("DELETE FROM graph_stats_delta;")
+        cur.execute("""
+            INSERT INTO graph_stats (
+                id, paper_count, edge_count, metadata_count, year_histogram,
+                relationship_histogram, citation_sum, citation_max, citation_min,
+                papers_with_citations, updated_at
+            )
+            SELECT 1,
+                   (SELECT COUNT(*) FROM nodes),
+                   (SELECT COUNT(*) FROM edges WHERE NOT archived),
+                   m.n,
+                   (SELECT COALESCE(jsonb_object_agg(y, c), '{}') FROM (
+                        SELECT COALESCE(year, 0)::TEXT AS y, COUNT(*) AS c FROM nodes GROUP BY 1) t),
+                   (SELECT COALESCE(jsonb_object_agg(r, c), '{}') FROM (
+                        SELECT COALESCE(relationship_type, 'UNKNOWN') AS r, COUNT(*) AS c
+                        FROM edges WHERE NOT archived GROUP BY 1) t),
+                   m.total, m.hi, m.lo, m.positive,
+                   CURRENT_TIMESTAMP
+            FROM (
+                SELECT COUNT(*) AS n, COALESCE(SUM(citation_count), 0) AS total,
+                       MAX(citation_count) AS hi, MIN(citation_count) AS lo,
+                       COUNT(*) FILTER (WHERE citation_count > 0) AS positive
+                FROM metadata
+            ) m
+            ON CONFLICT (id) DO UPDATE SET
+                paper_count = EXCLUDED.paper_count,
+                edge_count = EXCLUDED.edge_count,
+                metadata_count = EXCLUDED.metadata_count,
+                year_histogram = EXCLUDED.year_histogram,
+                relationship_histogram = EXCLUDED.relationship_histogram,
+                citation_sum = EXCLUDED.citation_sum,
+                citation_max = EXCLUDED.citation_max,
+                citation_min = EXCLUDED.citation_min,
+                papers_with_citations = EXCLUDED.papers_with_citations,
+                updated_at = EXCLUDED.updated_at;
+        """)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.autocommit = autocommit
+
+
+def fold(conn):
+    """Move committed deltas into the stats row; returns how many were folded.
+
+    Only concurrent folds wait on each other here; writers keep appending.
+    Run it periodically (the CLI folds before printing) to keep reads short.
+    """
+    cur = conn.cursor()
+    try:
+        cur.execute("""
+            WITH folded AS (
+                DELETE FROM graph_stats_delta RETURNING *
+            ), total AS (
+                SELECT COUNT(*) AS n,
+                       COALESCE(SUM(paper_count), 0) AS paper_count,
+                       COALESCE(SUM(edge_count), 0) AS edge_count,
+                       COALESCE(SUM(metadata_count), 0) AS metadata_count,
+                       stats_sum_counts(year_histogram) AS year_histogram,
+                       stats_sum_counts(relationship_histogram) AS relationship_histogram,
+                       COALESCE(SUM(citation_sum), 0) AS citation_sum,
+                       COALESCE(SUM(papers_with_citations), 0) AS papers_with_citations
+                FROM folded
+            ), updated AS (
+                UPDATE graph_stats s SET
+                    paper_count = s.paper_count + t.paper_count,
+                    edge_count = s.edge_count + t.edge_count,
+                    metadata_count = s.metadata_count + t.metadata_count,
+                    year_histogram = stats_merge_counts(s.year_histogram, t.year_histogram),
+                    relationship_histogram = stats_merge_counts(s.relationship_histogram, t.relationship_histogram),
+                    citation_sum = s.citation_sum + t.citation_sum,
+                    papers_with_citations = s.papers_with_citations + t.papers_with_citations,
+                    citation_max = (SELECT MAX(citation_count) FROM metadata),
+                    citation_min = (SELECT MIN(citation_count) FROM metadata),
+                    updated_at = CURRENT_TIMESTAMP
+                FROM total t
+                WHERE s.id = 1 AND t.n > 0
+                RETURNING t.n
+            )
+            SELECT n FROM updated;
+        """)
+        row = cur.fetchone()
+        if row is None:
+            # No stats row to fold into - keep the deltas for rebuild()
+            conn.rollback()
+            return 0
+        conn.commit()
+        return row[0]
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+def read(cur):
+    """The stats row plus pending deltas as a dict, or None if graph_stats isn't installed"""
+    cur.execute("SELECT to_regclass('graph_stats_delta') IS NOT NULL;")
+    if not cur.fetchone()[0]:
+        return None
+    cur.execute("""
+        SELECT s.paper_count + p.paper_count AS paper_count,
+               s.edge_count + p.edge_count AS edge_count,
+               s.metadata_count + p.metadata_count AS metadata_count,
+               stats_merge_counts(s.year_histogram, p.year_histogram) AS year_histogram,
+               stats_merge_counts(s.relationship_histogram, p.relationship_histogram) AS relationship_histogram,
+               s.citation_sum + p.citation_sum AS citation_sum,
+               (SELECT MAX(citation_count) FROM metadata) AS citation_max,
+               (SELECT MIN(citation_count) FROM metadata) AS citation_min,
+               s.papers_with_citations + p.papers_with_citations AS papers_with_citations,
+               GREATEST(s.updated_at, p.updated_at) AS updated_at
+        FROM graph_stats s, graph_stats_pending p
+        WHERE s.id = 1;
+    """)
+    row = cur.fetchone()
+    if row is None:
+        return None
+    return dict(zip([d[0] for d in cur.description], row))
+
+
+def average_year(year_histogram):
+    years = {int(y): c for y, c in year_histogram.items() if int(y) > 0}
+    total = sum(years.values())
+    return sum(y * c for y, c in years.items()) / total if total else None
+
+
+def print_stats(stats):
+    print(f"  Papers:         {stats['paper_count']}")
+    print(f"  Edges:          {stats['edge_count']}")
+    for kind, count in sorted(stats["relationship_histogram"].items(), key=lambda kv: -kv[1]):
+        print(f"    {kind:14} {count}")
+    years = sorted((int(y), c) for y, c in stats["year_histogram"].items() if int(y) > 0)
+    if years:
+        print(f"  Years:          {years[0][0]}–{years[-1][0]} (avg {average_year(stats['year_histogram']):.0f})")
+    n = stats["metadata_count"]
+    if n:
+        print(f"  Citations:      total {stats['citation_sum']}, avg {stats['citation_sum'] / n:.1f}, "
+              f"max {stats['citation_max']}, min {stats['citation_min']}")
+        print(f"  With citations: {stats['papers_with_citations']} ({stats['papers_with_citations'] / n * 100:.1f}%)")
+    print(f"  Updated:        {stats['updated_at']}")
+
+
+if __name__ == "__main__":
+    # python graph_stats.py            fold pending deltas and show the stats row
+    # python graph_stats.py --rebuild  install triggers and recompute
+    try:
+        conn = psycopg2.connect(**DB_CONFIG)
+        if "--rebuild" in sys.argv[1:]:
+            install(conn)
+            print("✓ graph_stats rebuilt")
+        cur = conn.cursor()
+        cur.execute("SELECT to_regclass('graph_stats_delta') IS NOT NULL;")
+        installed = cur.fetchone()[0]
+        conn.commit()
+        if installed:
+            folded = fold(conn)
+            if folded:
+                print(f"✓ Folded {folded:,} pending delta(s)")
+        stats = read(cur)
+        cur.close()
+        if stats is None:
+            print("⚠ graph_stats not installed - run: python graph_stats.py --rebuild")
+        else:
+            print("=" * 70)
+            print("GRAPH STATS")
+            print("=" * 70)
+            print_stats(stats)
+        conn.close()
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+        import traceback
+        traceback.print_exc()
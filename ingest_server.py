@@ -0,0 +1,330 @@
+import hashlib
+import json
+import os
+import queue
+import re
+import tempfile
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import psycopg2
+
+from dedup_papers import minhash
+from edge_resolver import EdgeTargetResolver
+from export_tables import DB_CONFIG
+from process_all_papers import BatchPaperProcessor, arxiv_id_from_filename
+
+HOST = os.getenv("INGEST_HOST", "127.0.0.1")
+PORT = int(os.getenv("INGEST_PORT", "8081"))
+
+# Worker threads, each with its own BatchPaperProcessor / DB connection
+WORKERS = int(os.getenv("INGEST_WORKERS", "2"))
+
+# Uploads waiting for a worker; beyond this the server answers 503
+MAX_PENDING = int(os.getenv("INGEST_MAX_PENDING", "100"))
+
+MAX_UPLOAD_BYTES = int(os.getenv("INGEST_MAX_UPLOAD", str(100 * 1024 * 1024)))
+
+# Finished jobs kept for polling before the oldest are forgotten
+MAX_JOBS = 10000
+
+SPOOL_MAX_BYTES = 16 * 1024 * 1024
+
+_SAFE_ID = re.compile(r"^[\w.\-:/]+$")
+
+
+class SharedDedup:
+    """One dedup index for all workers, so parallel uploads are compared too.
+
+    A paper that passes check() is reserved in the index under the same
+    lock, so a concurrent upload of the same PDF is caught as a duplicate;
+    finish() keeps the reservation if the paper was saved and rolls it
+    back otherwise.
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self.lock = threading.Lock()
+        self.reserved = {}  # arxiv_id -> signature the reservation replaced (None if new)
+        self.matches = {}   # arxiv_id -> report entry of its last check
+
+    @property
+    def report(self):
+        return self.index.report
+
+    def check(self, arxiv_id, text, source=None):
+        signature = minhash(text)  # outside the lock; only the lookup is shared
+        with self.lock:
+            verdict, signature, match = self.index.check_signature(arxiv_id, signature, source)
+            self.matches[arxiv_id] = match
+            if verdict != "duplicate" and signature is not None:
+                position = self.index.positions.get(arxiv_id)
+                self.reserved[arxiv_id] = None if position is None else self.index.signatures[position]
+                self.index.add(arxiv_id, signature)
+            return verdict, signature, match
+
+    def add(self, *args):
+        with self.lock:
+            self.index.add(*args)
+
+    def finish(self, arxiv_id, saved):
+        """End a job: keep or roll back its reservation; returns its dedup match"""
+        with self.lock:
+            match = self.matches.pop(arxiv_id, None)
+            reserved = arxiv_id in self.reserved
+            previous = self.reserved.pop(arxiv_id, None)
+            if reserved and not saved:
+                if previous is None:
+                    self.index.discard(arxiv_id)
+                else:
+                    self.index.add(arxiv_id, previous)
+            return match
+
+    def save(self):
+        with self.lock:
+            self.index.save()
+
+
+class SharedResolver:
+    """One edge target index for all workers, so a paper saved by one worker
+    resolves for the others. It keeps its own connection for reresolve()."""
+
+    def __init__(self, resolver):
+        self.resolver = resolver
+        self.lock = threading.Lock()
+
+    def resolve_many(self, targets):
+        with self.lock:
+            return self.resolver.resolve_many(targets)
+
+    def add_node(self, *args):
+        with self.lock:
+            self.resolver.add_node(*args)
+
+    def record_unresolved(self, cur, source_id, edges):
+        # Writes through the caller's cursor only; no index state involved
+        self.resolver.record_unresolved(cur, source_id, edges)
+
+    def reresolve(self):
+        with self.lock:
+            return self.resolver.reresolve()
+
+
+class JobStore:
+    def __init__(self):
+        self.jobs = OrderedDict()
+        self.lock = threading.Lock()
+
+    def create(self, arxiv_id, filename):
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "arxiv_id": arxiv_id,
+            "filename": filename,
+            "status": "queued",
+            "submitted_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        with self.lock:
+            self.jobs[job["job_id"]] = job
+            while len(self.jobs) > MAX_JOBS:
+                self.jobs.popitem(last=False)
+        return job
+
+    def update(self, job_id, **fields):
+        with self.lock:
+            if job_id in self.jobs:
+                self.jobs[job_id].update(fields)
+
+    def get(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return dict(job) if job else None
+
+
+class IngestService:
+    """Queue of uploaded PDFs served by a pool of processor threads"""
+
+    def __init__(self, workers=WORKERS):
+        self.jobs = JobStore()
+        self.pending = queue.Queue(maxsize=MAX_PENDING)
+        self.processors = [BatchPaperProcessor() for _ in range(workers)]
+        shared = SharedDedup(self.processors[0].dedup)
+        self.resolver_conn = psycopg2.connect(**DB_CONFIG)
+        resolver = SharedResolver(EdgeTargetResolver(self.resolver_conn))
+        for processor in self.processors:
+            processor.dedup = shared
+            processor.resolver = resolver
+        self.threads = [
+            threading.Thread(target=self.work, args=(processor,), daemon=True)
+            for processor in self.processors
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, arxiv_id, filename, pdf_file):
+        """Returns the job, or None if the queue is full"""
+        job = self.jobs.create(arxiv_id, filename)
+        try:
+            self.pending.put_nowait((job["job_id"], arxiv_id, filename, pdf_file))
+        except queue.Full:
+            pdf_file.close()
+            self.jobs.update(job["job_id"], status="rejected", error="queue full")
+            return None
+        return job
+
+    def work(self, processor):
+        while True:
+            job_id, arxiv_id, filename, pdf_file = self.pending.get()
+            self.jobs.update(job_id, status="running")
+            before = (processor.processed, processor.skipped, processor.duplicates)
+            saved = False
+            try:
+                ok = processor.process_paper(arxiv_id, pdf_file, job_id[:8], source_name=filename)
+                saved = ok and processor.processed > before[0]
+                match = processor.dedup.finish(arxiv_id, saved)
+                if not ok:
+                    self.jobs.update(job_id, status="failed", error="extraction failed - see server log")
+                elif saved:
+                    self.jobs.update(job_id, status="done", result=self.result(processor, arxiv_id))
+                elif processor.duplicates > before[2]:
+                    self.jobs.update(job_id, status="skipped", reason="near-duplicate",
+                                     duplicate_of=match["matches"], similarity=match["similarity"])
+                else:
+                    self.jobs.update(job_id, status="skipped", reason="already in database",
+                                     result=self.result(processor, arxiv_id))
+                processor.dedup.save()
+                if saved:
+                    # Parked edges may point at the paper that just landed
+                    processor.resolver.reresolve()
+            except Exception as e:
+                processor.dedup.finish(arxiv_id, saved)
+                self.jobs.update(job_id, status="failed", error=str(e))
+            finally:
+                pdf_file.close()
+                self.jobs.update(job_id, finished_at=datetime.now().isoformat(timespec="seconds"))
+                self.pending.task_done()
+
+    def result(self, processor, arxiv_id):
+        """Stored node summary for a finished job"""
+        cur = processor.conn.cursor()
+        cur.execute("""
+            SELECT n.title, n.year, n.authors,
+                   (SELECT COUNT(*) FROM edges e WHERE e.source_id = n.arxiv_id AND NOT e.archived)
+            FROM nodes n WHERE n.arxiv_id = %s;
+        """, (arxiv_id,))
+        row = cur.fetchone()
+        cur.close()
+        processor.conn.commit()
+        if not row:
+            return None
+        return {"arxiv_id": arxiv_id, "title": row[0], "year": row[1], "authors": row[2], "edges": row[3]}
+
+
+class IngestHandler(BaseHTTPRequestHandler):
+    service = None
+
+    def send_json(self, status, body):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == "/health":
+            self.send_json(200, {
+                "status": "ok",
+                "workers": len(self.service.threads),
+                "queued": self.service.pending.qsize(),
+            })
+        elif path.startswith("/jobs/"):
+            job = self.service.jobs.get(path[len("/jobs/"):])
+            if job:
+                self.send_json(200, job)
+            else:
+                self.send_json(404, {"error": "unknown job"})
+        else:
+            self.send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        """POST /papers?arxiv_id=...&filename=... with the raw PDF as the body"""
+        url = urlparse(self.path)
+        if url.path != "/papers":
+            self.send_json(404, {"error": "not found"})
+            return
+
+        length = int(self.headers.get("Content-Length") or 0)
+        if length <= 0:
+            self.send_json(411, {"error": "Content-Length with the PDF bytes is required"})
+            return
+        if length > MAX_UPLOAD_BYTES:
+            self.send_json(413, {"error": f"upload larger than {MAX_UPLOAD_BYTES} bytes"})
+            return
+
+        # Stream the body into a spooled buffer; small PDFs never touch disk
+        pdf_file = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+        digest = hashlib.sha256()
+        remaining = length
+        while remaining:
+            chunk = self.rfile.read(min(remaining, 1 << 20))
+            if not chunk:
+                break
+            digest.update(chunk)
+            pdf_file.write(chunk)
+            remaining -= len(chunk)
+        pdf_file.seek(0)
+        if remaining or pdf_file.read(5) != b"%PDF-":
+            pdf_file.close()
+            self.send_json(400, {"error": "body is not a complete PDF"})
+            return
+
+        params = parse_qs(url.query)
+        filename = os.path.basename(params.get("filename", [""])[0]) or f"{digest.hexdigest()[:12]}.pdf"
+        arxiv_id = params.get("arxiv_id", [""])[0]
+        if not arxiv_id:
+            arxiv_id = (arxiv_id_from_filename(filename) if "filename" in params
+                        else f"upload_{digest.hexdigest()[:12]}")
+        if not _SAFE_ID.match(arxiv_id):
+            pdf_file.close()
+            self.send_json(400, {"error": "invalid arxiv_id"})
+            return
+
+        job = self.service.submit(arxiv_id, filename, pdf_file)
+        if job is None:
+            self.send_json(503, {"error": "ingest queue is full, retry later"})
+        else:
+            self.send_json(202, {"job_id": job["job_id"], "arxiv_id": arxiv_id, "status": job["status"]})
+
+    def log_message(self, format, *args):
+        print(f"  [http] {self.address_string()} {format % args}")
+
+
+if __name__ == "__main__":
+    print("=" * 70)
+    print("PAPER INGESTION SERVICE")
+    print("=" * 70)
+
+    try:
+        IngestHandler.service = IngestService()
+        server = ThreadingHTTPServer((HOST, PORT), IngestHandler)
+        print(f"✓ Listening on http://{HOST}:{PORT} with {WORKERS} worker(s)\n")
+        print("Usage:")
+        print(f"  curl --data-binary @paper.pdf 'http://{HOST}:{PORT}/papers?filename=paper.pdf'")
+        print(f"  curl http://{HOST}:{PORT}/jobs/<job_id>\n")
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n⏹ Stopped")
+    except Exception as e:
+        print(f"\n❌ Fatal Error: {e}")
+        import traceback
+        traceback.print_exc()
+    finally:
+        if IngestHandler.service:
+            for processor in IngestHandler.service.processors:
+                processor.close()
+            IngestHandler.service.resolver_conn.close()
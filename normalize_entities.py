@@ -0,0 +1,237 @@
+import psycopg2
+from psycopg2 import extras
+import re
+import sys
+import unicodedata
+
+from export_tables import DB_CONFIG, stream_query
+
+# nodes column -> entity kind
+ENTITY_COLUMNS = {
+    "methods": "method",
+    "datasets": "dataset",
+    "metrics": "metric",
+}
+
+# Built-in spellings that mean the same thing (normalized key -> canonical key).
+# Extra aliases can be added to the entity_aliases table without a code change.
+DEFAULT_ALIASES = {
+    "dataset": {
+        "imagenet 1k": "imagenet",
+        "imagenet1k": "imagenet",
+        "ilsvrc": "imagenet",
+        "ilsvrc 2012": "imagenet",
+        "ms coco": "coco",
+        "mscoco": "coco",
+        "microsoft coco": "coco",
+        "cifar10": "cifar 10",
+        "cifar100": "cifar 100",
+    },
+    "method": {
+        "transformers": "transformer",
+        "cnn": "convolutional neural network",
+        "cnns": "convolutional neural network",
+        "rnn": "recurrent neural network",
+        "lstm": "long short term memory",
+        "vit": "vision transformer",
+    },
+    "metric": {
+        "acc": "accuracy",
+        "top 1 accuracy": "top1 accuracy",
+        "f1": "f1 score",
+        "f1 measure": "f1 score",
+        "mean average precision": "map",
+    },
+}
+
+_PUNCTUATION = re.compile(r"[^\w+#]+")
+
+
+def canonical_key(name):
+    """Case/punctuation-insensitive key for an entity name.
+
+    "ImageNet-1K", "imagenet 1k" and "ImageNet (1k)" all map to "imagenet 1k".
+    """
+    name = unicodedata.normalize("NFKC", name).lower()
+    name = _PUNCTUATION.sub(" ", name).replace("_", " ")
+    return " ".join(name.split())
+
+
+class EntityNormalizer:
+    """Interns method/dataset/metric names into the entities tables"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.ids = {}  # (kind, key) -> entity id, committed rows only
+        self.pending = {}  # ids created in the caller's open transaction
+        self.aliases = {kind: dict(aliases) for kind, aliases in DEFAULT_ALIASES.items()}
+        self.load()
+
+    def load(self):
+        """Warm the alias table and entity id cache"""
+        cur = self.conn.cursor()
+        cur.execute("SELECT kind, alias_key, canonical_key FROM entity_aliases;")
+        for kind, alias_key, key in cur.fetchall():
+            self.aliases.setdefault(kind, {})[alias_key] = key
+        cur.execute("SELECT kind, canonical_key, id FROM entities;")
+        for kind, key, entity_id in cur.fetchall():
+            self.ids[(kind, key)] = entity_id
+        cur.close()
+
+    def resolve(self, kind, name):
+        """Normalized key for a raw name, after alias lookup"""
+        key = canonical_key(name)
+        return self.aliases.get(kind, {}).get(key, key)
+
+    def intern(self, cur, kind, names):
+        """Return entity ids for names, creating missing entities.
+
+        Ids created here only reach the cache once the caller reports the
+        commit (committed()); until then they are looked up again, so a
+        rolled-back insert never leaves a dangling id behind.
+        """
+        keys = {}
+        for name in names:
+            if name and name.strip():
+                keys.setdefault(self.resolve(kind, name), name.strip())
+        missing = [(kind, key, name) for key, name in keys.items() if (kind, key) not in self.ids]
+        if missing:
+            # ON CONFLICT keeps concurrent writers from creating duplicates;
+            # the follow-up SELECT picks up ids created by someone else
+            extras.execute_values(cur, """
+                INSERT INTO entities (kind, canonical_key, name) VALUES %s
+                ON CONFLICT (kind, canonical_key) DO NOTHING;
+            """, missing)
+            cur.execute("""
+                SELECT canonical_key, id FROM entities
+                WHERE kind = %s AND canonical_key = ANY(%s);
+            """, (kind, [key for _, key, _ in missing]))
+            for key, entity_id in cur.fetchall():
+                self.pending[(kind, key)] = entity_id
+        return [self.ids.get((kind, key)) or self.pending[(kind, key)] for key in keys]
+
+    def committed(self):
+        """The caller's transaction committed: cache the ids it created"""
+        self.ids.update(self.pending)
+        self.pending.clear()
+
+    def rolled_back(self):
+        self.pending.clear()
+
+    def link_paper(self, cur, arxiv_id, node):
+        """Link a paper to its entities inside the caller's transaction"""
+        links = []
+        for column, kind in ENTITY_COLUMNS.items():
+            for entity_id in self.intern(cur, kind, node.get(column) or []):
+                links.append((arxiv_id, entity_id))
+        if links:
+            extras.execute_values(cur, """
+                INSERT INTO paper_entities (arxiv_id, entity_id) VALUES %s
+                ON CONFLICT DO NOTHING;
+            """, links)
+        return len(links)
+
+    def unlink_paper(self, cur, arxiv_id):
+        cur.execute("DELETE FROM paper_entities WHERE arxiv_id = %s;", (arxiv_id,))
+
+    def backfill(self):
+        """Relink every existing node (safe to re-run after alias changes)"""
+        print("=" * 70)
+        print("ENTITY NORMALIZATION BACKFILL")
+        print("=" * 70)
+
+        papers = 0
+        links = 0
+        cur = self.conn.cursor()
+        for rows in stream_query(self.conn, """
+            SELECT arxiv_id, methods, datasets, metrics FROM nodes ORDER BY arxiv_id;
+        """, name="entity_backfill"):
+            for arxiv_id, methods, datasets, metrics in rows:
+                self.unlink_paper(cur, arxiv_id)
+                links += self.link_paper(cur, arxiv_id, {
+                    "methods": methods, "datasets": datasets, "metrics": metrics,
+                })
+                papers += 1
+        self.conn.commit()
+        self.committed()
+        cur.close()
+
+        print(f"\n✓ Papers linked:   {papers:,}")
+        print(f"✓ Links written:   {links:,}")
+        print(f"✓ Known entities:  {len(self.ids):,}")
+
+    def add_alias(self, kind, alias, canonical):
+        """Persist an alias; existing links are fixed by re-running backfill"""
+        alias_key, key = canonical_key(alias), self.resolve(kind, canonical)
+        cur = self.conn.cursor()
+        cur.execute("""
+            INSERT INTO entity_aliases (kind, alias_key, canonical_key) VALUES (%s, %s, %s)
+            ON CONFLICT (kind, alias_key) DO UPDATE SET canonical_key = EXCLUDED.canonical_key;
+        """, (kind, alias_key, key))
+        self.conn.commit()
+        cur.close()
+        self.aliases.setdefault(kind, {})[alias_key] = key
+
+    def papers_using(self, kind, name, limit=50):
+        """Papers linked to an entity - an index seek on paper_entities"""
+        cur = self.conn.cursor()
+        cur.execute("""
+            SELECT n.arxiv_id, n.title, n.year
+            FROM entities e
+            JOIN paper_entities pe ON pe.entity_id = e.id
+            JOIN nodes n ON n.arxiv_id = pe.arxiv_id
+            WHERE e.kind = %s AND e.canonical_key = %s
+            ORDER BY n.year DESC NULLS LAST
+            LIMIT %s;
+        """, (kind, self.resolve(kind, name), limit))
+        rows = cur.fetchall()
+        cur.close()
+        return rows
+
+    def cooccurring(self, kind, name, other_kind, limit=20):
+        """Entities of other_kind most often used together with an entity"""
+        cur = self.conn.cursor()
+        cur.execute("""
+            SELECT o.name, COUNT(*) AS papers
+            FROM entities e
+            JOIN paper_entities pe ON pe.entity_id = e.id
+            JOIN paper_entities po ON po.arxiv_id = pe.arxiv_id
+            JOIN entities o ON o.id = po.entity_id
+            WHERE e.kind = %s AND e.canonical_key = %s
+              AND o.kind = %s AND o.id <> e.id
+            GROUP BY o.name
+            ORDER BY papers DESC
+            LIMIT %s;
+        """, (kind, self.resolve(kind, name), other_kind, limit))
+        rows = cur.fetchall()
+        cur.close()
+        return rows
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+
+    try:
+        conn = psycopg2.connect(**DB_CONFIG)
+        normalizer = EntityNormalizer(conn)
+
+        if args[:1] == ["papers"]:
+            # python normalize_entities.py papers dataset ImageNet
+            for arxiv_id, title, year in normalizer.papers_using(args[1], args[2]):
+                print(f"  {arxiv_id} ({year}): {(title or '')[:60]}")
+        elif args[:1] == ["cooccur"]:
+            # python normalize_entities.py cooccur dataset ImageNet method
+            for name, papers in normalizer.cooccurring(args[1], args[2], args[3]):
+                print(f"  {papers:5d}  {name}")
+        elif args[:1] == ["alias"]:
+            # python normalize_entities.py alias dataset "IN-1k" ImageNet
+            normalizer.add_alias(args[1], args[2], args[3])
+            print(f"✓ Alias saved - re-run the backfill to relink existing papers")
+        else:
+            normalizer.backfill()
+
+        conn.close()
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,173 @@
+import os
+import sys
+import time
+import tracemalloc
+
+# Backends tried in order; the first one whose text yield looks complete wins
+DEFAULT_CHAIN = ("pymupdf", "pypdf", "pdfminer")
+EXTRACTOR_CHAIN = tuple(
+    name.strip() for name in os.getenv("PDF_EXTRACTORS", ",".join(DEFAULT_CHAIN)).split(",") if name.strip()
+)
+
+# Below this many characters per page a result is treated as a bad extraction
+MIN_CHARS_PER_PAGE = int(os.getenv("PDF_MIN_CHARS_PER_PAGE", "200"))
+
+
+def _rewind(source):
+    """Backends may share a file object; start each one from byte 0"""
+    if hasattr(source, "seek"):
+        source.seek(0)
+    return source
+
+
+class PypdfExtractor:
+    name = "pypdf"
+    module = "pypdf"
+
+    def extract(self, source, max_pages=None):
+        from pypdf import PdfReader
+
+        reader = PdfReader(_rewind(source))
+        pages = reader.pages[:max_pages]
+        return "".join([p.extract_text() or "" for p in pages]), len(pages)
+
+
+class PdfminerExtractor:
+    name = "pdfminer"
+    module = "pdfminer.high_level"
+
+    def extract(self, source, max_pages=None):
+        from pdfminer.high_level import extract_text
+
+        text = extract_text(_rewind(source), maxpages=max_pages or 0)
+        # pdfminer separates pages with form feeds
+        return text.replace("\x0c", ""), max(text.count("\x0c"), 1)
+
+
+class PyMuPDFExtractor:
+    name = "pymupdf"
+    module = "fitz"
+
+    def extract(self, source, max_pages=None):
+        import fitz
+
+        if hasattr(source, "read"):
+            document = fitz.open(stream=_rewind(source).read(), filetype="pdf")
+        else:
+            document = fitz.open(source)
+        with document:
+            pages = min(document.page_count, max_pages or document.page_count)
+            return "".join(document[i].get_text() for i in range(pages)), pages
+
+
+BACKENDS = {cls.name: cls for cls in (PypdfExtractor, PdfminerExtractor, PyMuPDFExtractor)}
+
+
+def is_available(name):
+    try:
+        __import__(BACKENDS[name].module)
+        return True
+    except ImportError:
+        return False
+
+
+def available_backends(chain=EXTRACTOR_CHAIN):
+    return [BACKENDS[name]() for name in chain if name in BACKENDS and is_available(name)]
+
+
+def extract_pdf_text(source, chain=EXTRACTOR_CHAIN, min_chars_per_page=MIN_CHARS_PER_PAGE, max_pages=None):
+    """Extract text with a per-file fallback chain.
+
+    Returns (text, backend_name). A backend that raises or yields fewer
+    than min_chars_per_page characters per page hands over to the next
+    one; if none looks complete, the longest text seen is returned.
+    max_pages limits every backend to the first pages (e.g. preflight).
+    """
+    backends = available_backends(chain)
+    if not backends:
+        raise RuntimeError(f"No PDF extractor installed (tried: {', '.join(chain)})")
+
+    best_text, best_name, errors = "", None, []
+    for backend in backends:
+        try:
+            text, pages = backend.extract(source, max_pages)
+        except Exception as e:
+            errors.append(f"{backend.name}: {e}")
+            continue
+        if len(text.strip()) >= min_chars_per_page * max(pages, 1):
+            return text, backend.name
+        if len(text) > len(best_text) or best_name is None:
+            best_text, best_name = text, backend.name
+
+    if best_name is None:
+        raise RuntimeError("All PDF extractors failed - " + "; ".join(errors))
+    return best_text, best_name
+
+
+def benchmark(papers_dir, names=tuple(BACKENDS), limit=None):
+    """Compare backends on a directory of PDFs: speed, memory and text yield"""
+    files = sorted(f for f in os.listdir(papers_dir) if f.endswith('.pdf'))[:limit]
+
+    print("=" * 70)
+    print("PDF EXTRACTOR BENCHMARK")
+    print("=" * 70)
+    print(f"Directory: {papers_dir} ({len(files)} file(s))\n")
+
+    results = []
+    for name in names:
+        if not is_available(name):
+            print(f"  ⊘ {name}: not installed")
+            continue
+        backend = BACKENDS[name]()
+        pages = chars = empty = failed = 0
+        peak = 0
+        elapsed = 0.0
+        for filename in files:
+            path = os.path.join(papers_dir, filename)
+            # tracemalloc only sees Python-level allocations; PyMuPDF's C
+            # heap is not included in its peak
+            tracemalloc.start()
+            start = time.perf_counter()
+            try:
+                text, n = backend.extract(path)
+            except Exception:
+                failed += 1
+                continue
+            finally:
+                elapsed += time.perf_counter() - start
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+            pages += n
+            chars += len(text)
+            if len(text.strip()) < MIN_CHARS_PER_PAGE * max(n, 1):
+                empty += 1
+        results.append({
+            "backend": name,
+            "pages_per_sec": pages / elapsed if elapsed else 0.0,
+            "peak_mb": peak / 1e6,
+            "chars_per_page": chars / pages if pages else 0.0,
+            "low_yield": empty,
+            "failed": failed,
+        })
+
+    print(f"\n  {'backend':10} {'pages/s':>9} {'peak MB':>9} {'chars/page':>11} {'low-yield':>10} {'failed':>7}")
+    print("  " + "-" * 60)
+    for r in sorted(results, key=lambda r: -r["pages_per_sec"]):
+        print(f"  {r['backend']:10} {r['pages_per_sec']:9.1f} {r['peak_mb']:9.1f} "
+              f"{r['chars_per_page']:11.0f} {r['low_yield']:10d} {r['failed']:7d}")
+    return results
+
+
+if __name__ == "__main__":
+    # python pdf_extractors.py benchmark [papers_dir] [--limit=N]
+    # python pdf_extractors.py path/to/paper.pdf
+    args = sys.argv[1:]
+    if args[:1] == ["benchmark"]:
+        papers_directory = next((a for a in args[1:] if not a.startswith("--")), r"Alaris/papers")
+        limit = next((int(a.split("=", 1)[1]) for a in args if a.startswith("--limit=")), None)
+        benchmark(papers_directory, limit=limit)
+    elif args:
+        text, backend = extract_pdf_text(args[0])
+        print(f"✓ {len(text):,} characters via {backend}")
+    else:
+        print("Available extractors:", ", ".join(b.name for b in available_backends(tuple(BACKENDS))) or "none")
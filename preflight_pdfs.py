@@ -0,0 +1,158 @@
+import json
+import os
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from pdf_extractors import extract_pdf_text
+
+# The checks are heuristics, so by default hopeless files are only reported.
+# Set PREFLIGHT_QUARANTINE_DIR to move them there instead, so later runs
+# don't look at them again.
+QUARANTINE_DIR = os.getenv("PREFLIGHT_QUARANTINE_DIR") or None
+PREFLIGHT_REPORT = os.path.join("preflight", "preflight_report.json")
+
+# Characters of text the first page must yield to be worth an LLM call
+MIN_FIRST_PAGE_CHARS = int(os.getenv("PREFLIGHT_MIN_CHARS", "100"))
+
+MAX_WORKERS = int(os.getenv("PREFLIGHT_WORKERS", str(os.cpu_count() or 4)))
+
+PROCESS = "process"
+SKIP = "skip"
+QUARANTINE = "quarantine"
+
+
+def classify(path):
+    """Cheap checks on one PDF: header, trailer, encryption, pages, first-page text.
+
+    Returns a dict with the route (process / skip / quarantine) and a reason.
+    Runs in a worker process, so it must not touch the database.
+    """
+    from pypdf import PdfReader
+
+    result = {"path": path, "route": PROCESS, "reason": "", "pages": 0, "first_page_chars": 0}
+
+    size = os.path.getsize(path)
+    if size == 0:
+        return {**result, "route": QUARANTINE, "reason": "empty file"}
+
+    with open(path, "rb") as f:
+        head = f.read(1024)
+        f.seek(max(size - 2048, 0))
+        tail = f.read()
+    if b"%PDF-" not in head:
+        return {**result, "route": QUARANTINE, "reason": "not a PDF (missing %PDF- header)"}
+    if b"%%EOF" not in tail:
+        return {**result, "route": QUARANTINE, "reason": "truncated (missing %%EOF trailer)"}
+
+    # A pypdf constructor failure isn't final: another backend in the
+    # extraction chain may still open the file, so only the text check
+    # below decides whether it is quarantined
+    reader, corrupt = None, None
+    try:
+        reader = PdfReader(path)
+        if reader.is_encrypted and not reader.decrypt(""):
+            return {**result, "route": SKIP, "reason": "encrypted (password required)"}
+        pages = len(reader.pages)
+    except Exception as e:
+        reader, corrupt = None, f"{e.__class__.__name__}: {e}"
+
+    if reader is not None:
+        result["pages"] = pages
+        if pages == 0:
+            return {**result, "route": QUARANTINE, "reason": "no pages"}
+
+    try:
+        # Same backend chain as the real extraction, so a file pypdf can't
+        # read but PyMuPDF can is not rejected
+        text, backend = extract_pdf_text(path, min_chars_per_page=MIN_FIRST_PAGE_CHARS, max_pages=1)
+        chars = len(text.strip())
+    except Exception as e:
+        reason = f"corrupt ({corrupt})" if corrupt else f"unreadable first page ({e.__class__.__name__})"
+        return {**result, "route": QUARANTINE, "reason": reason}
+    if corrupt:
+        result["reason"] = f"pypdf failed ({corrupt}), read with {backend}"
+
+    result["first_page_chars"] = chars
+    if chars < MIN_FIRST_PAGE_CHARS:
+        try:
+            has_images = reader is not None and len(reader.pages[0].images) > 0
+        except Exception:
+            has_images = False
+        reason = "image-only (needs OCR)" if has_images else "no extractable text"
+        return {**result, "route": SKIP, "reason": reason}
+
+    return result
+
+
+def _safe_classify(path):
+    try:
+        return classify(path)
+    except Exception as e:
+        return {"path": path, "route": QUARANTINE, "reason": f"preflight crashed ({e})",
+                "pages": 0, "first_page_chars": 0}
+
+
+def unique_target(directory, filename):
+    """Path in directory that doesn't overwrite an earlier file of the same name"""
+    stem, ext = os.path.splitext(filename)
+    target, n = os.path.join(directory, filename), 1
+    while os.path.exists(target):
+        target = os.path.join(directory, f"{stem}.{n}{ext}")
+        n += 1
+    return target
+
+
+def preflight(paths, max_workers=MAX_WORKERS, quarantine_dir=QUARANTINE_DIR, report_path=PREFLIGHT_REPORT):
+    """Classify PDFs in parallel; returns {route: [result, ...]}.
+
+    Quarantined files are moved to quarantine_dir when one is given,
+    otherwise only listed in the report.
+    """
+    routes = {PROCESS: [], SKIP: [], QUARANTINE: []}
+    if not paths:
+        return routes
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        for result in pool.map(_safe_classify, paths, chunksize=8):
+            routes[result["route"]].append(result)
+
+    if routes[QUARANTINE] and quarantine_dir:
+        os.makedirs(quarantine_dir, exist_ok=True)
+        for result in routes[QUARANTINE]:
+            target = unique_target(quarantine_dir, os.path.basename(result["path"]))
+            shutil.move(result["path"], target)
+            result["moved_to"] = target
+
+    if report_path:
+        os.makedirs(os.path.dirname(report_path) or ".", exist_ok=True)
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(routes, f, indent=2)
+
+    return routes
+
+
+def print_routes(routes):
+    print(f"  ✓ Process:     {len(routes[PROCESS])}")
+    print(f"  ⊘ Skip:        {len(routes[SKIP])}")
+    for r in routes[SKIP]:
+        print(f"      {os.path.basename(r['path'])}: {r['reason']}")
+    print(f"  ☢ Quarantine:  {len(routes[QUARANTINE])}")
+    for r in routes[QUARANTINE]:
+        print(f"      {os.path.basename(r['path'])}: {r['reason']}")
+
+
+if __name__ == "__main__":
+    # Report only, nothing is moved (even with PREFLIGHT_QUARANTINE_DIR set):
+    # python preflight_pdfs.py [papers_dir]
+    papers_directory = sys.argv[1] if len(sys.argv) > 1 else r"Alaris/papers"
+    files = sorted(
+        os.path.join(papers_directory, f) for f in os.listdir(papers_directory) if f.endswith('.pdf')
+    )
+
+    print("=" * 70)
+    print("PDF PREFLIGHT")
+    print("=" * 70)
+    print(f"Directory: {papers_directory} ({len(files)} file(s))\n")
+    print_routes(preflight(files, quarantine_dir=None))
+    print(f"\n✓ Report: {PREFLIGHT_REPORT}")
@@ -1,13 +1,33 @@
-from groq import Groq
 import psycopg2
-from pypdf import PdfReader
-import json
 import os
+import sys
 import time
+from functools import partial
+
+from archive_sources import is_archive, iter_archive_pdfs
+from build_viewer_snapshot import ViewerSnapshotBuilder
+from chunked_extraction import extract_chunked, split_chunks
+from cooccurrence import CooccurrenceIndex
+from dedup_papers import DedupIndex, DUPLICATE_THRESHOLD
+from edge_partitions import insert_edges
+from edge_resolver import EdgeTargetResolver
+from extraction import (
+    BATCH_PAPER_CHARS, BATCH_CHAR_BUDGET, TEXT_LIMIT, batch_max_tokens, build_batch_prompt,
+    build_prompt, call_groq_with_stats, failure_stats, parse_batch_response, parse_response, versions,
+)
+from normalize_entities import EntityNormalizer
+from pdf_extractors import extract_pdf_text
+from preflight_pdfs import PROCESS, preflight, print_routes
+from profiling import StageProfiler, profile_stage
+from records import ExtractionRecord, decode_extraction
+from usage_tracking import UsageTracker
 
 # Configuration
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 
+# Minimum seconds between LLM requests in batched mode (rate limits)
+REQUEST_INTERVAL = 3
+
 # Database Configuration - Supabase
 DB_CONFIG = {
     "dbname": os.getenv("DB_NAME", "postgres"),
@@ -17,21 +37,33 @@ DB_CONFIG = {
     "port": "5432"
 }
 
-# Initialize Groq client
-groq_client = Groq(api_key=GROQ_API_KEY)
+def arxiv_id_from_filename(filename):
+    """Derive the database id from a PDF filename ('📄 Paper 4.pdf' -> 'paper_4')"""
+    return f"paper_{filename.replace('📄 Paper ', '').replace('.pdf', '')}"
 
 class BatchPaperProcessor:
-    def __init__(self):
-        self.groq_client = groq_client
+    def __init__(self, dedup_threshold=DUPLICATE_THRESHOLD, profiler=None, batch_size=1):
+        from groq import Groq  # deferred so importing this module stays cheap
+        self.groq_client = Groq(api_key=GROQ_API_KEY)
         self.conn = psycopg2.connect(**DB_CONFIG)
+        self.entities = EntityNormalizer(self.conn)
+        self.resolver = EdgeTargetResolver(self.conn)
+        self.usage = UsageTracker(self.conn)
+        self.dedup = DedupIndex(threshold=dedup_threshold)
         self.processed = 0
         self.failed = 0
         self.skipped = 0
+        self.duplicates = 0
+        self.rejected = 0
+        self.profiler = profiler  # StageProfiler when run with --profile
+        self.batch_size = batch_size  # >1 packs short papers into one request
+        self.pending = []
+        self.last_request = float("-inf")
 
     def extract_text(self, pdf_path):
-        """Extract text from PDF"""
-        reader = PdfReader(pdf_path)
-        return "".join([p.extract_text() for p in reader.pages])
+        """Extract text from PDF (backend fallback chain, see pdf_extractors.py)"""
+        text, backend = extract_pdf_text(pdf_path)
+        return text
 
     def check_if_exists(self, arxiv_id):
         """Check if paper already exists in database"""
@@ -44,84 +76,45 @@ class BatchPaperProcessor:
         cur.close()
         return exists
 
-    def process_paper(self, arxiv_id, pdf_path, paper_num):
-        """Process a single paper"""
-        print(f"\n[{paper_num}] Processing: {os.path.basename(pdf_path)}")
+    def existing_ids(self, arxiv_ids):
+        """The subset of arxiv_ids already in the database, in one query"""
+        cur = self.conn.cursor()
+        cur.execute("SELECT arxiv_id FROM nodes WHERE arxiv_id = ANY(%s);", (list(arxiv_ids),))
+        existing = {row[0] for row in cur.fetchall()}
+        cur.close()
+        return existing
+
+    def delete_paper_rows(self, cur, arxiv_id):
+        """Remove a paper and everything derived from it, inside the caller's transaction.
+
+        Archived edges are history and are kept.
+        """
+        cur.execute("DELETE FROM edges WHERE source_id = %s AND NOT archived;", (arxiv_id,))
+        cur.execute("DELETE FROM unresolved_edges WHERE source_id = %s;", (arxiv_id,))
+        self.entities.unlink_paper(cur, arxiv_id)
+        cur.execute("DELETE FROM metadata WHERE arxiv_id = %s;", (arxiv_id,))
+        cur.execute("DELETE FROM nodes WHERE arxiv_id = %s;", (arxiv_id,))
+
+    def process_paper(self, arxiv_id, pdf_path, paper_num, source_name=None, replace=False):
+        """Process a single paper (pdf_path may also be a binary file object).
+
+        replace=True re-extracts a paper that is already stored; the old rows
+        are only removed in the transaction that saves the new ones.
+        """
+        source_name = source_name or os.path.basename(pdf_path)
+        print(f"\n[{paper_num}] Processing: {source_name}")
         
         # Check if already processed
-        if self.check_if_exists(arxiv_id):
+        if not replace and self.check_if_exists(arxiv_id):
             print(f"  ⊘ Already in database - skipping")
             self.skipped += 1
             return True
         
         try:
-            # Extract text
-            print(f"  → Extracting text...")
-            raw_text = self.extract_text(pdf_path)
-            print(f"  ✓ Extracted {len(raw_text):,} characters")
-            
-            # Send to Groq AI
-            print(f"  → Sending to Groq AI...")
-            prompt = f"""
-Extract information from this research paper and return ONLY valid JSON (no markdown):
-
-{{
-  "node": {{
-    "arxiv_id": "{arxiv_id}",
-    "title": "paper title",
-    "authors": "author names",
-    "year": 2024,
-    "summary": "brief summary (1-2 sentences)",
-    "methods": ["method1", "method2"],
-    "datasets": ["dataset1"],
-    "metrics": ["metric1"],
-    "project_page": "",
-    "pdf_link": ""
-  }},
-  "edges": [
-    {{"target_arxiv_id": "related_paper_id", "relationship_type": "CITES", "reasoning": "why"}},
-    {{"target_arxiv_id": "another_paper_id", "relationship_type": "BUILDS_ON", "reasoning": "explanation"}}
-  ],
-  "metadata": {{"citation_count": 0}}
-}}
-
-Paper text (first 15000 chars):
-{raw_text[:15000]}
-"""
-            
-            max_retries = 3
-            for attempt in range(max_retries):
-                try:
-                    response = self.groq_client.chat.completions.create(
-                        messages=[{"role": "user", "content": prompt}],
-                        model="llama-3.3-70b-versatile",
-                        temperature=0.1,
-                        max_tokens=2048
-                    )
-                    break  # Success - exit retry loop
-                except Exception as api_error:
-                    if "rate_limit" in str(api_error).lower() and attempt < max_retries - 1:
-                        wait_time = (attempt + 1) * 10  # 10, 20, 30 seconds
-                        print(f"  ⚠ Rate limit hit - waiting {wait_time}s...")
-                        time.sleep(wait_time)
-                    else:
-                        raise  # Re-raise if not rate limit or last attempt
-            
-            # Parse response
-            json_data = response.choices[0].message.content.strip()
-            if json_data.startswith('```'):
-                json_data = json_data.split('```')[1]
-                if json_data.startswith('json'):
-                    json_data = json_data[4:]
-            json_data = json_data.strip()
-            
-            data = json.loads(json_data)
-            print(f"  ✓ AI response received")
-            
-            # Save to database
-            self.save_to_db(data, arxiv_id)  # Force the arxiv_id we want
-            print(f"  ✓ Saved to database")
-            
+            prepared = self.prepare_paper(arxiv_id, pdf_path, source_name)
+            if prepared is None:
+                return True
+            self.extract_and_save(arxiv_id, *prepared, replace=replace)
             self.processed += 1
             return True
             
@@ -130,35 +123,190 @@ Paper text (first 15000 chars):
             self.failed += 1
             return False
 
-    def save_to_db(self, data, arxiv_id):
-        """Save paper to database"""
+    def prepare_paper(self, arxiv_id, pdf_path, source_name):
+        """Extract text and run the dedup check; None if the paper is a duplicate"""
+        # Extract text
+        print(f"  → Extracting text...")
+        with profile_stage(self.profiler, "extract"):
+            raw_text = self.extract_text(pdf_path)
+        print(f"  ✓ Extracted {len(raw_text):,} characters")
+        
+        # Skip near-duplicates before spending an LLM call
+        with profile_stage(self.profiler, "dedup"):
+            verdict, signature, match = self.dedup.check(arxiv_id, raw_text, source=source_name)
+        if verdict == "duplicate":
+            print(f"  ⊘ Near-duplicate of {match['matches']} ({match['similarity']:.2f}) - skipping")
+            self.duplicates += 1
+            return None
+        if verdict == "revision":
+            print(f"  ⚑ Looks like a revision of {match['matches']} ({match['similarity']:.2f})")
+        return raw_text, signature
+
+    def extract_and_save(self, arxiv_id, raw_text, signature, replace=False):
+        """Single-paper LLM extraction followed by save_to_db"""
+        try:
+            if len(raw_text) > TEXT_LIMIT:
+                # Whole paper in overlapping chunks, sent concurrently and merged
+                print(f"  → Sending {len(split_chunks(raw_text))} chunks to Groq AI...")
+                with profile_stage(self.profiler, "llm"):
+                    data = extract_chunked(self.groq_client, arxiv_id, raw_text,
+                                           record=partial(self.usage.record, arxiv_id, call_kind="chunk"))
+                print(f"  ✓ AI responses merged ({len(data['edges'])} edges)")
+            else:
+                # Send to Groq AI
+                print(f"  → Sending to Groq AI...")
+                with profile_stage(self.profiler, "prompt"):
+                    prompt = build_prompt(arxiv_id, raw_text)
+                with profile_stage(self.profiler, "llm"):
+                    try:
+                        response, stats = call_groq_with_stats(self.groq_client, prompt)
+                    except Exception as e:
+                        self.usage.record_failure(arxiv_id, e, len(raw_text))
+                        raise
+                
+                # Parse response
+                with profile_stage(self.profiler, "parse"):
+                    try:
+                        data = parse_response(response.choices[0].message.content)
+                    except Exception:
+                        stats = {**stats, "status": "parse_error"}
+                        raise
+                    finally:
+                        self.usage.record(arxiv_id, response, stats, len(raw_text))
+                print(f"  ✓ AI response received")
+        finally:
+            # Failed calls are recorded too, before the error propagates
+            with profile_stage(self.profiler, "db"):
+                self.usage.flush()
+        
+        # Save to database
+        with profile_stage(self.profiler, "db"):
+            self.save_to_db(data, arxiv_id, replace=replace)  # Force the arxiv_id we want
+        print(f"  ✓ Saved to database")
+        self.dedup.add(arxiv_id, signature)
+
+    def pace(self):
+        """Batched mode: wait until REQUEST_INTERVAL has passed since the last request"""
+        wait = self.last_request + REQUEST_INTERVAL - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        self.last_request = time.monotonic()
+
+    def queue_paper(self, arxiv_id, pdf_path, paper_num, source_name=None):
+        """Batched mode: hold short papers until a batch is full.
+
+        Long papers are still extracted on their own. Every request is paced
+        with pace(); returns True if one was made.
+        """
+        source_name = source_name or os.path.basename(pdf_path)
+        print(f"\n[{paper_num}] Processing: {source_name}")
+        
+        if self.check_if_exists(arxiv_id):
+            print(f"  ⊘ Already in database - skipping")
+            self.skipped += 1
+            return False
+        
+        try:
+            prepared = self.prepare_paper(arxiv_id, pdf_path, source_name)
+            if prepared is None:
+                return False
+            raw_text, signature = prepared
+            if len(raw_text) > BATCH_PAPER_CHARS:
+                self.pace()
+                self.extract_and_save(arxiv_id, raw_text, signature)
+                self.processed += 1
+                return True
+        except Exception as e:
+            print(f"  ✗ Error: {e}")
+            self.failed += 1
+            return False
+        
+        # Send what is queued first if this paper would take it over budget
+        sent = False
+        queued_chars = sum(len(text) for _, text, _ in self.pending)
+        if self.pending and queued_chars + len(raw_text) > BATCH_CHAR_BUDGET:
+            self.flush_batch()
+            sent = True
+        print(f"  ⧗ Queued for a batched request")
+        self.pending.append((arxiv_id, raw_text, signature))
+        if len(self.pending) >= self.batch_size:
+            self.flush_batch()
+            sent = True
+        return sent
+
+    def flush_batch(self):
+        """Extract all queued papers with one request, retrying failures one by one"""
+        pending, self.pending = self.pending, []
+        if not pending:
+            return
+        ids = [arxiv_id for arxiv_id, _, _ in pending]
+        print(f"\n→ Sending batch of {len(pending)} paper(s) to Groq AI: {', '.join(ids)}")
+        
+        results, failed = {}, ids
+        try:
+            with profile_stage(self.profiler, "prompt"):
+                prompt = build_batch_prompt([(arxiv_id, text) for arxiv_id, text, _ in pending])
+            # One usage row per paper, tokens split by text length
+            papers = [(arxiv_id, len(text)) for arxiv_id, text, _ in pending]
+            self.pace()
+            with profile_stage(self.profiler, "llm"):
+                try:
+                    response, stats = call_groq_with_stats(
+                        self.groq_client, prompt, max_tokens=batch_max_tokens(len(pending))
+                    )
+                except Exception as e:
+                    self.usage.record_batch(papers, None, failure_stats(e))
+                    raise
+            with profile_stage(self.profiler, "parse"):
+                results, failed = parse_batch_response(response.choices[0].message.content, ids)
+            if not results:
+                stats = {**stats, "status": "parse_error"}
+            self.usage.record_batch(papers, response, stats)
+        except Exception as e:
+            print(f"  ✗ Batch request failed: {e}")
+        with profile_stage(self.profiler, "db"):
+            self.usage.flush()
+        
+        for arxiv_id, raw_text, signature in pending:
+            try:
+                if arxiv_id in results:
+                    with profile_stage(self.profiler, "db"):
+                        self.save_to_db(results[arxiv_id], arxiv_id)
+                    print(f"  ✓ {arxiv_id}: saved from batch")
+                    self.dedup.add(arxiv_id, signature)
+                else:
+                    print(f"  ↻ {arxiv_id}: missing or invalid in batch response - extracting alone")
+                    self.pace()
+                    self.extract_and_save(arxiv_id, raw_text, signature)
+                self.processed += 1
+            except Exception as e:
+                print(f"  ✗ {arxiv_id}: {e}")
+                self.failed += 1
+
+    def save_to_db(self, data, arxiv_id, replace=False):
+        """Save paper to database (data is a parsed response or an ExtractionRecord).
+
+        replace=True swaps out a stored extraction of the same paper atomically.
+        """
+        # Validate and coerce once; the record carries the arxiv_id we passed in,
+        # not what AI extracted
+        record = data if isinstance(data, ExtractionRecord) else decode_extraction(data, arxiv_id)
+        paper = record.paper
         cur = self.conn.cursor()
         try:
-            node = data['node']
-            
-            # Force the arxiv_id to be the one we passed in, not what AI extracted
-            node['arxiv_id'] = arxiv_id
+            if replace:
+                self.delete_paper_rows(cur, arxiv_id)
             
             # Assignment database uses individual columns, not JSONB
             cur.execute("""
                 INSERT INTO nodes (
                     arxiv_id, title, authors, year, summary, 
-                    methods, datasets, metrics, project_page, pdf_link
+                    methods, datasets, metrics, project_page, pdf_link,
+                    extractor_version, prompt_version, model_version
                 )
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
                 RETURNING arxiv_id;
-            """, (
-                arxiv_id,  # Use the forced arxiv_id
-                node.get('title', ''),
-                node.get('authors', ''),
-                node.get('year', 0),
-                node.get('summary', ''),
-                node.get('methods', []),
-                node.get('datasets', []),
-                node.get('metrics', []),
-                node.get('project_page', ''),
-                node.get('pdf_link', '')
-            ))
+            """, paper.row(versions()))  # + which extractor/prompt/model produced this row
             
             # Also save to metadata table if it exists
             try:
@@ -166,47 +314,51 @@ Paper text (first 15000 chars):
                     INSERT INTO metadata (arxiv_id, citation_count)
                     VALUES (%s, %s)
                     ON CONFLICT (arxiv_id) DO UPDATE 
-                    SET citation_count = EXCLUDED.citation_count;
+                    SET citation_count = EXCLUDED.citation_count,
+                        last_updated = CURRENT_TIMESTAMP;
                 """, (
                     arxiv_id,  # Use the forced arxiv_id
-                    data.get('metadata', {}).get('citation_count', 0)
+                    record.metadata.citation_count
                 ))
             except:
                 pass  # metadata table might not exist
             
+            # Link canonical method/dataset/metric entities
+            self.entities.link_paper(cur, arxiv_id, paper.entity_lists())
+            
             # Insert edges (relationships)
-            edges = data.get('edges', [])
-            edges_inserted = 0
-            edges_skipped = 0
+            edges = record.edges
             if edges:
                 print(f"  → Processing {len(edges)} edge(s)...")
                 source_arxiv_id = arxiv_id  # Use the forced arxiv_id
+                
+                # Map LLM targets (titles, arXiv ids, ...) onto existing nodes in one pass
+                resolved = self.resolver.resolve_many(edge.target_arxiv_id for edge in edges)
+                rows, unresolved = [], []
                 for edge in edges:
-                    target_arxiv_id = edge.get('target_arxiv_id')
-                    relationship_type = edge.get('relationship_type', 'RELATED')
-                    reasoning = edge.get('reasoning', '')
-                    
-                    if target_arxiv_id:
-                        try:
-                            cur.execute("""
-                                INSERT INTO edges (source_id, target_id, relationship_type, reasoning)
-                                VALUES (%s, %s, %s, %s);
-                            """, (source_arxiv_id, target_arxiv_id, relationship_type, reasoning))
-                            edges_inserted += 1
-                        except Exception as edge_error:
-                            edges_skipped += 1
+                    target_arxiv_id = resolved.get(edge.target_arxiv_id)
+                    if not target_arxiv_id:
+                        unresolved.append(edge)  # records never have an empty target
+                    elif target_arxiv_id != source_arxiv_id:
+                        rows.append((source_arxiv_id, target_arxiv_id, edge.relationship_type, edge.reasoning))
                 
+                # One batched statement, grouped by partition (see edge_partitions.py)
+                edges_inserted = insert_edges(cur, rows)
                 if edges_inserted > 0:
                     print(f"  ✓ Inserted {edges_inserted} edge(s)")
-                if edges_skipped > 0:
-                    print(f"  ⚠ Skipped {edges_skipped} edge(s)")
+                if unresolved:
+                    self.resolver.record_unresolved(cur, source_arxiv_id, unresolved)
+                    print(f"  ⊘ Parked {len(unresolved)} unresolved edge target(s)")
             else:
                 print(f"  ℹ No edges in AI response")
             
             self.conn.commit()
+            self.entities.committed()
+            self.resolver.add_node(arxiv_id, paper.title, paper.pdf_link, paper.project_page)
             
         except Exception as e:
             self.conn.rollback()
+            self.entities.rolled_back()
             raise e
         finally:
             cur.close()
@@ -228,18 +380,81 @@ Paper text (first 15000 chars):
         print(f"\nFound {len(pdf_files)} PDF files")
         print(f"Directory: {papers_dir}\n")
         
+        # Papers already in the database are skipped without being opened
+        existing = self.existing_ids(arxiv_id_from_filename(f) for f in pdf_files)
+        if existing:
+            print(f"⊘ {len(existing)} already in database - skipping")
+            self.skipped += len(existing)
+            pdf_files = [f for f in pdf_files if arxiv_id_from_filename(f) not in existing]
+        
+        # Drop encrypted, corrupt and text-less files before any expensive work
+        print("→ Preflight checks...")
+        routes = preflight([os.path.join(papers_dir, f) for f in pdf_files])
+        print_routes(routes)
+        ready = {os.path.basename(r["path"]) for r in routes[PROCESS]}
+        self.rejected += len(pdf_files) - len(ready)
+        pdf_files = [f for f in pdf_files if f in ready]
+        
         # Process each paper
         for i, filename in enumerate(pdf_files, 1):
             # Generate arxiv_id from filename
-            arxiv_id = f"paper_{filename.replace('📄 Paper ', '').replace('.pdf', '')}"
+            arxiv_id = arxiv_id_from_filename(filename)
             pdf_path = os.path.join(papers_dir, filename)
             
+            if self.batch_size > 1:
+                # Requests are paced inside: most papers only join a batch
+                self.queue_paper(arxiv_id, pdf_path, i)
+                continue
+            
             self.process_paper(arxiv_id, pdf_path, i)
             
             # Delay to avoid rate limits
             if i < len(pdf_files):
                 time.sleep(3)  # 3 second delay between papers
         
+        self.finish_batch(len(pdf_files))
+
+    def process_archive(self, archive_path):
+        """Process all papers inside a zip/tar bundle without unpacking it"""
+        print("="*70)
+        print("BATCH PROCESSING ARCHIVE")
+        print("="*70)
+        print(f"\nArchive: {archive_path}\n")
+        
+        total = 0
+        for i, (member_name, open_member) in enumerate(iter_archive_pdfs(archive_path), 1):
+            total = i
+            arxiv_id = arxiv_id_from_filename(os.path.basename(member_name))
+            
+            # Check before decompressing the member at all
+            if self.check_if_exists(arxiv_id):
+                print(f"\n[{i}] Processing: {member_name}")
+                print(f"  ⊘ Already in database - skipping")
+                self.skipped += 1
+                continue
+            
+            # Member bytes go straight to the extractor via a spooled buffer
+            pdf_file = open_member()
+            try:
+                if self.batch_size > 1:
+                    self.queue_paper(arxiv_id, pdf_file, i, source_name=member_name)  # paces itself
+                    sent = False
+                else:
+                    self.process_paper(arxiv_id, pdf_file, i, source_name=member_name)
+                    sent = True
+            finally:
+                pdf_file.close()
+            
+            if sent:
+                time.sleep(3)  # 3 second delay between requests
+        
+        self.finish_batch(total)
+
+    def finish_batch(self, total):
+        """Summary, index persistence and verification after a batch"""
+        # Papers still waiting for a batched request
+        self.flush_batch()
+        
         # Show summary
         print("\n" + "="*70)
         print("PROCESSING COMPLETE")
@@ -247,7 +462,44 @@ Paper text (first 15000 chars):
         print(f"✓ Successfully processed: {self.processed}")
         print(f"⊘ Already in database:    {self.skipped}")
         print(f"✗ Failed:                 {self.failed}")
-        print(f"━ Total:                  {len(pdf_files)}")
+        print(f"⊘ Rejected by preflight:  {self.rejected}")
+        print(f"━ Total:                  {total + self.rejected}")
+        
+        self.usage.print_run_summary()
+        
+        # Persist signatures and the duplicate report
+        self.dedup.save()
+        self.dedup.save_report()
+        if self.dedup.report:
+            print()
+            self.dedup.print_report()
+        
+        # Edge targets that point at papers from this batch can resolve now
+        print("\n→ Re-resolving parked edge targets...")
+        self.resolver.reresolve()
+        
+        # Static graph file for the web viewer (only rewritten if data changed)
+        print("\n→ Refreshing viewer snapshot...")
+        try:
+            manifest, rebuilt = ViewerSnapshotBuilder(self.conn).build()
+            self.conn.commit()
+            print(f"  ✓ {manifest['files']['gzip']}" +
+                  (" (commit web-viewer/data to deploy)" if rebuilt else " (unchanged)"))
+        except Exception as e:
+            self.conn.rollback()
+            print(f"  ⚠ Viewer snapshot not updated: {e}")
+        
+        # Keep the co-occurrence matrices current (reads only changed nodes)
+        print("\n→ Refreshing co-occurrence index...")
+        try:
+            index = CooccurrenceIndex()
+            changed, removed = index.refresh(self.conn)
+            self.conn.commit()
+            index.save()
+            print(f"  ✓ {len(index.ids):,} papers ({changed} refreshed, {removed} removed)")
+        except Exception as e:
+            self.conn.rollback()
+            print(f"  ⚠ Co-occurrence index not updated: {e}")
         
         # Verify in database
         self.verify_database()
@@ -289,15 +541,24 @@ Paper text (first 15000 chars):
 
 
 if __name__ == "__main__":
+    # python process_all_papers.py [--profile] [--batch-size=N] [dir_or_archive ...]
     print("\n🚀 Starting batch paper processing...")
     
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    profiler = StageProfiler().start() if "--profile" in sys.argv[1:] else None
+    batch_size = next((int(a.split("=", 1)[1]) for a in sys.argv[1:] if a.startswith("--batch-size=")), 1)
+    
     try:
         # Initialize processor
-        processor = BatchPaperProcessor()
+        processor = BatchPaperProcessor(profiler=profiler, batch_size=batch_size)
         
-        # Process all papers
-        papers_directory = r"Alaris/papers"
-        processor.process_all_papers(papers_directory)
+        # Process all papers (directories and/or zip/tar bundles)
+        sources = args or [r"Alaris/papers"]
+        for source in sources:
+            if is_archive(source):
+                processor.process_archive(source)
+            else:
+                processor.process_all_papers(source)
         
         # Close connection
         processor.close()
@@ -308,3 +569,6 @@ if __name__ == "__main__":
         print(f"\n❌ Fatal Error: {e}")
         import traceback
         traceback.print_exc()
+    finally:
+        if profiler:
+            profiler.stop()
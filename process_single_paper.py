@@ -1,9 +1,17 @@
-from groq import Groq
 import psycopg2
-from pypdf import PdfReader
-import json
-import time
 import os
+import sys
+from functools import partial
+
+from chunked_extraction import extract_chunked, split_chunks
+from edge_partitions import insert_edges
+from edge_resolver import EdgeTargetResolver
+from extraction import TEXT_LIMIT, build_prompt, call_groq_with_stats, parse_response, versions
+from normalize_entities import EntityNormalizer
+from pdf_extractors import extract_pdf_text
+from profiling import StageProfiler, profile_stage
+from records import ExtractionRecord, decode_extraction
+from usage_tracking import UsageTracker
 
 # Configuration
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
@@ -17,18 +25,20 @@ DB_CONFIG = {
     "port": "5432"
 }
 
-# Initialize Groq client
-groq_client = Groq(api_key=GROQ_API_KEY)
-
 class PostgresResearchAgent:
-    def __init__(self):
-        self.groq_client = groq_client
+    def __init__(self, profiler=None):
+        from groq import Groq  # deferred so importing this module stays cheap
+        self.groq_client = Groq(api_key=GROQ_API_KEY)
         self.conn = psycopg2.connect(**DB_CONFIG)
+        self.entities = EntityNormalizer(self.conn)
+        self.resolver = EdgeTargetResolver(self.conn)
+        self.usage = UsageTracker(self.conn)
+        self.profiler = profiler  # StageProfiler when run with --profile
 
     def extract_text(self, pdf_path):
-        """Extract text from PDF"""
-        reader = PdfReader(pdf_path)
-        return "".join([p.extract_text() for p in reader.pages])
+        """Extract text from PDF (backend fallback chain, see pdf_extractors.py)"""
+        text, backend = extract_pdf_text(pdf_path)
+        return text
 
     def check_if_exists(self, arxiv_id):
         """Check if paper already exists in database"""
@@ -57,71 +67,49 @@ class PostgresResearchAgent:
         try:
             # Extract text
             print(f"→ Extracting text from PDF...")
-            raw_text = self.extract_text(pdf_path)
+            with profile_stage(self.profiler, "extract"):
+                raw_text = self.extract_text(pdf_path)
             print(f"✓ Extracted {len(raw_text):,} characters")
             
-            # Send to Groq AI
-            print(f"→ Sending to Groq AI...")
-            prompt = f"""
-Extract information from this research paper and return ONLY valid JSON (no markdown):
-
-{{
-  "node": {{
-    "arxiv_id": "{arxiv_id}",
-    "title": "paper title",
-    "authors": "author names",
-    "year": 2024,
-    "summary": "brief summary (1-2 sentences)",
-    "methods": ["method1", "method2"],
-    "datasets": ["dataset1"],
-    "metrics": ["metric1"],
-    "project_page": "",
-    "pdf_link": ""
-  }},
-  "edges": [
-    {{"target_arxiv_id": "related_paper_id", "relationship_type": "CITES", "reasoning": "why"}},
-    {{"target_arxiv_id": "another_paper_id", "relationship_type": "BUILDS_ON", "reasoning": "explanation"}}
-  ],
-  "metadata": {{"citation_count": 0}}
-}}
-
-Paper text (first 15000 chars):
-{raw_text[:15000]}
-"""
-            
-            # Retry logic for rate limits
-            max_retries = 3
-            for attempt in range(max_retries):
-                try:
-                    response = self.groq_client.chat.completions.create(
-                        messages=[{"role": "user", "content": prompt}],
-                        model="llama-3.3-70b-versatile",
-                        temperature=0.1,
-                        max_tokens=2048
-                    )
-                    break  # Success - exit retry loop
-                except Exception as api_error:
-                    if "rate_limit" in str(api_error).lower() and attempt < max_retries - 1:
-                        wait_time = (attempt + 1) * 10  # 10, 20, 30 seconds
-                        print(f"  ⚠ Rate limit hit - waiting {wait_time}s...")
-                        time.sleep(wait_time)
-                    else:
-                        raise  # Re-raise if not rate limit or last attempt
-            
-            # Parse response
-            json_data = response.choices[0].message.content.strip()
-            if json_data.startswith('```'):
-                json_data = json_data.split('```')[1]
-                if json_data.startswith('json'):
-                    json_data = json_data[4:]
-            json_data = json_data.strip()
-            
-            data = json.loads(json_data)
-            print(f"✓ AI response received and parsed")
+            try:
+                if len(raw_text) > TEXT_LIMIT:
+                    # Whole paper in overlapping chunks, sent concurrently and merged
+                    print(f"→ Sending {len(split_chunks(raw_text))} chunks to Groq AI...")
+                    with profile_stage(self.profiler, "llm"):
+                        data = extract_chunked(self.groq_client, arxiv_id, raw_text,
+                                               record=partial(self.usage.record, arxiv_id, call_kind="chunk"))
+                    print(f"✓ AI responses merged ({len(data['edges'])} edges)")
+                else:
+                    # Send to Groq AI
+                    print(f"→ Sending to Groq AI...")
+                    with profile_stage(self.profiler, "prompt"):
+                        prompt = build_prompt(arxiv_id, raw_text)
+                    with profile_stage(self.profiler, "llm"):
+                        try:
+                            response, stats = call_groq_with_stats(self.groq_client, prompt)
+                        except Exception as e:
+                            self.usage.record_failure(arxiv_id, e, len(raw_text))
+                            raise
+                    
+                    # Parse response
+                    with profile_stage(self.profiler, "parse"):
+                        try:
+                            data = parse_response(response.choices[0].message.content)
+                        except Exception:
+                            stats = {**stats, "status": "parse_error"}
+                            raise
+                        finally:
+                            self.usage.record(arxiv_id, response, stats, len(raw_text))
+                    print(f"✓ AI response received and parsed")
+            finally:
+                # Failed calls are recorded too, before the error propagates
+                with profile_stage(self.profiler, "db"):
+                    self.usage.flush()
             
             # Save to database
             print(f"→ Saving to database...")
-            self.save_to_db(data, arxiv_id)  # Force the arxiv_id we want
+            with profile_stage(self.profiler, "db"):
+                self.save_to_db(data, arxiv_id)  # Force the arxiv_id we want
             print(f"✓ Successfully saved to database\n")
             
             return True
@@ -133,34 +121,23 @@ Paper text (first 15000 chars):
             return False
 
     def save_to_db(self, data, arxiv_id):
-        """Save paper to database"""
+        """Save paper to database (data is a parsed response or an ExtractionRecord)"""
+        # Validate and coerce once; the record carries the arxiv_id we passed in,
+        # not what AI extracted
+        record = data if isinstance(data, ExtractionRecord) else decode_extraction(data, arxiv_id)
+        paper = record.paper
         cur = self.conn.cursor()
         try:
-            node = data['node']
-            
-            # Force the arxiv_id to be the one we passed in, not what AI extracted
-            node['arxiv_id'] = arxiv_id
-            
             # Assignment database uses individual columns, not JSONB
             cur.execute("""
                 INSERT INTO nodes (
                     arxiv_id, title, authors, year, summary, 
-                    methods, datasets, metrics, project_page, pdf_link
+                    methods, datasets, metrics, project_page, pdf_link,
+                    extractor_version, prompt_version, model_version
                 )
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
                 RETURNING arxiv_id;
-            """, (
-                arxiv_id,  # Use the forced arxiv_id
-                node.get('title', ''),
-                node.get('authors', ''),
-                node.get('year', 0),
-                node.get('summary', ''),
-                node.get('methods', []),
-                node.get('datasets', []),
-                node.get('metrics', []),
-                node.get('project_page', ''),
-                node.get('pdf_link', '')
-            ))
+            """, paper.row(versions()))  # + which extractor/prompt/model produced this row
             
             paper_arxiv_id = cur.fetchone()[0]
             print(f"  ✓ Inserted paper: {paper_arxiv_id}")
@@ -171,48 +148,52 @@ Paper text (first 15000 chars):
                     INSERT INTO metadata (arxiv_id, citation_count)
                     VALUES (%s, %s)
                     ON CONFLICT (arxiv_id) DO UPDATE 
-                    SET citation_count = EXCLUDED.citation_count;
+                    SET citation_count = EXCLUDED.citation_count,
+                        last_updated = CURRENT_TIMESTAMP;
                 """, (
                     arxiv_id,  # Use the forced arxiv_id
-                    data.get('metadata', {}).get('citation_count', 0)
+                    record.metadata.citation_count
                 ))
                 print(f"  ✓ Inserted metadata")
             except Exception as meta_error:
                 print(f"  ⚠ Metadata insert failed: {meta_error}")
             
+            # Link canonical method/dataset/metric entities
+            self.entities.link_paper(cur, arxiv_id, paper.entity_lists())
+            
             # Insert edges (relationships)
-            edges = data.get('edges', [])
-            edges_inserted = 0
-            edges_skipped = 0
+            edges = record.edges
             if edges:
                 print(f"  → Processing {len(edges)} edge(s)...")
                 source_arxiv_id = arxiv_id  # Use the forced arxiv_id
+                
+                # Map LLM targets (titles, arXiv ids, ...) onto existing nodes in one pass
+                resolved = self.resolver.resolve_many(edge.target_arxiv_id for edge in edges)
+                rows, unresolved = [], []
                 for edge in edges:
-                    target_arxiv_id = edge.get('target_arxiv_id')
-                    relationship_type = edge.get('relationship_type', 'RELATED')
-                    reasoning = edge.get('reasoning', '')
-                    
-                    if target_arxiv_id:
-                        try:
-                            cur.execute("""
-                                INSERT INTO edges (source_id, target_id, relationship_type, reasoning)
-                                VALUES (%s, %s, %s, %s);
-                            """, (source_arxiv_id, target_arxiv_id, relationship_type, reasoning))
-                            edges_inserted += 1
-                        except Exception as edge_error:
-                            edges_skipped += 1
+                    target_arxiv_id = resolved.get(edge.target_arxiv_id)
+                    if not target_arxiv_id:
+                        unresolved.append(edge)  # records never have an empty target
+                    elif target_arxiv_id != source_arxiv_id:
+                        rows.append((source_arxiv_id, target_arxiv_id, edge.relationship_type, edge.reasoning))
                 
+                # One batched statement, grouped by partition (see edge_partitions.py)
+                edges_inserted = insert_edges(cur, rows)
                 if edges_inserted > 0:
                     print(f"  ✓ Inserted {edges_inserted} edge(s)")
-                if edges_skipped > 0:
-                    print(f"  ⚠ Skipped {edges_skipped} edge(s)")
+                if unresolved:
+                    self.resolver.record_unresolved(cur, source_arxiv_id, unresolved)
+                    print(f"  ⊘ Parked {len(unresolved)} unresolved edge target(s)")
             else:
                 print(f"  ℹ No edges in AI response")
             
             self.conn.commit()
+            self.entities.committed()
+            self.resolver.add_node(arxiv_id, paper.title, paper.pdf_link, paper.project_page)
             
         except Exception as e:
             self.conn.rollback()
+            self.entities.rolled_back()
             raise e
         finally:
             cur.close()
@@ -228,12 +209,22 @@ if __name__ == "__main__":
     print("Individual Paper Processor")
     print("="*70)
     
+    # python process_single_paper.py [--profile] [arxiv_id pdf_path]
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    profiler = StageProfiler().start() if "--profile" in sys.argv[1:] else None
+    
     try:
-        agent = PostgresResearchAgent()
+        agent = PostgresResearchAgent(profiler=profiler)
         print(f"✓ Connected to database: {DB_CONFIG['dbname']} on port {DB_CONFIG['port']}\n")
         
+        if len(args) == 2:
+            agent.process_paper(*args)
+            agent.conn.close()
+            sys.exit(0)
+        
         print("Usage:")
-        print("  agent.process_paper('arxiv_id', 'path/to/paper.pdf')\n")
+        print("  agent.process_paper('arxiv_id', 'path/to/paper.pdf')")
+        print("  python process_single_paper.py [--profile] arxiv_id path/to/paper.pdf\n")
         
         print("Example:")
         print("  agent.process_paper('paper_49', r'Alaris/papers/📄 Paper 4.pdf')\n")
@@ -252,4 +243,7 @@ if __name__ == "__main__":
     except Exception as e:
         print(f"\n❌ Error: {e}")
         import traceback
-        traceback.print_exc()
\ No newline at end of file
+        traceback.print_exc()
+    finally:
+        if profiler:
+            profiler.stop()
@@ -0,0 +1,221 @@
+import functools
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+
+# Seconds between stack samples; 5ms keeps overhead low while catching pypdf/json hot loops
+SAMPLE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.005"))
+
+# Allocations are attributed to the allocating line only; deeper tracebacks
+# make every snapshot comparison much slower
+TRACE_FRAMES = 1
+TOP_N = int(os.getenv("PROFILE_TOP_N", "10"))
+
+_OWN_FILES = (tracemalloc.__file__, __file__)
+
+# The started profiler, so carry_stage() can find it from library code
+_running = None
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    module = os.path.splitext(os.path.basename(code.co_filename))[0]
+    return f"{module}:{code.co_name}:{frame.f_lineno}"
+
+
+def _folded_stack(frame):
+    """Root-first 'a;b;c' stack as used by flamegraph.pl / speedscope"""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class StageProfiler:
+    """Per-stage wall/CPU timing, stack sampling and allocation tracking.
+
+    Wrap work in `with profiler.stage("name"):`. A background thread samples
+    the stacks of threads that are inside a stage; wall time minus the
+    thread's CPU time is what the stage spent waiting (network, disk, locks).
+    Work a stage hands to a thread pool is only seen if the submitted
+    callable is wrapped in carry_stage(); its CPU is reported separately.
+    """
+
+    def __init__(self, out_dir=PROFILE_DIR, interval=SAMPLE_INTERVAL, top_n=TOP_N):
+        self.out_dir = os.path.join(out_dir, datetime.now().strftime("%Y%m%d_%H%M%S"))
+        self.interval = interval
+        self.top_n = top_n
+        self.active = {}                    # thread id -> stage name
+        self.samples = defaultdict(Counter)  # stage -> folded stack -> count
+        self.timings = defaultdict(lambda: {"calls": 0, "wall": 0.0, "cpu": 0.0, "worker_cpu": 0.0})
+        self.allocations = defaultdict(Counter)  # stage -> "file:line" -> bytes
+        self.peaks = defaultdict(int)
+        self.lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler = None
+
+    def start(self):
+        global _running
+        _running = self
+        tracemalloc.start(TRACE_FRAMES)
+        self._sampler = threading.Thread(target=self._sample_loop, name="profiler-sampler", daemon=True)
+        self._sampler.start()
+        return self
+
+    def _sample_loop(self):
+        while not self._stop.wait(self.interval):
+            with self.lock:
+                active = dict(self.active)
+            if not active:
+                continue
+            frames = sys._current_frames()
+            for thread_id, stage in active.items():
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    stack = _folded_stack(frame)
+                    with self.lock:
+                        self.samples[stage][stack] += 1
+
+    @contextmanager
+    def stage(self, name):
+        thread_id = threading.get_ident()
+        # Snapshots are taken outside the timed and sampled window so the
+        # profiler's own bookkeeping doesn't show up as stage cost
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        with self.lock:
+            outer = self.active.get(thread_id)
+            self.active[thread_id] = name
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter() - wall, time.thread_time() - cpu
+            with self.lock:
+                if outer is None:
+                    del self.active[thread_id]
+                else:
+                    self.active[thread_id] = outer
+            _, peak = tracemalloc.get_traced_memory()
+            grown = Counter()
+            for diff in tracemalloc.take_snapshot().compare_to(before, "lineno"):
+                frame = diff.traceback[0]
+                if diff.size_diff > 0 and frame.filename not in _OWN_FILES:
+                    grown[f"{frame.filename}:{frame.lineno}"] += diff.size_diff
+            with self.lock:
+                t = self.timings[name]
+                t["calls"] += 1
+                t["wall"] += wall
+                t["cpu"] += cpu
+                self.allocations[name].update(grown)
+                self.peaks[name] = max(self.peaks[name], peak)
+
+    @contextmanager
+    def worker(self, name):
+        """Count a helper thread's work toward a stage another thread is in.
+
+        The thread is sampled under the stage and its CPU time is added as
+        worker CPU; wall time and allocations are already covered by the
+        owning thread's stage (tracemalloc is process-wide).
+        """
+        thread_id = threading.get_ident()
+        with self.lock:
+            outer = self.active.get(thread_id)
+            self.active[thread_id] = name
+        cpu = time.thread_time()
+        try:
+            yield
+        finally:
+            cpu = time.thread_time() - cpu
+            with self.lock:
+                if outer is None:
+                    del self.active[thread_id]
+                else:
+                    self.active[thread_id] = outer
+                self.timings[name]["worker_cpu"] += cpu
+
+    def stop(self):
+        """Stop sampling, write .folded files and summary.txt, print the summary"""
+        global _running
+        if _running is self:
+            _running = None
+        self._stop.set()
+        if self._sampler:
+            self._sampler.join()
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+        os.makedirs(self.out_dir, exist_ok=True)
+        with open(os.path.join(self.out_dir, "all.folded"), "w", encoding="utf-8") as combined:
+            for stage, stacks in self.samples.items():
+                with open(os.path.join(self.out_dir, f"{stage}.folded"), "w", encoding="utf-8") as f:
+                    for stack, count in stacks.most_common():
+                        f.write(f"{stack} {count}\n")
+                        combined.write(f"{stage};{stack} {count}\n")
+
+        summary = self.summary()
+        with open(os.path.join(self.out_dir, "summary.txt"), "w", encoding="utf-8") as f:
+            f.write(summary + "\n")
+        print("\n" + summary)
+        print(f"\n✓ Profile written to {self.out_dir}/ (*.folded for flamegraph.pl or speedscope)")
+
+    def summary(self):
+        lines = ["=" * 70, "PROFILE SUMMARY", "=" * 70,
+                 "  cpu/wait: the thread that entered the stage; wkr cpu: pool threads (carry_stage)",
+                 f"  {'stage':10} {'calls':>5} {'wall s':>8} {'cpu s':>8} {'wait s':>8} {'wkr cpu':>8} {'peak MB':>8}"]
+        for stage, t in sorted(self.timings.items(), key=lambda kv: -kv[1]["wall"]):
+            lines.append(f"  {stage:10} {t['calls']:5d} {t['wall']:8.2f} {t['cpu']:8.2f} "
+                         f"{max(t['wall'] - t['cpu'], 0.0):8.2f} {t['worker_cpu']:8.2f} "
+                         f"{self.peaks[stage] / 1e6:8.1f}")
+
+        for stage in sorted(self.timings, key=lambda s: -self.timings[s]["wall"]):
+            lines.append(f"\n[{stage}] hotspots (self samples)")
+            own = Counter()
+            for stack, count in self.samples[stage].items():
+                own[stack.rsplit(";", 1)[-1]] += count
+            total = sum(own.values()) or 1
+            for label, count in own.most_common(self.top_n):
+                lines.append(f"  {count / total * 100:5.1f}%  {label}")
+            if not own:
+                lines.append("  (no samples - stage shorter than the sampling interval)")
+
+            lines.append(f"[{stage}] allocations (net growth)")
+            for location, size in self.allocations[stage].most_common(self.top_n):
+                lines.append(f"  {size / 1024:9.1f} KiB  {location}")
+            if not self.allocations[stage]:
+                lines.append("  (none)")
+        return "\n".join(lines)
+
+
+def profile_stage(profiler, name):
+    """profiler.stage(name), or a no-op when profiling is off"""
+    return profiler.stage(name) if profiler else nullcontext()
+
+
+def carry_stage(fn):
+    """Wrap fn so the thread that runs it counts toward the caller's stage.
+
+    Call it in the submitting thread, e.g. pool.submit(carry_stage(fn), ...).
+    Returns fn unchanged when profiling is off or the caller isn't in a stage.
+    """
+    profiler = _running
+    if profiler is None:
+        return fn
+    with profiler.lock:
+        name = profiler.active.get(threading.get_ident())
+    if name is None:
+        return fn
+
+    @functools.wraps(fn)
+    def run(*args, **kwargs):
+        with profiler.worker(name):
+            return fn(*args, **kwargs)
+    return run
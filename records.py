@@ -0,0 +1,217 @@
+import json
+import math
+import re
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+
+from edge_partitions import normalize_relationship
+
+# LLM output is coerced rather than rejected wherever the intent is clear:
+# "2023" and 2023.0 are a year, a bare string is a one-item list (never split
+# on commas, which names like "Mask R-CNN, v2" contain), a list of authors is
+# a string, "builds on" is BUILDS_ON. Only values save_to_db cannot use -
+# wrong shapes, NaN and Infinity (json.loads accepts them) - raise RecordError.
+
+_YEAR = re.compile(r"\b(1[89]\d\d|2\d\d\d)\b")
+_DIGITS = re.compile(r"\d+")
+
+
+class RecordError(ValueError):
+    """The extraction response cannot be turned into records"""
+
+
+def _text(value):
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, (list, tuple)):
+        return ", ".join(_text(v) for v in value if v is not None and _text(v))
+    return str(value)
+
+
+def _int(value, pattern=_DIGITS):
+    if isinstance(value, bool) or value is None:
+        return 0
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            raise RecordError(f"non-finite number: {value}")
+        return int(value)
+    match = pattern.search(str(value).replace(",", ""))
+    return int(match.group(0)) if match else 0
+
+
+def _strings(value):
+    if value is None:
+        return []
+    if not isinstance(value, (list, tuple)):
+        value = [value]
+    return [s for s in (_text(v) for v in value) if s]
+
+
+@dataclass(slots=True)
+class Paper:
+    arxiv_id: str
+    title: str = ""
+    authors: str = ""
+    year: int = 0
+    summary: str = ""
+    methods: list = field(default_factory=list)
+    datasets: list = field(default_factory=list)
+    metrics: list = field(default_factory=list)
+    project_page: str = ""
+    pdf_link: str = ""
+
+    def row(self, versions):
+        """Values for the nodes INSERT, followed by the version columns"""
+        return (self.arxiv_id, self.title, self.authors, self.year, self.summary,
+                self.methods, self.datasets, self.metrics, self.project_page, self.pdf_link,
+                *versions)
+
+    def entity_lists(self):
+        """The shape EntityNormalizer.link_paper expects"""
+        return {"methods": self.methods, "datasets": self.datasets, "metrics": self.metrics}
+
+
+@dataclass(slots=True)
+class Edge:
+    target_arxiv_id: str
+    relationship_type: str = "RELATED"
+    reasoning: str = ""
+
+
+@dataclass(slots=True)
+class Metadata:
+    citation_count: int = 0
+
+
+@dataclass(slots=True)
+class ExtractionRecord:
+    paper: Paper
+    edges: list
+    metadata: Metadata
+    dropped_edges: int = 0  # entries without a usable target
+
+
+def decode_extraction(data, arxiv_id):
+    """Validate and coerce one parsed LLM response in a single pass.
+
+    `data` is the dict from parse_response (or a JSON string). The node's
+    arxiv_id is always replaced by the id the pipeline assigned.
+    """
+    if isinstance(data, (str, bytes)):
+        try:
+            data = json.loads(data)
+        except ValueError as e:
+            raise RecordError(f"invalid JSON: {e}") from None
+    if not isinstance(data, dict):
+        raise RecordError(f"expected an object, got {type(data).__name__}")
+    node = data.get("node")
+    if not isinstance(node, dict):
+        raise RecordError("missing 'node' object")
+
+    paper = Paper(
+        arxiv_id=arxiv_id,
+        title=_text(node.get("title")),
+        authors=_text(node.get("authors")),
+        year=_int(node.get("year"), _YEAR),
+        summary=_text(node.get("summary")),
+        methods=_strings(node.get("methods")),
+        datasets=_strings(node.get("datasets")),
+        metrics=_strings(node.get("metrics")),
+        project_page=_text(node.get("project_page")),
+        pdf_link=_text(node.get("pdf_link")),
+    )
+
+    raw_edges = data.get("edges") or []
+    if not isinstance(raw_edges, list):
+        raise RecordError("'edges' is not a list")
+    edges, dropped = [], 0
+    for edge in raw_edges:
+        target = _text(edge.get("target_arxiv_id")) if isinstance(edge, dict) else ""
+        if not target:
+            dropped += 1
+            continue
+        edges.append(Edge(target, normalize_relationship(_text(edge.get("relationship_type"))),
+                          _text(edge.get("reasoning"))))
+
+    metadata = data.get("metadata") or {}
+    if not isinstance(metadata, dict):
+        raise RecordError("'metadata' is not an object")
+
+    return ExtractionRecord(paper, edges, Metadata(_int(metadata.get("citation_count"))), dropped)
+
+
+# ---------------------------------------------------------------------------
+# Benchmark: python records.py [n_papers]
+# ---------------------------------------------------------------------------
+
+def _sample_response(i):
+    return json.dumps({
+        "node": {
+            "arxiv_id": f"x{i}", "title": f"Paper number {i} on scalable learning",
+            "authors": ["A. Author", "B. Author", "C. Author"], "year": "2023",
+            "summary": "A short summary of the contribution. " * 3,
+            "methods": ["transformer", "contrastive learning", "distillation"],
+            "datasets": ["ImageNet", "COCO"], "metrics": ["accuracy", "mAP"],
+            "project_page": "", "pdf_link": f"https://arxiv.org/pdf/2301.{i:05d}",
+        },
+        "edges": [
+            {"target_arxiv_id": f"2201.{j:05d}", "relationship_type": "CITES", "reasoning": "cited in related work"}
+            for j in range(8)
+        ],
+        "metadata": {"citation_count": i % 500},
+    })
+
+
+def _dict_rows(data, arxiv_id):
+    """What save_to_db did before: .get() with defaults, no coercion"""
+    node = data["node"]
+    node_row = (arxiv_id, node.get("title", ""), node.get("authors", ""), node.get("year", 0),
+                node.get("summary", ""), node.get("methods", []), node.get("datasets", []),
+                node.get("metrics", []), node.get("project_page", ""), node.get("pdf_link", ""))
+    edge_rows = [(arxiv_id, e.get("target_arxiv_id"), e.get("relationship_type", "RELATED"),
+                  e.get("reasoning", "")) for e in data.get("edges", [])]
+    return node_row, edge_rows, data.get("metadata", {}).get("citation_count", 0)
+
+
+def _record_rows(record):
+    return (record.paper.row(()),
+            [(record.paper.arxiv_id, e.target_arxiv_id, e.relationship_type, e.reasoning)
+             for e in record.edges],
+            record.metadata.citation_count)
+
+
+def benchmark(n):
+    payloads = [_sample_response(i) for i in range(n)]
+    results = {}
+    for name, decode, to_rows in (
+        ("dict", json.loads, lambda d, i: _dict_rows(d, f"paper_{i}")),
+        ("records", lambda p: decode_extraction(json.loads(p), "tmp"), lambda r, i: _record_rows(r)),
+    ):
+        start = time.perf_counter()
+        held = [decode(p) for p in payloads]
+        rows = [to_rows(obj, i) for i, obj in enumerate(held)]
+        elapsed = time.perf_counter() - start
+        del held, rows
+
+        # Memory separately: tracemalloc slows allocation-heavy code several times over
+        tracemalloc.start()
+        held = [decode(p) for p in payloads]
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results[name] = (elapsed, current)
+        del held
+
+    print(f"{n:,} responses (8 edges each): decode + build rows, then memory held by decoded objects")
+    print(f"  {'path':8} {'seconds':>8} {'µs/paper':>9} {'MB held':>8}")
+    for name, (elapsed, memory) in results.items():
+        print(f"  {name:8} {elapsed:8.3f} {elapsed / n * 1e6:9.1f} {memory / 1e6:8.1f}")
+
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -1,5 +1,9 @@
 import psycopg2
 
+import edge_partitions
+import export_tables
+import graph_stats
+
 # Supabase configuration
 SUPABASE_CONFIG = {
     "dbname": "postgres",
@@ -34,9 +38,22 @@ try:
             datasets TEXT[],
             metrics TEXT[],
             project_page TEXT,
-            pdf_link TEXT
+            pdf_link TEXT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            extractor_version TEXT,
+            prompt_version TEXT,
+            model_version TEXT
         );
     """)
+    # Change tracking for incremental exports and the extraction versions
+    # used by backfill_versions.py (older databases lack these columns)
+    cur.execute("""
+        ALTER TABLE nodes
+        ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        ADD COLUMN IF NOT EXISTS extractor_version TEXT,
+        ADD COLUMN IF NOT EXISTS prompt_version TEXT,
+        ADD COLUMN IF NOT EXISTS model_version TEXT;
+    """)
     print("   ✓ Nodes table created")
     
     # Create metadata table
@@ -50,34 +67,114 @@ try:
     """)
     print("   ✓ Metadata table created")
     
-    # Create edges table
+    # Create edges table (partitioned with EDGES_PARTITIONED=1, see edge_partitions.py)
     print("\n4. Creating 'edges' table...")
+    conn.autocommit = False  # a conversion to partitions is one transaction
+    layout = edge_partitions.install(conn)
+    conn.autocommit = True
+    print(f"   ✓ Edges layout: {layout}")
+    # Edges whose target isn't a known paper yet (see edge_resolver.py)
     cur.execute("""
-        CREATE TABLE IF NOT EXISTS edges (
+        CREATE TABLE IF NOT EXISTS unresolved_edges (
             id SERIAL PRIMARY KEY,
             source_id TEXT,
-            target_id TEXT,
+            target_ref TEXT,
             relationship_type TEXT,
-            reasoning TEXT
+            reasoning TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         );
     """)
     print("   ✓ Edges table created")
     
+    # Create normalized entity tables
+    print("\n5. Creating entity tables...")
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS entities (
+            id SERIAL PRIMARY KEY,
+            kind TEXT NOT NULL,
+            canonical_key TEXT NOT NULL,
+            name TEXT NOT NULL,
+            UNIQUE (kind, canonical_key)
+        );
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS entity_aliases (
+            kind TEXT NOT NULL,
+            alias_key TEXT NOT NULL,
+            canonical_key TEXT NOT NULL,
+            PRIMARY KEY (kind, alias_key)
+        );
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS paper_entities (
+            arxiv_id TEXT NOT NULL,
+            entity_id INTEGER NOT NULL REFERENCES entities(id),
+            PRIMARY KEY (arxiv_id, entity_id)
+        );
+    """)
+    # Reverse lookups (entity -> papers) are index seeks
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS paper_entities_entity_idx
+        ON paper_entities (entity_id, arxiv_id);
+    """)
+    print("   ✓ Entity tables created")
+    
+    # Create LLM usage table (one row per Groq call, see usage_tracking.py)
+    print("\n6. Creating 'llm_usage' table...")
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS llm_usage (
+            id SERIAL PRIMARY KEY,
+            run_id TEXT,
+            arxiv_id TEXT,
+            model TEXT,
+            call_kind TEXT,
+            prompt_tokens INTEGER,
+            completion_tokens INTEGER,
+            total_tokens INTEGER,
+            latency_ms INTEGER,
+            retries INTEGER,
+            text_chars INTEGER,
+            status TEXT NOT NULL DEFAULT 'ok',
+            batch_id TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    """)
+    # ok | error (request raised) | parse_error (response unusable) | truncated (hit max_tokens)
+    cur.execute("ALTER TABLE llm_usage ADD COLUMN IF NOT EXISTS status TEXT NOT NULL DEFAULT 'ok';")
+    # Shared by the per-paper rows of one batched request; NULL for single calls
+    cur.execute("ALTER TABLE llm_usage ADD COLUMN IF NOT EXISTS batch_id TEXT;")
+    cur.execute("CREATE INDEX IF NOT EXISTS llm_usage_run_idx ON llm_usage (run_id);")
+    print("   ✓ Usage table created")
+    
+    # Dashboard stats row, maintained by triggers (see graph_stats.py)
+    print("\n7. Creating 'graph_stats' table and triggers...")
+    graph_stats.install(conn)  # also seeds the row via rebuild
+    print("   ✓ Stats installed and rebuilt")
+    
+    # Watermark stamping and delete tombstones for incremental exports
+    # (after the edges step, which may have rebuilt the table)
+    print("   → Installing export change tracking...")
+    export_tables.install_change_tracking(cur)
+    print("   ✓ Change tracking installed")
+    
     # Verify tables
-    print("\n5. Verifying tables...")
+    print("\n8. Verifying tables...")
     cur.execute("""
         SELECT table_name 
         FROM information_schema.tables 
         WHERE table_schema = 'public'
-        AND table_name IN ('nodes', 'metadata', 'edges');
+        AND table_name IN ('nodes', 'metadata', 'edges',
+                           'unresolved_edges', 'entities', 'entity_aliases',
+                           'paper_entities', 'llm_usage', 'graph_stats', 'graph_stats_delta',
+                           'export_tombstones');
     """)
     
     tables = [row[0] for row in cur.fetchall()]
     print(f"   ✓ Found tables: {', '.join(tables)}")
     
     # Get counts
-    print("\n6. Current data counts:")
-    for table in ['nodes', 'metadata', 'edges']:
+    print("\n9. Current data counts:")
+    for table in ['nodes', 'metadata', 'edges', 'entities', 'paper_entities']:
         cur.execute(f"SELECT COUNT(*) FROM {table};")
         count = cur.fetchone()[0]
         print(f"   - {table}: {count} records")
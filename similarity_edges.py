@@ -0,0 +1,206 @@
+import psycopg2
+import numpy as np
+import json
+import os
+import re
+import sys
+import time
+import zlib
+
+from edge_partitions import insert_edges
+from export_tables import DB_CONFIG, stream_query
+
+# Where the vector matrix and its row ids are stored between runs
+SIMILARITY_DIR = "similarity"
+
+# Hashed feature dimensions (float32, so N papers take N * DIM * 4 bytes)
+DIM = int(os.getenv("SIMILARITY_DIM", "1024"))
+
+# Neighbours kept per paper and minimum cosine similarity for an edge
+TOP_K = int(os.getenv("SIMILARITY_TOP_K", "5"))
+MIN_SCORE = float(os.getenv("SIMILARITY_MIN_SCORE", "0.2"))
+
+# Rows multiplied against the whole matrix at once
+BLOCK_SIZE = 1024
+
+# Marks edges owned by this engine so re-runs only touch their own rows
+REASONING_PREFIX = "Local similarity"
+
+_WORD = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or that the this
+to we with our which using based paper propose proposed method methods results
+""".split())
+
+
+def features(title, summary, methods, datasets):
+    """Hashed bag of words/bigrams; entity names are kept as whole tokens"""
+    words = [w for w in _WORD.findall(f"{title or ''} {summary or ''}".lower()) if w not in _STOPWORDS]
+    tokens = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    tokens += [f"m:{m.lower()}" for m in methods or []]
+    tokens += [f"d:{d.lower()}" for d in datasets or []]
+    return [zlib.crc32(t.encode("utf-8")) % DIM for t in tokens]
+
+
+class SimilarityEngine:
+    def __init__(self, data_dir=SIMILARITY_DIR):
+        self.conn = psycopg2.connect(**DB_CONFIG)
+        self.data_dir = data_dir
+        self.ids = []
+        self.stamps = []   # nodes.updated_at each row was embedded from
+        self.vectors = np.zeros((0, DIM), dtype=np.float32)
+        self.load()
+
+    def load(self):
+        ids_path = os.path.join(self.data_dir, "ids.json")
+        if os.path.exists(ids_path):
+            with open(ids_path, encoding="utf-8") as f:
+                stored = json.load(f)
+            if isinstance(stored, list):
+                # Older layout without timestamps - every row re-embeds once
+                stored = {"ids": stored, "updated_at": [None] * len(stored)}
+            self.ids, self.stamps = stored["ids"], stored["updated_at"]
+            self.vectors = np.load(os.path.join(self.data_dir, "vectors.npy"))
+            if self.vectors.shape[1] != DIM:
+                # Dimension changed - start over rather than mixing layouts
+                self.reset()
+
+    def reset(self):
+        self.ids, self.stamps = [], []
+        self.vectors = np.zeros((0, DIM), dtype=np.float32)
+
+    def save(self):
+        os.makedirs(self.data_dir, exist_ok=True)
+        np.save(os.path.join(self.data_dir, "vectors.npy"), self.vectors)
+        with open(os.path.join(self.data_dir, "ids.json"), "w", encoding="utf-8") as f:
+            json.dump({"ids": self.ids, "updated_at": self.stamps}, f)
+
+    def embed_new(self):
+        """Bring the matrix in line with nodes.
+
+        Papers that are new or whose updated_at moved (watch-replace,
+        backfill) are vectorized again; rows of deleted papers are dropped.
+        Returns (embedded, dropped).
+        """
+        known = dict(zip(self.ids, self.stamps))
+        kept = set()
+        new_ids, new_stamps, rows = [], [], []
+        for batch in stream_query(self.conn, """
+            SELECT arxiv_id, title, summary, methods, datasets, updated_at FROM nodes ORDER BY arxiv_id;
+        """, name="similarity_nodes"):
+            for arxiv_id, title, summary, methods, datasets, updated_at in batch:
+                stamp = updated_at.isoformat() if updated_at else None
+                if arxiv_id in known and known[arxiv_id] == stamp:
+                    kept.add(arxiv_id)
+                    continue
+                row = np.zeros(DIM, dtype=np.float32)
+                np.add.at(row, features(title, summary, methods, datasets), 1.0)
+                new_ids.append(arxiv_id)
+                new_stamps.append(stamp)
+                rows.append(np.log1p(row))  # sublinear term frequency
+
+        keep = np.array([arxiv_id in kept for arxiv_id in self.ids], dtype=bool)
+        dropped = len(self.ids) - len(kept) - sum(arxiv_id in known for arxiv_id in new_ids)
+        self.ids = [arxiv_id for arxiv_id, k in zip(self.ids, keep) if k] + new_ids
+        self.stamps = [stamp for stamp, k in zip(self.stamps, keep) if k] + new_stamps
+        self.vectors = self.vectors[keep]
+        if rows:
+            self.vectors = np.vstack([self.vectors, np.asarray(rows, dtype=np.float32)])
+        return len(new_ids), dropped
+
+    def weighted(self):
+        """TF-IDF weighted, L2-normalized copy of the matrix"""
+        df = np.count_nonzero(self.vectors, axis=0).astype(np.float32)
+        idf = np.log((1 + len(self.ids)) / (1 + df)) + 1
+        matrix = self.vectors * idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        return matrix / norms
+
+    def top_k(self, k=TOP_K, min_score=MIN_SCORE):
+        """{(source, target): score} for each paper's k nearest neighbours.
+
+        Similarity is symmetric, so each pair is keyed once with the smaller
+        id as source.
+        """
+        matrix = self.weighted()
+        n = len(self.ids)
+        k = min(k, n - 1)
+        pairs = {}
+        if k <= 0:
+            return pairs
+        for start in range(0, n, BLOCK_SIZE):
+            scores = matrix[start:start + BLOCK_SIZE] @ matrix.T
+            rows = np.arange(scores.shape[0])
+            scores[rows, rows + start] = -1  # no self edges
+            best = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            for row, neighbours in enumerate(best):
+                for col in neighbours:
+                    score = float(scores[row, col])
+                    if score >= min_score:
+                        pair = tuple(sorted((self.ids[start + row], self.ids[col])))
+                        pairs[pair] = score
+        return pairs
+
+    def sync_edges(self, pairs):
+        """Insert new and delete stale similarity edges; others are untouched"""
+        cur = self.conn.cursor()
+        cur.execute("""
+            SELECT id, source_id, target_id FROM edges
+            WHERE relationship_type = 'RELATED' AND reasoning LIKE %s AND NOT archived;
+        """, (REASONING_PREFIX + "%",))
+        existing, stale = {}, []
+        for edge_id, source, target in cur.fetchall():
+            # Earlier runs stored both directions; keep one per pair
+            pair = tuple(sorted((source, target)))
+            if pair in existing or pair not in pairs:
+                stale.append(edge_id)
+            else:
+                existing[pair] = edge_id
+
+        added = [
+            (source, target, "RELATED", f"{REASONING_PREFIX} {score:.2f} (summary, methods, datasets)")
+            for (source, target), score in pairs.items()
+            if (source, target) not in existing
+        ]
+        if stale:
+            cur.execute("DELETE FROM edges WHERE id = ANY(%s) AND NOT archived;", (stale,))
+        insert_edges(cur, added)
+        self.conn.commit()
+        cur.close()
+        return len(added), len(stale)
+
+    def run(self):
+        print("=" * 70)
+        print("LOCAL SIMILARITY EDGES")
+        print("=" * 70)
+
+        start = time.time()
+        new, dropped = self.embed_new()
+        self.save()
+        print(f"\n✓ Embedded {new:,} new/changed paper(s), dropped {dropped:,} deleted "
+              f"({len(self.ids):,} total, {self.vectors.nbytes / 1e6:.1f} MB)")
+
+        pairs = self.top_k()
+        print(f"✓ Top-{TOP_K} neighbours: {len(pairs):,} pair(s) ≥ {MIN_SCORE}")
+
+        added, removed = self.sync_edges(pairs)
+        print(f"✓ Edges inserted: {added:,}, removed: {removed:,}")
+        print(f"\n✓ Done in {time.time() - start:.1f}s")
+
+    def close(self):
+        """Close database connection"""
+        self.conn.close()
+
+
+if __name__ == "__main__":
+    try:
+        engine = SimilarityEngine()
+        if "--rebuild" in sys.argv[1:]:
+            engine.reset()
+        engine.run()
+        engine.close()
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,111 @@
+import json
+from types import SimpleNamespace
+
+import chunked_extraction
+from chunked_extraction import (
+    CHUNK_MAX_TOKENS, CHUNK_MIN_TOKENS, chunk_max_tokens, extract_chunked, merge_extractions,
+    split_chunks, split_in_two,
+)
+
+TEXT = "".join(f"line {i:05d} of the paper body\n" for i in range(4000))  # ~120k chars
+
+
+def covers(text, chunks, overlap):
+    """Every character of text is in some chunk and chunks start overlap before the last end"""
+    position = 0
+    for chunk in chunks:
+        start = text.find(chunk, max(position - overlap - 1, 0))
+        assert start != -1 and start <= position
+        position = start + len(chunk)
+    return position == len(text)
+
+
+def test_short_text_is_one_chunk():
+    assert split_chunks("short text", head=100) == ["short text"]
+
+
+def test_chunks_overlap_and_cover_the_text():
+    chunks = split_chunks(TEXT, head=15000, size=15000, overlap=1000, max_chunks=20)
+    assert chunks[0] == TEXT[:15000]
+    assert len(chunks) > 2
+    assert covers(TEXT, chunks, 1000)
+    # Cut at line breaks where possible, never mid-line
+    assert all(chunk.endswith("paper body") for chunk in chunks[1:-1])
+
+
+def test_max_chunks_grows_chunk_size():
+    chunks = split_chunks(TEXT, head=15000, size=15000, overlap=1000, max_chunks=4)
+    assert len(chunks) == 4
+    assert covers(TEXT, chunks, 1000)
+    assert split_chunks(TEXT, head=15000, max_chunks=1) == [TEXT[:15000]]
+
+
+def test_merge_extractions_dedups_entities_and_edges():
+    first = {
+        "node": {"title": "T", "methods": ["Vision Transformer", "ViT"], "datasets": None},
+        "edges": [{"target_arxiv_id": "2101.00001", "relationship_type": "CITES", "reasoning": "a"}],
+        "metadata": {"citation_count": 3},
+    }
+    parts = [
+        {"methods": ["vision-transformer", "", 5], "datasets": ["ImageNet"], "metrics": ["Top-1"],
+         "edges": [{"target_arxiv_id": "2101.00001", "relationship_type": "cites", "reasoning": "b"},
+                   {"target_arxiv_id": "2101.00001", "relationship_type": "BUILDS_ON"},
+                   {"target_arxiv_id": ""}, "not an edge"]},
+        {"datasets": ["imagenet "]},
+    ]
+    merged = merge_extractions(first, parts)
+    assert merged["node"]["title"] == "T"
+    assert merged["node"]["methods"] == ["Vision Transformer", "ViT"]
+    assert merged["node"]["datasets"] == ["ImageNet"]
+    assert merged["node"]["metrics"] == ["Top-1"]
+    assert [(e["relationship_type"], e.get("reasoning")) for e in merged["edges"]] == \
+        [("CITES", "a"), ("BUILDS_ON", None)]
+    assert merged["metadata"] == {"citation_count": 3}
+
+
+def test_chunk_output_budget_scales_with_text():
+    assert chunk_max_tokens("x" * 100) == CHUNK_MIN_TOKENS
+    assert chunk_max_tokens("x" * 20000) == 5000
+    assert chunk_max_tokens("x" * 10 ** 6) == CHUNK_MAX_TOKENS
+
+
+def test_split_in_two_cuts_at_a_line_break():
+    first, second = split_in_two(TEXT[:10000])
+    assert first + second == TEXT[:10000]
+    assert first.endswith("paper body") and second.startswith("\n")
+    assert 2500 < len(first) <= 5000
+
+
+class FakeClient:
+    """Answers chunk prompts; truncates any later chunk longer than `truncate_over`"""
+
+    def __init__(self, truncate_over):
+        self.truncate_over = truncate_over
+        self.chat = SimpleNamespace(completions=self)
+
+    def create(self, messages, model, temperature, max_tokens):
+        prompt = messages[0]["content"]
+        if "part " not in prompt:
+            content, reason = json.dumps({"node": {"title": "T"}, "edges": [], "metadata": {}}), "stop"
+        else:
+            text = prompt.split("Paper text (part", 1)[1]
+            lines = [line for line in text.splitlines() if line.startswith("line ")]
+            edges = [{"target_arxiv_id": line.split()[1], "relationship_type": "CITES"} for line in lines]
+            truncated = len(text) > self.truncate_over
+            content = '{"edges": [' if truncated else json.dumps({"edges": edges})
+            reason = "length" if truncated else "stop"
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content),
+                                                        finish_reason=reason)],
+                               usage=SimpleNamespace(prompt_tokens=10, completion_tokens=5))
+
+
+def test_truncated_chunks_are_retried_in_halves(monkeypatch):
+    monkeypatch.setattr(chunked_extraction, "MIN_SPLIT_CHARS", 100)
+    text = TEXT[:40000]
+    calls = []
+    data = extract_chunked(FakeClient(truncate_over=9000), "x", text,
+                           record=lambda response, stats, chars: calls.append(stats["status"]))
+    first_chunk_lines = {line.split()[1] for line in split_chunks(text)[0].splitlines()}
+    expected = {line.split()[1] for line in text.splitlines()} - first_chunk_lines
+    assert expected <= {edge["target_arxiv_id"] for edge in data["edges"]}
+    assert "truncated" in calls and calls.count("ok") > 2
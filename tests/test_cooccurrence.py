@@ -0,0 +1,89 @@
+import numpy as np
+
+from cooccurrence import CooccurrenceIndex, Incidence
+
+ROWS = [
+    [("cnn", "CNN"), ("rnn", "RNN")],
+    [],
+    [("rnn", "rnn"), ("rnn", "RNN "), ("gan", "GAN")],
+    [("cnn", "cnn")],
+]
+
+
+def dense(m):
+    matrix = np.zeros((len(m.offsets) - 1, len(m.keys)), dtype=int)
+    matrix[m.row_ids, m.codes] = 1
+    return matrix
+
+
+def test_append_rows_builds_csr():
+    m = Incidence()
+    m.append_rows(ROWS[:2])
+    m.append_rows(ROWS[2:])
+    assert m.keys == ["cnn", "rnn", "gan"]
+    assert m.names == ["CNN", "RNN", "GAN"]  # first spelling seen
+    assert m.offsets.tolist() == [0, 2, 2, 4, 5]
+    assert dense(m).tolist() == [[1, 1, 0], [0, 0, 0], [0, 1, 1], [1, 0, 0]]
+    assert m.rows_with(m.index["cnn"]).tolist() == [0, 3]
+
+
+def test_take_drops_rows_and_keeps_columns():
+    m = Incidence()
+    m.append_rows(ROWS)
+    m.take(np.array([False, True, True, False]))
+    assert m.offsets.tolist() == [0, 0, 2]
+    assert dense(m).tolist() == [[0, 0, 0], [0, 1, 1]]
+    assert m.rows_with(m.index["cnn"]).tolist() == []
+
+
+def test_gather_returns_codes_with_their_rows():
+    m = Incidence()
+    m.append_rows(ROWS)
+    codes, rows = m.gather(np.array([0, 2]))
+    assert codes.tolist() == [0, 1, 1, 2]
+    assert rows.tolist() == [0, 0, 2, 2]
+    codes, rows = m.gather(np.array([], dtype=np.int64))
+    assert codes.tolist() == [] and rows.tolist() == []
+
+
+def index_with(tmp_path, methods, datasets, years):
+    index = CooccurrenceIndex(path=str(tmp_path / "cooccurrence.npz"))
+    index.ids = [f"p{i}" for i in range(len(methods))]
+    index.years = np.asarray(years, dtype=np.int32)
+    index.matrices["method"].append_rows([[(k, k.upper()) for k in row] for row in methods])
+    index.matrices["dataset"].append_rows([[(k, k.upper()) for k in row] for row in datasets])
+    index.matrices["metric"].append_rows([[] for _ in methods])
+    return index
+
+
+def test_pairs_match_dense_product(tmp_path):
+    methods = [["cnn", "rnn"], ["cnn"], [], ["rnn", "gan"], ["cnn", "gan"]]
+    datasets = [["imagenet"], ["imagenet", "coco"], ["coco"], ["coco"], []]
+    index = index_with(tmp_path, methods, datasets, [2020, 2021, 2021, 0, 2022])
+    a, b = dense(index.matrices["method"]), dense(index.matrices["dataset"])
+
+    rows, cols, counts = index.pairs("method", "dataset")
+    product = np.zeros((a.shape[1], b.shape[1]), dtype=int)
+    product[rows, cols] = counts
+    assert np.array_equal(product, a.T @ b)
+
+    rows, cols, counts = index.pairs("method", "method")
+    product = np.zeros((a.shape[1], a.shape[1]), dtype=int)
+    product[rows, cols] = counts
+    expected = a.T @ a
+    np.fill_diagonal(expected, 0)
+    assert np.array_equal(product, expected)
+
+
+def test_queries(tmp_path):
+    methods = [["cnn", "rnn"], ["cnn"], [], ["rnn", "gan"], ["cnn", "gan"]]
+    datasets = [["imagenet"], ["imagenet", "coco"], ["coco"], ["coco"], []]
+    index = index_with(tmp_path, methods, datasets, [2020, 2021, 2021, 0, 2022])
+    assert index.with_entity("method", "CNN", "dataset") == [("IMAGENET", 2), ("COCO", 1)]
+    assert index.with_entity("method", "cnn", "method") == [("RNN", 1), ("GAN", 1)]
+    assert index.trend("method", "cnn") == {2020: 1, 2021: 1, 2022: 1}
+    assert index.top_pairs("method", "method", k=1) == [("CNN", "RNN", 1)]
+
+    index.save()
+    reloaded = CooccurrenceIndex(path=index.path)
+    assert reloaded.with_entity("method", "CNN", "dataset") == [("IMAGENET", 2), ("COCO", 1)]
@@ -0,0 +1,81 @@
+import numpy as np
+
+from dedup_papers import NUM_PERM, DedupIndex, minhash, shingle_hashes
+
+TEXT = " ".join(f"word{i}" for i in range(400))
+
+
+def test_short_texts_have_no_shingles():
+    assert len(shingle_hashes("")) == 0
+    assert len(shingle_hashes("   ")) == 0
+    assert len(shingle_hashes("only four words here")) == 0
+    assert len(shingle_hashes("exactly five words right here")) == 1
+    assert minhash("") is None
+
+
+def test_minhash_is_deterministic_and_case_insensitive():
+    signature = minhash(TEXT)
+    assert signature.shape == (NUM_PERM,)
+    assert np.array_equal(signature, minhash(TEXT.upper()))
+
+
+def test_minhash_estimates_similarity():
+    words = TEXT.split()
+    close = " ".join(words[:380] + [f"other{i}" for i in range(20)])
+    far = " ".join(f"other{i}" for i in range(400))
+    assert np.mean(minhash(TEXT) == minhash(close)) > 0.8
+    assert np.mean(minhash(TEXT) == minhash(far)) < 0.1
+
+
+def test_empty_extractions_are_never_duplicates(tmp_path):
+    index = DedupIndex(path=str(tmp_path / "index.npz"))
+    verdict, signature, match = index.check("a", "")
+    assert (verdict, signature, match) == ("new", None, None)
+    index.add("a", signature)
+    assert index.check("b", "  ") == ("new", None, None)
+    assert index.ids == []
+
+
+def test_duplicate_and_revision_verdicts(tmp_path):
+    index = DedupIndex(path=str(tmp_path / "index.npz"))
+    index.add("a", minhash(TEXT))
+    verdict, _, match = index.check("b", TEXT)
+    assert verdict == "duplicate"
+    assert match == index.report[-1] and match["matches"] == "a"
+    assert index.check("a", TEXT)[0] == "new"  # the paper itself
+
+
+def test_add_replaces_stale_signature(tmp_path):
+    index = DedupIndex(path=str(tmp_path / "index.npz"))
+    index.add("a", minhash(TEXT))
+    changed = " ".join(f"other{i}" for i in range(400))
+    index.add("a", minhash(changed))
+    assert index.ids == ["a"]
+    assert index.query(minhash(TEXT)) == (None, 0.0)
+    assert index.query(minhash(changed)) == ("a", 1.0)
+
+    index.save()
+    reloaded = DedupIndex(path=index.path)
+    assert reloaded.query(minhash(changed)) == ("a", 1.0)
+
+
+def test_check_signature_matches_check(tmp_path):
+    index = DedupIndex(path=str(tmp_path / "index.npz"))
+    index.add("a", minhash(TEXT))
+    verdict, signature, _ = index.check_signature("b", minhash(TEXT))
+    assert verdict == "duplicate"
+    assert np.array_equal(signature, minhash(TEXT))
+    assert index.check_signature("c", None) == ("new", None, None)
+
+
+def test_discard_keeps_other_papers_findable(tmp_path):
+    index = DedupIndex(path=str(tmp_path / "index.npz"))
+    texts = {name: " ".join(f"{name}{i}" for i in range(400)) for name in ("a", "b", "c")}
+    for name, text in texts.items():
+        index.add(name, minhash(text))
+    index.discard("a")
+    index.discard("missing")
+    assert sorted(index.ids) == ["b", "c"]
+    assert index.query(minhash(texts["a"])) == (None, 0.0)
+    assert index.query(minhash(texts["b"])) == ("b", 1.0)
+    assert index.query(minhash(texts["c"])) == ("c", 1.0)
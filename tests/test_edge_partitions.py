@@ -0,0 +1,36 @@
+import asyncio
+
+import pytest
+
+from edge_partitions import DEFAULT_TYPE, edge_rows, insert_edges_async, normalize_relationship
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("CITES", "CITES"),
+    ("cites", "CITES"),
+    ("builds on", "BUILDS_ON"),
+    ("  Builds-On ", "BUILDS_ON"),
+    ("compares  to", "COMPARES_TO"),
+    ("", DEFAULT_TYPE),
+    ("   ", DEFAULT_TYPE),
+    (None, DEFAULT_TYPE),
+])
+def test_normalize_relationship(value, expected):
+    assert normalize_relationship(value) == expected
+
+
+def test_edge_rows_normalizes_and_groups_by_type():
+    rows = edge_rows([("a", "b", "related", "r1"), ("a", "c", "cites", None), ("b", "c", "Related", "r2")])
+    assert rows == [("a", "c", "CITES", None), ("a", "b", "RELATED", "r1"), ("b", "c", "RELATED", "r2")]
+
+
+def test_insert_edges_async_sends_normalized_rows():
+    class Connection:
+        async def executemany(self, sql, rows):
+            self.sql, self.rows = sql, rows
+
+    conn = Connection()
+    assert asyncio.run(insert_edges_async(conn, [("a", "b", "builds on", "")])) == 1
+    assert "INSERT INTO edges" in conn.sql
+    assert conn.rows == [("a", "b", "BUILDS_ON", "")]
+    assert asyncio.run(insert_edges_async(Connection(), [])) == 0
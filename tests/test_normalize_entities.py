@@ -0,0 +1,41 @@
+from normalize_entities import EntityNormalizer, canonical_key
+
+
+def test_canonical_key_ignores_case_and_punctuation():
+    assert canonical_key("ImageNet-1K") == "imagenet 1k"
+    assert canonical_key("imagenet 1k") == "imagenet 1k"
+    assert canonical_key("ImageNet (1k)") == "imagenet 1k"
+
+
+def test_canonical_key_keeps_plus_and_hash():
+    assert canonical_key("C++") == "c++"
+    assert canonical_key("C#") == "c#"
+    assert canonical_key("snake_case  name") == "snake case name"
+
+
+def test_canonical_key_normalizes_unicode():
+    assert canonical_key("Ｉｍａｇｅ Net") == "image net"
+
+
+def _normalizer():
+    normalizer = EntityNormalizer.__new__(EntityNormalizer)
+    normalizer.ids, normalizer.pending = {}, {}
+    normalizer.aliases = {"dataset": {"imagenet 1k": "imagenet"}}
+    return normalizer
+
+
+def test_resolve_applies_aliases():
+    assert _normalizer().resolve("dataset", "ImageNet-1K") == "imagenet"
+    assert _normalizer().resolve("method", "ImageNet-1K") == "imagenet 1k"
+
+
+def test_pending_ids_are_cached_only_after_commit():
+    normalizer = _normalizer()
+    normalizer.pending[("dataset", "coco")] = 7
+    normalizer.rolled_back()
+    assert ("dataset", "coco") not in normalizer.ids
+
+    normalizer.pending[("dataset", "coco")] = 8
+    normalizer.committed()
+    assert normalizer.ids == {("dataset", "coco"): 8}
+    assert normalizer.pending == {}
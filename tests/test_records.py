@@ -0,0 +1,73 @@
+import json
+
+import pytest
+
+from extraction import parse_batch_response
+from records import Edge, ExtractionRecord, RecordError, decode_extraction
+
+RESPONSE = {
+    "node": {
+        "arxiv_id": "made-up", "title": "  A Paper  ", "authors": ["A. One", None, "B. Two"],
+        "year": "Published 2023", "summary": "S", "methods": "Mask R-CNN, v2",
+        "datasets": ["COCO", "", None, 7], "metrics": None, "project_page": None, "pdf_link": "p",
+    },
+    "edges": [
+        {"target_arxiv_id": "2101.00001", "relationship_type": "builds on", "reasoning": "r"},
+        {"target_arxiv_id": "", "relationship_type": "CITES"},
+        "not an edge",
+        {"target_arxiv_id": "2101.00002"},
+    ],
+    "metadata": {"citation_count": "1,234 citations"},
+}
+
+
+def test_decode_coerces_fields():
+    record = decode_extraction(RESPONSE, "paper_1")
+    assert isinstance(record, ExtractionRecord)
+    paper = record.paper
+    assert paper.arxiv_id == "paper_1"  # the pipeline's id, not the model's
+    assert paper.title == "A Paper"
+    assert paper.authors == "A. One, B. Two"
+    assert paper.year == 2023
+    assert paper.methods == ["Mask R-CNN, v2"]  # not split on the comma
+    assert paper.datasets == ["COCO", "7"]
+    assert paper.metrics == [] and paper.project_page == ""
+    assert record.edges == [Edge("2101.00001", "BUILDS_ON", "r"), Edge("2101.00002", "RELATED", "")]
+    assert record.dropped_edges == 2
+    assert record.metadata.citation_count == 1234
+
+
+def test_decode_accepts_json_text_and_numbers():
+    data = {"node": {"title": "T", "year": 2021.0}, "metadata": {"citation_count": True}}
+    record = decode_extraction(json.dumps(data), "paper_2")
+    assert record.paper.year == 2021
+    assert record.metadata.citation_count == 0
+    assert record.edges == []
+
+
+@pytest.mark.parametrize("payload", [
+    "not json",
+    "[1, 2]",
+    '{"edges": []}',
+    '{"node": {}, "edges": {"a": 1}}',
+    '{"node": {}, "metadata": [1]}',
+    '{"node": {"year": Infinity}}',
+    '{"node": {"year": NaN}}',
+    '{"node": {}, "metadata": {"citation_count": -Infinity}}',
+])
+def test_decode_rejects_unusable_responses(payload):
+    with pytest.raises(RecordError):
+        decode_extraction(payload, "paper_3")
+
+
+def test_batch_entries_fail_one_at_a_time():
+    content = json.dumps({"papers": {
+        "a": {"node": {"title": "Kept"}, "edges": []},
+        "b": {"node": {"title": 42, "year": 1e400}},  # non-finite year
+        "c": {"node": {"title": ["Not", "a string"]}, "edges": {"x": 1}},
+        "d": {"node": {"title": "  "}},
+    }})
+    results, failed = parse_batch_response(content, ["a", "b", "c", "d", "e"])
+    assert list(results) == ["a"] and results["a"].paper.title == "Kept"
+    assert failed == ["b", "c", "d", "e"]
+    assert parse_batch_response("not json", ["a"]) == ({}, ["a"])
@@ -0,0 +1,45 @@
+from types import SimpleNamespace
+
+from usage_tracking import USAGE_COLUMNS, UsageTracker, split_proportionally
+
+STATS = {"latency": 1.0, "retries": 2, "model": "llama-3.3-70b-versatile", "status": "ok"}
+
+
+def response(prompt_tokens, completion_tokens):
+    return SimpleNamespace(usage=SimpleNamespace(prompt_tokens=prompt_tokens,
+                                                 completion_tokens=completion_tokens))
+
+
+def test_split_proportionally_sums_to_total():
+    assert split_proportionally(10, [1, 1]) == [5, 5]
+    assert split_proportionally(10, [1, 2]) == [3, 7]
+    assert sum(split_proportionally(1001, [3, 5, 7])) == 1001
+    assert split_proportionally(3, [0, 0, 0]) == [1, 1, 1]
+    assert split_proportionally(0, [4, 6]) == [0, 0]
+
+
+def test_record_batch_writes_a_row_per_paper():
+    usage = UsageTracker(None, run_id="run")
+    usage.record_batch([("a", 1000), ("b", 3000)], response(400, 100), STATS)
+    rows = [dict(zip(USAGE_COLUMNS, row)) for row in usage.pending]
+    assert [r["arxiv_id"] for r in rows] == ["a", "b"]
+    assert [r["prompt_tokens"] for r in rows] == [100, 300]
+    assert [r["completion_tokens"] for r in rows] == [25, 75]
+    assert [r["latency_ms"] for r in rows] == [250, 750]
+    assert [r["retries"] for r in rows] == [2, 0]
+    assert rows[0]["batch_id"] == rows[1]["batch_id"] is not None
+    assert usage.totals["calls"] == 1
+    assert usage.totals["prompt_tokens"] == 400
+
+
+def test_failures_are_recorded_without_tokens():
+    usage = UsageTracker(None, run_id="run")
+    error = RuntimeError("rate_limit")
+    error.stats = {**STATS, "status": "error"}
+    usage.record_failure("a", error, 500)
+    usage.record_failure("b", ValueError("no stats"), 500)
+    rows = [dict(zip(USAGE_COLUMNS, row)) for row in usage.pending]
+    assert [r["status"] for r in rows] == ["error", "error"]
+    assert [r["total_tokens"] for r in rows] == [0, 0]
+    assert rows[0]["retries"] == 2 and rows[0]["batch_id"] is None
+    assert usage.totals["failed"] == 2
@@ -0,0 +1,208 @@
+import psycopg2
+from psycopg2 import extras
+import itertools
+import os
+import sys
+import threading
+from datetime import datetime
+
+from export_tables import DB_CONFIG
+from extraction import failure_stats
+
+# USD per 1M tokens (input, output); unknown models are reported without cost
+PRICES = {
+    "llama-3.3-70b-versatile": (0.59, 0.79),
+    "llama-3.1-8b-instant": (0.05, 0.08),
+}
+
+# Paper text size buckets used by the report (upper bound in characters)
+SIZE_BUCKETS = (
+    ("xs <5k", 5000),
+    ("s <15k", 15000),
+    ("m <50k", 50000),
+    ("l ≥50k", None),
+)
+
+
+# llm_usage columns, in the order of the rows record() queues
+USAGE_COLUMNS = (
+    "run_id", "arxiv_id", "model", "call_kind", "prompt_tokens", "completion_tokens",
+    "total_tokens", "latency_ms", "retries", "text_chars", "status", "batch_id",
+)
+
+
+def new_run_id():
+    return f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.getpid()}"
+
+
+def split_proportionally(total, weights):
+    """Integer shares of total in proportion to weights, summing to total"""
+    if not sum(weights):
+        weights = [1] * len(weights)
+    weight_sum = sum(weights)
+    shares = [total * w // weight_sum for w in weights]
+    # Hand the remainder to the largest fractional parts
+    by_fraction = sorted(range(len(weights)), key=lambda i: -(total * weights[i] % weight_sum))
+    for i in by_fraction[:total - sum(shares)]:
+        shares[i] += 1
+    return shares
+
+
+def cost(model, prompt_tokens, completion_tokens):
+    if model not in PRICES:
+        return None
+    price_in, price_out = PRICES[model]
+    return (prompt_tokens * price_in + completion_tokens * price_out) / 1e6
+
+
+class UsageTracker:
+    """Collects response.usage for every LLM call and persists it to llm_usage"""
+
+    def __init__(self, conn, run_id=None):
+        self.conn = conn
+        self.run_id = run_id or new_run_id()
+        self.pending = []
+        self.batches = itertools.count(1)
+        self.lock = threading.Lock()  # backfill workers record concurrently
+        self.totals = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0,
+                       "latency": 0.0, "retries": 0, "cost": 0.0, "failed": 0}
+
+    def record(self, arxiv_id, response, stats, text_chars, call_kind="single"):
+        """Queue one call's usage; call flush() to write it.
+
+        stats["status"] is "ok" unless the call failed ("error", response is
+        None) or its response could not be parsed ("parse_error").
+        """
+        self._queue([(arxiv_id, text_chars)], response, stats, call_kind, None)
+
+    def record_batch(self, papers, response, stats, call_kind="batch"):
+        """Queue one request that covered several papers, as one row per paper.
+
+        papers is [(arxiv_id, text_chars)]. Tokens and latency are split in
+        proportion to text length and retries go to the first row, so sums
+        stay exact; the rows share a batch_id.
+        """
+        self._queue(papers, response, stats, call_kind, f"{self.run_id}-{next(self.batches)}")
+
+    def _queue(self, papers, response, stats, call_kind, batch_id):
+        status = stats.get("status", "ok")
+        usage = getattr(response, "usage", None)
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+        chars = [text_chars for _, text_chars in papers]
+        latency_ms = int(stats["latency"] * 1000)
+        rows = [
+            (self.run_id, arxiv_id, stats["model"], call_kind, p_tok, c_tok, p_tok + c_tok,
+             ms, stats["retries"] if i == 0 else 0, text_chars, status, batch_id)
+            for i, ((arxiv_id, text_chars), p_tok, c_tok, ms) in enumerate(zip(
+                papers, split_proportionally(prompt_tokens, chars),
+                split_proportionally(completion_tokens, chars), split_proportionally(latency_ms, chars),
+            ))
+        ]
+        with self.lock:
+            self.pending.extend(rows)
+            self.totals["calls"] += 1
+            self.totals["failed"] += status != "ok"
+            self.totals["prompt_tokens"] += prompt_tokens
+            self.totals["completion_tokens"] += completion_tokens
+            self.totals["latency"] += stats["latency"]
+            self.totals["retries"] += stats["retries"]
+            self.totals["cost"] += cost(stats["model"], prompt_tokens, completion_tokens) or 0.0
+
+    def record_failure(self, arxiv_id, error, text_chars, call_kind="single"):
+        """Queue a call that raised (see call_groq_with_stats); no tokens are counted"""
+        self.record(arxiv_id, None, failure_stats(error), text_chars, call_kind)
+
+    def flush(self):
+        """Write queued rows in their own transaction.
+
+        Never inside a paper's transaction: a rolled-back save must not take
+        the record of calls that were already paid for with it. Rows are put
+        back if the insert fails.
+        """
+        with self.lock:
+            rows, self.pending = self.pending, []
+        if not rows:
+            return
+        cur = self.conn.cursor()
+        try:
+            extras.execute_values(cur, f"""
+                INSERT INTO llm_usage ({", ".join(USAGE_COLUMNS)}) VALUES %s;
+            """, rows)
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            with self.lock:
+                self.pending[:0] = rows
+            raise
+        finally:
+            cur.close()
+
+    def print_run_summary(self):
+        t = self.totals
+        if not t["calls"]:
+            return
+        tokens_per_sec = t["completion_tokens"] / t["latency"] if t["latency"] else 0.0
+        print(f"\n💰 LLM usage (run {self.run_id}):")
+        print(f"  Calls:             {t['calls']}")
+        print(f"  Prompt tokens:     {t['prompt_tokens']:,}")
+        print(f"  Completion tokens: {t['completion_tokens']:,}")
+        print(f"  Output tokens/sec: {tokens_per_sec:.1f}")
+        print(f"  Retries:           {t['retries']}")
+        print(f"  Failed calls:      {t['failed']}")
+        print(f"  Estimated cost:    ${t['cost']:.4f}")
+
+
+def report(conn, run_id=None):
+    """Aggregate usage by run, model and paper size bucket"""
+    bucket_sql = "CASE " + " ".join(
+        f"WHEN text_chars < {limit} THEN '{label}'" for label, limit in SIZE_BUCKETS if limit
+    ) + f" ELSE '{SIZE_BUCKETS[-1][0]}' END"
+
+    call = "COALESCE(batch_id, id::TEXT)"  # the rows of one batched request count once
+
+    cur = conn.cursor()
+    cur.execute(f"""
+        SELECT run_id, model, {bucket_sql} AS size_bucket,
+               COUNT(DISTINCT {call}), SUM(prompt_tokens), SUM(completion_tokens),
+               SUM(latency_ms)::FLOAT / COUNT(DISTINCT {call}),
+               SUM(completion_tokens) / NULLIF(SUM(latency_ms) / 1000.0, 0),
+               SUM(retries), COUNT(DISTINCT {call}) FILTER (WHERE status <> 'ok'),
+               MIN(MIN(created_at)) OVER (PARTITION BY run_id) AS run_started
+        FROM llm_usage
+        WHERE %s IS NULL OR run_id = %s
+        GROUP BY run_id, model, size_bucket
+        ORDER BY run_started DESC, run_id, model, size_bucket;
+    """, (run_id, run_id))
+    rows = cur.fetchall()
+    cur.close()
+
+    print("=" * 70)
+    print("LLM USAGE REPORT")
+    print("=" * 70)
+    current_run = None
+    for run, model, bucket, calls, p_tok, c_tok, avg_ms, tps, retries, failed, _ in rows:
+        if run != current_run:
+            print(f"\nRun {run}")
+            print(f"  {'model':26} {'size':8} {'calls':>5} {'prompt':>9} {'output':>8} "
+                  f"{'avg ms':>7} {'tok/s':>6} {'retry':>5} {'fail':>4} {'cost $':>8}")
+            current_run = run
+        usd = cost(model, p_tok, c_tok)
+        print(f"  {model[:26]:26} {bucket:8} {calls:5d} {p_tok:9,d} {c_tok:8,d} "
+              f"{float(avg_ms):7.0f} {float(tps or 0):6.1f} {retries:5d} {failed:4d} "
+              f"{'n/a' if usd is None else f'{usd:.4f}':>8}")
+    if not rows:
+        print("\n⚠ No usage recorded yet")
+
+
+if __name__ == "__main__":
+    # python usage_tracking.py [--run=RUN_ID]
+    run = next((a.split("=", 1)[1] for a in sys.argv[1:] if a.startswith("--run=")), None)
+    try:
+        conn = psycopg2.connect(**DB_CONFIG)
+        report(conn, run)
+        conn.close()
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+        import traceback
+        traceback.print_exc()
@@ -28,8 +28,8 @@ print("\n✓ Edges table structure:")
 for col in columns:
     print(f"  - {col[0]} ({col[1]})")
 
-# Count edges
-cur.execute("SELECT COUNT(*) FROM edges;")
+# Count edges (archived ones are history, not part of the graph)
+cur.execute("SELECT COUNT(*) FROM edges WHERE NOT archived;")
 edge_count = cur.fetchone()[0]
 print(f"\n✓ Total edges in database: {edge_count}")
 
@@ -38,6 +38,7 @@ if edge_count > 0:
     cur.execute("""
         SELECT source_id, target_id, type, evidence
         FROM edges
+        WHERE NOT archived
         LIMIT 5;
     """)
     
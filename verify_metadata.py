@@ -1,5 +1,7 @@
 import psycopg2
 
+import graph_stats
+
 # Connect to database
 conn = psycopg2.connect(
     dbname='Assignment',
@@ -50,18 +52,28 @@ if metadata_count > 0:
         print(f"  Citations:    {row[1]}")
         print(f"  Title:        {row[2][:60] if row[2] else 'N/A'}...")
     
-    # Citation statistics
-    cur.execute("""
-        SELECT 
-            COUNT(*) as total,
-            AVG(citation_count) as avg_citations,
-            MAX(citation_count) as max_citations,
-            MIN(citation_count) as min_citations,
-            COUNT(CASE WHEN citation_count > 0 THEN 1 END) as has_citations
-        FROM metadata;
-    """)
+    # Citation statistics - single-row read when graph_stats is installed
+    summary = graph_stats.read(cur)
+    if summary and summary["metadata_count"]:
+        stats = (
+            summary["metadata_count"],
+            summary["citation_sum"] / summary["metadata_count"],
+            summary["citation_max"],
+            summary["citation_min"],
+            summary["papers_with_citations"],
+        )
+    else:
+        cur.execute("""
+            SELECT 
+                COUNT(*) as total,
+                AVG(citation_count) as avg_citations,
+                MAX(citation_count) as max_citations,
+                MIN(citation_count) as min_citations,
+                COUNT(CASE WHEN citation_count > 0 THEN 1 END) as has_citations
+            FROM metadata;
+        """)
+        stats = cur.fetchone()
     
-    stats = cur.fetchone()
     print("\n" + "="*70)
     print("CITATION STATISTICS")
     print("="*70)
@@ -0,0 +1,214 @@
+import hashlib
+import json
+import os
+import sys
+import time
+
+from process_all_papers import BatchPaperProcessor, arxiv_id_from_filename
+
+# Persistent record of every PDF the watcher has seen
+FILE_INDEX = os.path.join("watch", "file_index.json")
+
+# A file must keep the same size/mtime this long before it is ingested,
+# so half-copied downloads are never read
+DEBOUNCE_SECONDS = float(os.getenv("WATCH_DEBOUNCE", "5"))
+
+# Directory rescan interval when inotify isn't available
+POLL_SECONDS = float(os.getenv("WATCH_POLL", "2"))
+
+# Failed files are retried after this delay, doubling per failure up to the cap
+RETRY_SECONDS = float(os.getenv("WATCH_RETRY", "60"))
+MAX_RETRY_SECONDS = float(os.getenv("WATCH_MAX_RETRY", "3600"))
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """SHA-256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class FileIndex:
+    """path -> {size, mtime, sha256, arxiv_id, status[, failures, retry_at]}, stored as JSON"""
+
+    def __init__(self, path=FILE_INDEX):
+        self.path = path
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    def unchanged(self, path, stat):
+        """Cheap stat-only check, no hashing; failed files count as changed once due"""
+        entry = self.entries.get(path)
+        if entry is None or entry["size"] != stat.st_size or entry["mtime"] != stat.st_mtime:
+            return False
+        return entry["status"] != "failed" or entry.get("retry_at", 0) > time.time()
+
+    def due_retries(self):
+        now = time.time()
+        return {path for path, entry in self.entries.items()
+                if entry["status"] == "failed" and entry.get("retry_at", 0) <= now}
+
+    def update(self, path, stat, sha256, arxiv_id, status):
+        entry = {
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "sha256": sha256,
+            "arxiv_id": arxiv_id,
+            "status": status,
+        }
+        if status == "failed":
+            failures = self.entries.get(path, {}).get("failures", 0) + 1
+            entry["failures"] = failures
+            entry["retry_at"] = time.time() + min(RETRY_SECONDS * 2 ** (failures - 1), MAX_RETRY_SECONDS)
+        self.entries[path] = entry
+        self.save()
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, indent=1)
+        os.replace(tmp, self.path)
+
+
+class InotifySource:
+    """Yields changed PDF paths using Linux inotify"""
+
+    def __init__(self, papers_dir):
+        from inotify_simple import INotify, flags  # optional dependency
+
+        self.papers_dir = papers_dir
+        self.inotify = INotify()
+        self.inotify.add_watch(papers_dir, flags.CLOSE_WRITE | flags.MOVED_TO | flags.CREATE | flags.MODIFY)
+
+    def changed(self, timeout):
+        events = self.inotify.read(timeout=int(timeout * 1000))
+        return {os.path.join(self.papers_dir, e.name) for e in events if e.name.endswith('.pdf')}
+
+
+class PollingSource:
+    """Portable fallback: rescan the directory with os.scandir"""
+
+    def __init__(self, papers_dir, index):
+        self.papers_dir = papers_dir
+        self.index = index
+
+    def changed(self, timeout):
+        time.sleep(timeout)
+        changed = set()
+        with os.scandir(self.papers_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith('.pdf') and not self.index.unchanged(entry.path, entry.stat()):
+                    changed.add(entry.path)
+        return changed
+
+
+class PaperWatcher:
+    def __init__(self, papers_dir, processor=None, use_inotify=True):
+        self.papers_dir = papers_dir
+        self.index = FileIndex()
+        self.processor = processor or BatchPaperProcessor()
+        self.pending = {}  # path -> (size, mtime, last change time)
+        self.count = 0
+
+        self.source = None
+        if use_inotify:
+            try:
+                self.source = InotifySource(papers_dir)
+                print("✓ Watching with inotify")
+            except Exception as e:
+                print(f"⚠ inotify unavailable ({e}) - falling back to polling")
+        if self.source is None:
+            self.source = PollingSource(papers_dir, self.index)
+            print(f"✓ Polling every {POLL_SECONDS:g}s")
+
+    def scan_existing(self):
+        """Queue files that changed while the watcher wasn't running"""
+        with os.scandir(self.papers_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith('.pdf') and not self.index.unchanged(entry.path, entry.stat()):
+                    self.pending[entry.path] = (None, None, time.time())
+
+    def debounce(self, changed):
+        """Track changed files; return the ones that have been stable long enough"""
+        now = time.time()
+        for path in changed:
+            self.pending.setdefault(path, (None, None, now))
+
+        ready = []
+        for path, (size, mtime, since) in list(self.pending.items()):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                del self.pending[path]
+                continue
+            if (stat.st_size, stat.st_mtime) != (size, mtime):
+                self.pending[path] = (stat.st_size, stat.st_mtime, now)
+            elif now - since >= DEBOUNCE_SECONDS:
+                del self.pending[path]
+                ready.append(path)
+        return sorted(ready)
+
+    def ingest(self, path):
+        stat = os.stat(path)
+        filename = os.path.basename(path)
+        arxiv_id = arxiv_id_from_filename(filename)
+        sha256 = file_hash(path)
+
+        previous = self.index.entries.get(path)
+        if previous and previous["sha256"] == sha256 and previous["status"] == "ingested":
+            # Touched but identical content - just refresh the stat info
+            self.index.update(path, stat, sha256, arxiv_id, previous["status"])
+            return
+
+        # A known file changed (or its replacement failed before): the stored
+        # extraction is swapped out in the same transaction that saves the new
+        # one, so a failed re-extraction leaves the old paper in place
+        replace = previous is not None and self.processor.check_if_exists(arxiv_id)
+        if replace:
+            print(f"\n↻ {filename} changed - replacing {arxiv_id}")
+
+        self.count += 1
+        ok = self.processor.process_paper(arxiv_id, path, self.count, replace=replace)
+        self.index.update(path, stat, sha256, arxiv_id, "ingested" if ok else "failed")
+
+    def run(self):
+        print("=" * 70)
+        print("WATCHING FOR NEW PAPERS")
+        print("=" * 70)
+        print(f"Directory: {self.papers_dir}")
+        print(f"Debounce:  {DEBOUNCE_SECONDS:g}s\n")
+
+        self.scan_existing()
+        try:
+            while True:
+                timeout = POLL_SECONDS if not self.pending else min(POLL_SECONDS, DEBOUNCE_SECONDS)
+                ready = self.debounce(self.source.changed(timeout) | self.index.due_retries())
+                for path in ready:
+                    self.ingest(path)
+                if ready:
+                    self.processor.dedup.save()
+                    self.processor.resolver.reresolve()
+        except KeyboardInterrupt:
+            print("\n\n⏹ Stopped watching")
+        finally:
+            self.index.save()
+            self.processor.dedup.save()
+            self.processor.close()
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    papers_directory = next((a for a in args if not a.startswith("--")), r"Alaris/papers")
+
+    try:
+        watcher = PaperWatcher(papers_directory, use_inotify="--poll" not in args)
+        watcher.run()
+    except Exception as e:
+        print(f"\n❌ Fatal Error: {e}")
+        import traceback
+        traceback.print_exc()
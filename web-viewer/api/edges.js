@@ -14,7 +14,7 @@ module.exports = async (req, res) => {
   res.setHeader('Access-Control-Allow-Methods', 'GET');
   
   try {
-    const result = await pool.query('SELECT * FROM edges ORDER BY id DESC');
+    const result = await pool.query('SELECT * FROM edges WHERE NOT archived ORDER BY id DESC');
     res.status(200).json(result.rows);
   } catch (error) {
     console.error('Database error:', error);
@@ -0,0 +1,27 @@
+const { Pool } = require('pg');
+
+const pool = new Pool({
+  host: process.env.DB_HOST || 'db.qcrgyeosydtcptrantke.supabase.co',
+  port: process.env.DB_PORT || 5432,
+  database: process.env.DB_NAME || 'postgres',
+  user: process.env.DB_USER || 'postgres',
+  password: process.env.DB_PASSWORD,
+  ssl: { rejectUnauthorized: false }
+});
+
+module.exports = async (req, res) => {
+  res.setHeader('Access-Control-Allow-Origin', '*');
+  res.setHeader('Access-Control-Allow-Methods', 'GET');
+  
+  try {
+    const result = await pool.query('SELECT * FROM graph_stats WHERE id = 1');
+    if (result.rows.length === 0) {
+      res.status(404).json({ error: 'Stats not built', details: 'Run: python graph_stats.py --rebuild' });
+      return;
+    }
+    res.status(200).json(result.rows[0]);
+  } catch (error) {
+    console.error('Database error:', error);
+    res.status(500).json({ error: 'Failed to fetch stats', details: error.message });
+  }
+};